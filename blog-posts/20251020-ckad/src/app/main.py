@@ -1,23 +1,86 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
+import hashlib
 import json
+import os
+import threading
 import uvicorn
 
 app = FastAPI()
 
-def load_metadata():
+METADATA_PATH = os.environ.get("METADATA_PATH", "metadata.json")
+FALLBACK_METADATA = {"version": "unknown", "build": "n/a", "commit": "n/a"}
+
+def load_metadata(path=METADATA_PATH):
     try:
-        with open("metadata.json", "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except FileNotFoundError:
-        return {"version": "unknown", "build": "n/a", "commit": "n/a"}
+        return dict(FALLBACK_METADATA)
+
+class MetadataCache:
+    """
+    Keeps metadata.json parsed and serialized in memory.
+
+    Each request only costs a stat() call: the file is read again only when its mtime or
+    size changes (e.g. a ConfigMap update), so probes and scrapers never re-parse it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = object()  # matches no stat result: the first get() loads the file
+        self.body = b""
+        self.etag = ""
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+
+    def get(self):
+        stamp = self._stat()
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    self._reload(stamp)
+        return self.body, self.etag
+
+    def _reload(self, stamp):
+        try:
+            metadata = load_metadata(self.path)
+        except (OSError, ValueError):
+            if self.body:
+                return  # file is being rewritten: keep serving the last good copy
+            metadata = dict(FALLBACK_METADATA)
+        # Same encoding as FastAPI's JSONResponse
+        body = json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self._stamp = stamp
+
+metadata_cache = MetadataCache(METADATA_PATH)
+
+def etag_matches(if_none_match, etag):
+    if if_none_match is None:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 @app.get("/health")
 async def health():
     return {"status": "ok"}
 
 @app.get("/version")
-async def version():
-    return load_metadata()
+async def version(request: Request):
+    body, etag = metadata_cache.get()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 if __name__ == "__main__":
-    uvicorn.run("app:app", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("app:app", port=8000, reload=True)
@@ -0,0 +1,150 @@
+"""
+Local load benchmark for the /version endpoint.
+
+Starts the app with uvicorn in a separate process, adds a /version-uncached route that
+behaves like the original handler (open and parse metadata.json on every request), and
+drives both with keep-alive HTTP/1.1 connections to compare requests per second:
+
+  - /version-uncached   blocking read + json parse + serialization per request (before)
+  - /version            cached, pre-serialized body (after)
+  - /version + ETag     If-None-Match matches: 304 with no body (what a polling client sees)
+
+Usage:
+    uv run python bench.py
+    uv run python bench.py --connections 128 --duration 10
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+
+def serve(port):
+    # Runs in the server process, with app/ as working directory like in the container
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)
+    import uvicorn
+    from main import app, load_metadata
+
+    @app.get("/version-uncached")
+    async def version_uncached():
+        return load_metadata()
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    etag = None
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        name = name.strip().lower()
+        if name == b"content-length":
+            length = int(value)
+        elif name == b"etag":
+            etag = value.strip().decode()
+    if length:
+        await reader.readexactly(length)
+    return status, etag
+
+
+async def client(port, request, expected_status, deadline, counts):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            writer.write(request)
+            status, _ = await read_response(reader)
+            if status != expected_status:
+                raise RuntimeError(f"unexpected status {status} (expected {expected_status})")
+            counts[0] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(port, path, headers, expected_status, connections, duration):
+    extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n{extra}\r\n".encode()
+    counts = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(port, request, expected_status, start + duration, counts) for _ in range(connections)
+    ))
+    return counts[0] / (time.perf_counter() - start)
+
+
+async def fetch_etag(port):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /version HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n")
+    _, etag = await read_response(reader)
+    writer.close()
+    return etag
+
+
+async def wait_ready(port, timeout=15.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("server did not start")
+            await asyncio.sleep(0.1)
+
+
+async def bench(port, connections, duration):
+    await wait_ready(port)
+    etag = await fetch_etag(port)
+    scenarios = [
+        ("/version-uncached", "/version-uncached", {}, 200),
+        ("/version", "/version", {}, 200),
+        ("/version + If-None-Match", "/version", {"If-None-Match": etag}, 304),
+    ]
+    print(f"{connections} connections, {duration:.0f}s per scenario\n")
+    print(f"{'scenario':<28}{'req/s':>10}")
+    baseline = None
+    for label, path, headers, status in scenarios:
+        # Short warm-up so every scenario starts from a hot server
+        await run_load(port, path, headers, status, connections, min(1.0, duration))
+        rate = await run_load(port, path, headers, status, connections, duration)
+        baseline = baseline or rate
+        print(f"{label:<28}{rate:>10.0f}  ({rate / baseline:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Requests/sec of /version, before and after caching")
+    parser.add_argument("--connections", type=int, default=64, help="Concurrent keep-alive connections (default: 64)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario (default: 5)")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    port = free_port()
+    server = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--serve", str(port)])
+    try:
+        asyncio.run(bench(port, args.connections, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
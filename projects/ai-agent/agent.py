@@ -1,26 +1,85 @@
-from typing import Annotated, Final, Literal, Sequence, TypedDict
+import json
+import time
+from functools import partial
+from typing import Annotated, Any, Callable, Final, Literal, NotRequired, Sequence, TypedDict
 
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
+from langgraph.prebuilt.tool_node import ToolCallRequest, ToolCallWrapper
 
+from core.budget import (
+    build_tool_timeout_wrapper,
+    call_with_timeout,
+    fallback_answer,
+    finalize_instruction,
+    limit_reason,
+    skipped_tool_messages,
+)
+from core.cascade import FAST_TIER, STRONG_TIER, Tier, escalation_reason, route_turn
+from core.config import AgentLimitsConfig, CascadeConfig, ToolCacheConfig
 from core.prompts import SYSTEM_PROMPT
+from core.telemetry import get_telemetry
+from core.toolcache import build_tool_cache_wrapper
+from core.usage import get_usage_ledger
+from providers.http import session_scope
 
 
 class AgentState(TypedDict):
     messages: Annotated[Sequence[BaseMessage], add_messages]
+    # Per-run latency budget bookkeeping (set by the graph, not by callers)
+    iterations: NotRequired[int]
+    deadline: NotRequired[float]
+    llm_timed_out: NotRequired[bool]
+    # Model tier serving this run (set by the router node when the cascade is enabled)
+    tier: NotRequired[Tier]
 
 
+ROUTER_NODE: Final = "router"
 AGENT_NODE: Final = "agent"
 TOOLS_NODE: Final = "tools"
+FINALIZE_NODE: Final = "finalize"
 
 
-def build_agent(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledStateGraph:
+def _trace_tool_call(request: ToolCallRequest, execute: Callable[[ToolCallRequest], Any]) -> Any:
+    """Tool wrapper recording a span and a call counter for every executed tool."""
+
+    telemetry = get_telemetry()
+    name = request.tool_call["name"]
+    with telemetry.span("tool", tool=name) as span:
+        result = execute(request)
+        span["result_status"] = getattr(result, "status", "success")
+    telemetry.inc("agent_tool_calls_total", tool=name, status=span["result_status"])
+    return result
+
+
+def _chain_tool_wrappers(*wrappers: ToolCallWrapper) -> ToolCallWrapper:
+    """Composes ToolNode wrappers; the first one is the outermost."""
+
+    def _chained(request: ToolCallRequest, execute: Callable[[ToolCallRequest], Any]) -> Any:
+        call = execute
+        for wrapper in reversed(wrappers):
+            call = partial(wrapper, execute=call)
+        return call(request)
+
+    return _chained
+
+
+def build_agent(
+    llm: BaseChatModel,
+    tools: list[BaseTool],
+    tool_cache: ToolCacheConfig | None = None,
+    limits: AgentLimitsConfig | None = None,
+    fast_llm: BaseChatModel | None = None,
+    cascade: CascadeConfig | None = None,
+) -> CompiledStateGraph:
     """
     Compiles a LangGraph ReAct agent from a chat model and a list of tools.
 
@@ -29,10 +88,27 @@ def build_agent(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledStateGraph
       2. If the LLM requests tool calls, the tools node executes them.
       3. Tool results are fed back to the agent node.
       4. The loop continues until the LLM returns a plain text response.
+      5. If the turn runs out of tool iterations or wall-clock time, the finalize node
+         asks the LLM for a tool-less answer from what was gathered so far (or builds
+         one from the tool results if even that cannot be done in time).
+
+    Identical calls to pure tools within one run are answered from the earlier
+    result (see `core.toolcache`). Every LLM call, tools node run and tool execution
+    is recorded as a span (see `core.telemetry`), and its prompt tokens are attributed
+    to the system prompt, tool schemas, history and each tool's results (see `core.usage`).
+
+    When `fast_llm` is given and `cascade.enabled` is set, a router node runs first
+    and sends simple turns to the fast model; its responses are escalated to `llm`
+    when they call a tool outside `cascade.fast_tools`, hedge or look unconfident
+    (see `core.cascade`). Once escalated, the rest of the run stays on `llm`.
 
     Args:
       llm (BaseChatModel): A LangChain-compatible chat model with tool-calling support.
       tools (list[BaseTool]): The tools available to the agent.
+      tool_cache (ToolCacheConfig | None): Per-run tool memoization settings (defaults apply if None).
+      limits (AgentLimitsConfig | None): Per-turn latency budget (defaults apply if None).
+      fast_llm (BaseChatModel | None): Optional small model for the fast tier.
+      cascade (CascadeConfig | None): Routing/escalation settings for the fast tier.
 
     Returns:
       CompiledStateGraph: The compiled, executable LangGraph application.
@@ -45,35 +121,166 @@ def build_agent(llm: BaseChatModel, tools: list[BaseTool]) -> CompiledStateGraph
         ]
     )
 
+    limits = limits or AgentLimitsConfig()
+
     bound_llm = llm.bind_tools(tools=tools)
     generate_chain = generation_prompt | bound_llm
+    # Same tool definitions (keeps the prompt prefix stable), but no further calls allowed
+    finalize_chain = generation_prompt | llm.bind_tools(tools=tools, tool_choice="none")
+
+    # Serialised once: the tool definitions sent with every call, for token accounting
+    tool_schemas = json.dumps([convert_to_openai_tool(t) for t in tools])
+
+    def session_of(config: RunnableConfig | None) -> str | None:
+        return ((config or {}).get("configurable") or {}).get(get_usage_ledger().config.session_id_key)
+
+    def record_usage(messages: Sequence[BaseMessage], result: Any, tier: Tier, config: RunnableConfig | None) -> None:
+        ledger = get_usage_ledger()
+        if not ledger.enabled:
+            return
+        ledger.record(
+            messages,
+            result,
+            session=session_of(config),
+            tier=tier,
+            system_prompt=SYSTEM_PROMPT,
+            tool_schemas=tool_schemas,
+        )
 
-    def query_agent(state: AgentState) -> AgentState:
+    use_cascade = fast_llm is not None and cascade is not None and cascade.enabled
+    fast_chain = (generation_prompt | fast_llm.bind_tools(tools=tools)) if use_cascade else None
+
+    def call_llm(
+        chain,
+        messages: Sequence[BaseMessage],
+        deadline: float,
+        tier: Tier,
+        config: RunnableConfig | None = None,
+    ) -> AIMessage:
+        telemetry = get_telemetry()
+        # The session id keeps the conversation on one backend (see providers.balancer)
+        with telemetry.span("agent.llm", messages=len(messages), tier=tier) as span, session_scope(session_of(config)):
+            result = call_with_timeout(lambda: chain.invoke({"messages": messages}), deadline - time.monotonic())
+            tool_calls = result.tool_calls if isinstance(result, AIMessage) else []
+            usage = getattr(result, "usage_metadata", None) or {}
+            span["prompt_tokens"] = usage.get("input_tokens", 0)
+            span["completion_tokens"] = usage.get("output_tokens", 0)
+            span["tool_calls"] = len(tool_calls)
+
+        telemetry.inc("agent_llm_calls_total")
+        telemetry.inc("agent_llm_tier_calls_total", tier=tier)
+        telemetry.inc("agent_llm_tokens_total", span["prompt_tokens"], kind="prompt")
+        telemetry.inc("agent_llm_tokens_total", span["completion_tokens"], kind="completion")
+        record_usage(messages, result, tier, config)
+        return AIMessage(
+            content=result.content,
+            tool_calls=tool_calls,
+            usage_metadata=usage or None,
+            response_metadata=getattr(result, "response_metadata", {}),
+        )
+
+    def route_turn_to_tier(state: AgentState) -> AgentState:
+        tier, reason = route_turn(state["messages"], cascade)
+        print(f"🔀 Routing this turn to the {tier} model ({reason})")
+        get_telemetry().inc("agent_route_total", tier=tier, reason=reason)
+        return {"tier": tier}
+
+    def query_agent(state: AgentState, config: RunnableConfig) -> AgentState:
         print("🤖 Querying the agent")
-        result = generate_chain.invoke({"messages": state["messages"]})
-        tool_calls = result.tool_calls if isinstance(result, AIMessage) else []
-        return {"messages": [AIMessage(content=result.content, tool_calls=tool_calls)]}
+        deadline = state.get("deadline") or time.monotonic() + limits.turn_timeout_s
+        tier = state.get("tier", STRONG_TIER)
+        try:
+            if tier == FAST_TIER:
+                result = call_llm(fast_chain, state["messages"], deadline, FAST_TIER, config)
+                reason = escalation_reason(result, cascade)
+                if reason is None:
+                    return {"messages": [result], "deadline": deadline}
+                print(f"⤴️ Escalating to the strong model ({reason})")
+                get_telemetry().inc("agent_escalations_total", reason=reason)
+                tier = STRONG_TIER
+            result = call_llm(generate_chain, state["messages"], deadline, STRONG_TIER, config)
+        except TimeoutError:
+            print("⏱️ The agent did not answer before the turn deadline")
+            return {"deadline": deadline, "llm_timed_out": True}
 
-    def route_from_agent_to_tools(state: AgentState):
+        return {"messages": [result], "deadline": deadline, "tier": tier}
+
+    def route_from_agent_to_tools(state: AgentState) -> str:
+        if state.get("llm_timed_out"):
+            return FINALIZE_NODE
         result = state["messages"][-1]
         if isinstance(result, AIMessage) and len(result.tool_calls) > 0:
+            if limit_reason(state, limits):
+                return FINALIZE_NODE
             for tool_call in result.tool_calls:
                 print(f"\n🛠️ Agent decided to use tool: {tool_call['name']}")
-            return True
-        return False
+            return TOOLS_NODE
+        return END
+
+    tools_node = ToolNode(
+        tools,
+        wrap_tool_call=_chain_tool_wrappers(
+            build_tool_cache_wrapper(tool_cache or ToolCacheConfig()),
+            _trace_tool_call,
+            build_tool_timeout_wrapper(limits),
+        ),
+    )
+
+    def run_tools(state: AgentState, config: RunnableConfig) -> AgentState:
+        last = state["messages"][-1]
+        tool_calls = len(last.tool_calls) if isinstance(last, AIMessage) else 0
+        with get_telemetry().span("agent.tools", tool_calls=tool_calls):
+            result = tools_node.invoke(state, config)
+        return {**result, "iterations": state.get("iterations", 0) + 1}
+
+    def finalize(state: AgentState, config: RunnableConfig) -> AgentState:
+        reason = limit_reason(state, limits) or "iterations"
+        print(f"⏱️ Turn budget exhausted ({reason}), producing a best-effort answer")
+        get_telemetry().inc("agent_turn_limits_total", reason=reason)
+
+        skipped = skipped_tool_messages(state["messages"], reason)
+        messages = list(state["messages"]) + skipped
+
+        answer = None
+        usage = None
+        if not state.get("llm_timed_out"):
+            try:
+                final_messages = messages + [finalize_instruction(reason)]
+                with get_telemetry().span("agent.finalize", reason=reason), session_scope(session_of(config)):
+                    result = call_with_timeout(
+                        lambda: finalize_chain.invoke({"messages": final_messages}),
+                        limits.finalize_timeout_s,
+                    )
+                record_usage(final_messages, result, STRONG_TIER, config)
+                answer = result.content or None
+                usage = result.usage_metadata
+            except TimeoutError:
+                print("⏱️ The final answer did not arrive in time")
+
+        if answer is None:
+            answer = fallback_answer(messages, reason)
+
+        # Carries the call's token usage, so per-turn totals (batch.py) include it
+        return {"messages": skipped + [AIMessage(content=answer, usage_metadata=usage)]}
 
     builder = StateGraph(state_schema=AgentState)
+    if use_cascade:
+        builder.add_node(ROUTER_NODE, route_turn_to_tier)
+        builder.add_edge(ROUTER_NODE, AGENT_NODE)
     builder.add_node(AGENT_NODE, query_agent)
-    builder.add_node(TOOLS_NODE, ToolNode(tools))
+    builder.add_node(TOOLS_NODE, run_tools)
+    builder.add_node(FINALIZE_NODE, finalize)
     builder.add_conditional_edges(
         AGENT_NODE,
         route_from_agent_to_tools,
-        {True: TOOLS_NODE, False: END},
+        {TOOLS_NODE: TOOLS_NODE, FINALIZE_NODE: FINALIZE_NODE, END: END},
     )
     builder.add_edge(TOOLS_NODE, AGENT_NODE)
-    builder.set_entry_point(AGENT_NODE)
+    builder.add_edge(FINALIZE_NODE, END)
+    builder.set_entry_point(ROUTER_NODE if use_cascade else AGENT_NODE)
 
-    return builder.compile()
+    # Two supersteps per tool iteration, plus the router, the first agent call and finalize
+    return builder.compile().with_config(recursion_limit=2 * limits.max_tool_iterations + 6)
 
 
 def print_graph(app: CompiledStateGraph, type: Literal["ascii", "mermaid"]) -> None:
@@ -0,0 +1,277 @@
+"""
+Batch / offline runner: sends a JSONL question set through the agent graph concurrently.
+
+Input lines are objects with a "question" and an optional "id" (defaults to the line
+number). Every answered question is appended to the output JSONL as soon as it
+completes, with the answer, the tool calls made, per-step latencies and token counts.
+Re-running with the same output file skips questions already answered without error,
+so an interrupted run resumes where it stopped.
+
+All questions of a run are attributed to one usage session (`--session`, default: a
+new id per run, printed in the summary), as `main.py --session` does for a chat.
+
+Usage:
+  python batch.py questions.jsonl results.jsonl --concurrency 4
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
+
+from core.config import Config
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+
+def load_questions(path: str | Path) -> list[dict[str, Any]]:
+    """
+    Reads the question set, assigning line-number ids where none are given.
+
+    Args:
+      path (str | Path): Input JSONL file.
+
+    Returns:
+      list[dict[str, Any]]: One {"id", "question", ...} record per non-empty line.
+
+    Raises:
+      ValueError: If a line has no "question" or two lines share an id.
+    """
+
+    questions = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "question" not in record:
+                raise ValueError(f"{path}:{line_number}: missing 'question'")
+            record["id"] = str(record.get("id", line_number))
+            if record["id"] in seen:
+                raise ValueError(f"{path}:{line_number}: duplicate id '{record['id']}'")
+            seen.add(record["id"])
+            questions.append(record)
+    return questions
+
+
+def completed_ids(path: str | Path) -> set[str]:
+    """Ids already answered successfully in an existing output file (empty if none)."""
+
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by an interruption
+            if record.get("error") is None:
+                done.add(str(record["id"]))
+    return done
+
+
+def _stream_updates(
+    app: "CompiledStateGraph",
+    question: str,
+    configurable: dict[str, Any] | None = None,
+) -> Iterator[tuple[str, dict, float]]:
+    from langchain_core.messages import HumanMessage
+
+    config = {"configurable": configurable} if configurable else None
+    previous = time.perf_counter()
+    for update in app.stream({"messages": [HumanMessage(content=question)]}, config=config, stream_mode="updates"):
+        now = time.perf_counter()
+        for node, values in update.items():
+            yield node, values or {}, now - previous
+        previous = now
+
+
+def run_question(
+    app: "CompiledStateGraph",
+    record: dict[str, Any],
+    user_id_key: str = "user_id",
+    configurable: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Runs one question through the graph and collects its answer and statistics.
+
+    Nodes of this graph run one at a time, so the time between two streamed updates
+    is the latency of the node that produced the second one.
+
+    Args:
+      app (CompiledStateGraph): The compiled agent graph.
+      record (dict[str, Any]): The question record ("id", "question", optional "user_id" scoping memory).
+      user_id_key (str): `configurable` key the memory tools read the user id from
+        (`agent.memory_namespaces.user_id_key`).
+      configurable (dict[str, Any] | None): Base `configurable` of the run (e.g. the session id).
+
+    Returns:
+      dict[str, Any]: The result record written to the output file.
+    """
+
+    from langchain_core.messages import AIMessage, ToolMessage
+
+    result: dict[str, Any] = {
+        "id": record["id"],
+        "question": record["question"],
+        "answer": None,
+        "tool_calls": [],
+        "steps": [],
+        "tokens": {"prompt": 0, "completion": 0},
+        "latency_ms": 0.0,
+        "error": None,
+    }
+    if "expected" in record:
+        result["expected"] = record["expected"]
+
+    configurable = dict(configurable or {})
+    if record.get("user_id") is not None:
+        configurable[user_id_key] = record["user_id"]
+
+    started = time.perf_counter()
+    try:
+        for node, values, seconds in _stream_updates(app, record["question"], configurable):
+            result["steps"].append({"node": node, "latency_ms": round(seconds * 1000, 1)})
+            for message in values.get("messages", []):
+                if isinstance(message, AIMessage):
+                    usage = message.usage_metadata or {}
+                    result["tokens"]["prompt"] += usage.get("input_tokens", 0)
+                    result["tokens"]["completion"] += usage.get("output_tokens", 0)
+                    for tool_call in message.tool_calls:
+                        result["tool_calls"].append({"id": tool_call["id"], "name": tool_call["name"], "args": tool_call["args"]})
+                    if not message.tool_calls:
+                        result["answer"] = message.content
+                elif isinstance(message, ToolMessage):
+                    for tool_call in result["tool_calls"]:
+                        if tool_call["id"] == message.tool_call_id:
+                            tool_call["status"] = message.status
+                            tool_call["result"] = str(message.content)[:500]
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile (`fraction` in [0, 1]) of a list of values; 0 when empty."""
+
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def run_batch(
+    app: "CompiledStateGraph",
+    questions: list[dict[str, Any]],
+    output_path: str | Path,
+    concurrency: int = 4,
+    user_id_key: str = "user_id",
+    configurable: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """
+    Answers every question not yet in `output_path`, `concurrency` at a time.
+
+    Results are appended (and flushed) one line at a time as questions complete, so
+    killing the run loses at most the questions in flight.
+
+    Args:
+      app (CompiledStateGraph): The compiled agent graph (safe to share across threads).
+      questions (list[dict[str, Any]]): The question records (see `load_questions`).
+      output_path (str | Path): Output JSONL file, appended to.
+      concurrency (int): Number of questions in flight at once.
+      user_id_key (str): `configurable` key for the records' "user_id" (see `run_question`).
+      configurable (dict[str, Any] | None): Base `configurable` of every run (e.g. the session id).
+
+    Returns:
+      dict[str, Any]: Run summary (counts, throughput, latency percentiles, tokens).
+    """
+
+    done = completed_ids(output_path)
+    pending = [q for q in questions if q["id"] not in done]
+    print(f"📋 {len(questions)} questions, {len(done)} already answered, {len(pending)} to run", file=sys.stderr)
+
+    latencies: list[float] = []
+    summary = {"answered": 0, "errors": 0, "skipped": len(questions) - len(pending), "prompt_tokens": 0, "completion_tokens": 0}
+
+    started = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(run_question, app, record, user_id_key, configurable) for record in pending]
+        for future in as_completed(futures):
+            # Only this thread writes, so lines never interleave
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            summary["errors" if result["error"] else "answered"] += 1
+            summary["prompt_tokens"] += result["tokens"]["prompt"]
+            summary["completion_tokens"] += result["tokens"]["completion"]
+            latencies.append(result["latency_ms"])
+            status = "❌" if result["error"] else "✅"
+            print(f"{status} [{result['id']}] {result['latency_ms']:.0f} ms", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    summary.update({
+        "elapsed_s": round(elapsed, 2),
+        "questions_per_s": round(len(pending) / elapsed, 3) if pending and elapsed > 0 else 0.0,
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+    })
+    return summary
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs a question set through the agent and prints a JSON summary."""
+
+    parser = argparse.ArgumentParser(description="Run a JSONL question set through the agent")
+    parser.add_argument("input", help="Questions JSONL ({'id': ..., 'question': ...} per line)")
+    parser.add_argument("output", help="Results JSONL (appended to; existing answers are skipped)")
+    parser.add_argument("--config", default="config.json", help="Path to the configuration file")
+    parser.add_argument("--concurrency", type=int, default=4, help="Questions in flight at once")
+    parser.add_argument("--verbose", action="store_true", help="Show the agent's per-step console output")
+    parser.add_argument("--session", help="Session id for token accounting (default: a new id per run)")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    from core.telemetry import configure_telemetry
+    from core.usage import format_totals
+    from main import build_runtime, configure_usage_accounting
+
+    load_dotenv()
+    cfg = Config.load_from_file(args.config)
+    configure_telemetry(cfg.telemetry)
+    ledger = configure_usage_accounting(cfg)
+    session_id = args.session or uuid.uuid4().hex[:12]
+
+    questions = load_questions(args.input)
+    app, retriever_builder = build_runtime(cfg)
+    # Ingestion is not part of the measured run
+    retriever_builder()
+
+    # Agent nodes print progress lines; from several threads at once they are just noise
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if args.verbose else devnull):
+        summary = run_batch(app, questions, args.output, args.concurrency,
+                            user_id_key=cfg.agent.memory_namespaces.user_id_key,
+                            configurable={cfg.usage.session_id_key: session_id})
+
+    summary["session_id"] = session_id
+    if ledger.enabled:
+        print(f"📊 Token usage of session {session_id}: {format_totals(ledger.session_totals(session_id))}",
+              file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
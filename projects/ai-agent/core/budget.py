@@ -0,0 +1,191 @@
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Sequence, TypeVar
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest, ToolCallWrapper
+
+from core.config import AgentLimitsConfig
+
+T = TypeVar("T")
+
+FINALIZE_INSTRUCTION = (
+    "The tool budget for this turn is exhausted ({reason}), so no more tools can be called. "
+    "Answer my last question now using only the information gathered above. "
+    "If something is still missing, say so briefly."
+)
+
+_REASONS = {
+    "iterations": "maximum number of tool iterations reached",
+    "deadline": "time limit for this turn reached",
+}
+
+
+def call_with_timeout(fn: Callable[[], T], timeout_s: float) -> T:
+    """
+    Runs `fn` in a worker thread and waits at most `timeout_s` seconds for its result.
+
+    The worker inherits the caller's context variables (LangChain run config, telemetry
+    span), so nested calls keep being traced. On timeout the worker is abandoned: Python
+    threads cannot be killed, but the caller is released immediately.
+
+    Args:
+      fn (Callable[[], T]): The blocking call to run.
+      timeout_s (float): Maximum time to wait, in seconds.
+
+    Returns:
+      T: The value returned by `fn`.
+
+    Raises:
+      TimeoutError: If `fn` does not complete in time (or the budget is already spent).
+    """
+
+    if timeout_s <= 0:
+        raise TimeoutError("no time budget left")
+
+    context = contextvars.copy_context()
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="budget")
+    try:
+        future = executor.submit(context.run, fn)
+    finally:
+        executor.shutdown(wait=False)
+
+    return future.result(timeout=timeout_s)
+
+
+def remaining_time(state: dict) -> float:
+    """Returns the seconds left before the turn deadline stored in the agent state (inf if unset)."""
+
+    deadline = state.get("deadline")
+    if deadline is None:
+        return float("inf")
+    return deadline - time.monotonic()
+
+
+def limit_reason(state: dict, limits: AgentLimitsConfig) -> str | None:
+    """
+    Returns why the agent must stop calling tools, or None if it is still within budget.
+
+    Args:
+      state (dict): The agent state (`iterations`, `deadline`, `llm_timed_out`).
+      limits (AgentLimitsConfig): The configured latency budget.
+
+    Returns:
+      str | None: 'deadline', 'iterations' or None.
+    """
+
+    if state.get("llm_timed_out") or remaining_time(state) <= 0:
+        return "deadline"
+    if state.get("iterations", 0) >= limits.max_tool_iterations:
+        return "iterations"
+    return None
+
+
+def build_tool_timeout_wrapper(limits: AgentLimitsConfig) -> ToolCallWrapper:
+    """
+    Creates a `ToolNode` wrapper enforcing per-tool timeouts.
+
+    Each tool gets `limits.tool_timeouts[name]` (or `limits.tool_timeout_s`) seconds,
+    capped by the time left before the turn deadline. A tool that overruns is answered
+    with an error ToolMessage so the model can carry on without it. The call itself
+    cannot be stopped (see `call_with_timeout`), so the message says it may still
+    complete: a write such as update_memory_tool can land after the model moved on.
+
+    Args:
+      limits (AgentLimitsConfig): The configured latency budget.
+
+    Returns:
+      ToolCallWrapper: A callable suitable for `ToolNode(wrap_tool_call=...)`.
+    """
+
+    def _wrapper(request: ToolCallRequest, execute: Callable[[ToolCallRequest], Any]) -> Any:
+        name = request.tool_call["name"]
+        state = request.state if isinstance(request.state, dict) else {}
+        timeout_s = min(limits.tool_timeouts.get(name, limits.tool_timeout_s), remaining_time(state))
+
+        try:
+            return call_with_timeout(lambda: execute(request), timeout_s)
+        except TimeoutError:
+            print(f"⏱️ Tool '{name}' timed out after {max(timeout_s, 0):.1f}s")
+            return ToolMessage(
+                content=(
+                    f"Error: tool '{name}' did not answer within {max(timeout_s, 0):.1f}s. It may still "
+                    "complete in the background, so any change it makes may still be applied; do not "
+                    "assume it had no effect."
+                ),
+                name=name,
+                tool_call_id=request.tool_call["id"],
+                status="error",
+            )
+
+    return _wrapper
+
+
+def skipped_tool_messages(messages: Sequence[BaseMessage], reason: str) -> list[ToolMessage]:
+    """
+    Answers the tool calls of the last AIMessage that will not be executed.
+
+    Chat APIs reject a history where an assistant tool call has no matching tool
+    result, so every pending call gets a short "not executed" ToolMessage.
+
+    Args:
+      messages (Sequence[BaseMessage]): The agent state message history.
+      reason (str): 'deadline' or 'iterations'.
+
+    Returns:
+      list[ToolMessage]: One message per unanswered tool call (possibly empty).
+    """
+
+    if not messages or not isinstance(messages[-1], AIMessage):
+        return []
+
+    return [
+        ToolMessage(
+            content=f"Not executed: {_REASONS[reason]}.",
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            status="error",
+        )
+        for tool_call in messages[-1].tool_calls
+    ]
+
+
+def finalize_instruction(reason: str) -> HumanMessage:
+    """Builds the prompt-only instruction asking the model to answer without tools."""
+
+    return HumanMessage(content=FINALIZE_INSTRUCTION.format(reason=_REASONS[reason]))
+
+
+def fallback_answer(messages: Sequence[BaseMessage], reason: str, max_results: int = 3, max_chars: int = 500) -> str:
+    """
+    Builds a best-effort answer from the tool results of the current run, without an LLM.
+
+    Used when even the final, tool-less LLM call cannot be made in time.
+
+    Args:
+      messages (Sequence[BaseMessage]): The agent state message history.
+      reason (str): 'deadline' or 'iterations'.
+      max_results (int): Number of most recent tool results to include.
+      max_chars (int): Truncation length for each included result.
+
+    Returns:
+      str: The answer text.
+    """
+
+    gathered = []
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            break
+        if isinstance(message, ToolMessage) and message.status != "error":
+            content = str(message.content)
+            if len(content) > max_chars:
+                content = content[:max_chars] + "…"
+            gathered.append(f"[{message.name}] {content}")
+
+    header = f"I could not finish this request ({_REASONS[reason]})."
+    if not gathered:
+        return f"{header} Please try again or narrow down the question."
+
+    results = "\n\n".join(reversed(gathered[:max_results]))
+    return f"{header} Here is what I found so far:\n\n{results}"
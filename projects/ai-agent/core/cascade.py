@@ -0,0 +1,94 @@
+import math
+from typing import Final, Literal, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from core.config import CascadeConfig
+
+Tier = Literal["fast", "strong"]
+
+FAST_TIER: Final = "fast"
+STRONG_TIER: Final = "strong"
+
+
+def _last_user_text(messages: Sequence[BaseMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.content if isinstance(message.content, str) else str(message.content)
+    return ""
+
+
+def route_turn(messages: Sequence[BaseMessage], config: CascadeConfig) -> tuple[Tier, str]:
+    """
+    Picks the model tier for a new turn from the user's message alone.
+
+    The check is deliberately cheap (no LLM call): long messages, code and messages
+    containing one of `config.strong_keywords` go to the strong model; everything else
+    starts on the fast model and may still be escalated later (see `escalation_reason`).
+
+    Args:
+      messages (Sequence[BaseMessage]): The agent state message history.
+      config (CascadeConfig): The cascade configuration section.
+
+    Returns:
+      tuple[Tier, str]: The chosen tier and a short reason, used as a metric label.
+    """
+
+    text = _last_user_text(messages)
+    lowered = text.lower()
+
+    if len(text) > config.max_fast_chars:
+        return STRONG_TIER, "length"
+    if "```" in text:
+        return STRONG_TIER, "code"
+    if any(keyword in lowered for keyword in config.strong_keywords):
+        return STRONG_TIER, "keyword"
+    return FAST_TIER, "simple"
+
+
+def answer_confidence(message: AIMessage) -> float | None:
+    """
+    Mean token probability of an answer, from the logprobs returned by the server.
+
+    Args:
+      message (AIMessage): A model response.
+
+    Returns:
+      float | None: A value in [0, 1], or None when the response carries no logprobs.
+    """
+
+    logprobs = (message.response_metadata or {}).get("logprobs") or {}
+    tokens = logprobs.get("content") if isinstance(logprobs, dict) else None
+    if not tokens:
+        return None
+    return math.exp(sum(token["logprob"] for token in tokens) / len(tokens))
+
+
+def escalation_reason(message: AIMessage, config: CascadeConfig) -> str | None:
+    """
+    Decides whether a fast-tier response must be redone by the strong model.
+
+    Args:
+      message (AIMessage): The fast model's response.
+      config (CascadeConfig): The cascade configuration section.
+
+    Returns:
+      str | None: 'tool', 'empty', 'hedge' or 'confidence', or None to keep the answer.
+    """
+
+    if any(tool_call["name"] not in config.fast_tools for tool_call in message.tool_calls):
+        return "tool"
+    if message.tool_calls:
+        return None
+
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    if not content.strip():
+        return "empty"
+    lowered = content.lower()
+    if any(phrase in lowered for phrase in config.escalate_phrases):
+        return "hedge"
+
+    confidence = answer_confidence(message)
+    if confidence is not None and confidence < config.min_confidence:
+        return "confidence"
+    return None
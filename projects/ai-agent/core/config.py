@@ -20,15 +20,65 @@ class OpenAIConfig(BaseModel):
 
 
 class LlamaCppConfig(BaseModel):
-    """Configuration for local models via an OpenAI-compatible API server."""
+    """Configuration for local models via one or more OpenAI-compatible API servers."""
 
     model: str = Field(..., min_length=1, description="Model name as expected by the local server")
-    base_url: str = Field(..., description="OpenAI-compatible API endpoint (e.g. 'http://localhost:8080/v1')")
+    base_url: Optional[str] = Field(
+        default=None,
+        description="OpenAI-compatible API endpoint (e.g. 'http://localhost:8080/v1')",
+    )
+    backends: list[str] = Field(
+        default_factory=list,
+        description="Several OpenAI-compatible endpoints serving the same model, load-balanced by the client",
+    )
+    health_path: str = Field(default="/health", description="Health endpoint path, relative to each backend's host")
+    health_check_interval_s: float = Field(default=5.0, gt=0, description="Seconds between backend health checks")
+    sticky_sessions: bool = Field(
+        default=True,
+        description="Keep a conversation on the same backend so its prompt cache stays warm",
+    )
+    sticky_max_skew: int = Field(
+        default=2,
+        ge=0,
+        description="Leave the sticky backend when it has this many more outstanding requests than the least loaded one",
+    )
     extra_body: Optional[dict] = Field(
         default=None,
         description="Extra fields to pass in every request body (e.g. {'chat_template_kwargs': {'enable_thinking': false}})",
     )
 
+    @model_validator(mode="after")
+    def validate_endpoints(self) -> "LlamaCppConfig":
+        if not self.base_url and not self.backends:
+            raise ValueError("'llamacpp' needs either 'base_url' or a non-empty 'backends' list")
+        return self
+
+    def backend_urls(self) -> list[str]:
+        """All configured endpoints: `backends` if set, otherwise the single `base_url`."""
+        return self.backends or [self.base_url]
+
+
+class DocsWatchConfig(BaseModel):
+    """Live re-indexing of the KB when files under docs_path change."""
+
+    enabled: bool = Field(default=False, description="Watch docs_path and re-embed changed files in the background")
+    backend: str = Field(
+        default="auto",
+        description="'watchdog' (inotify & co., needs the watchdog package), 'polling', or 'auto' (watchdog if installed)",
+    )
+    debounce_s: float = Field(
+        default=1.0,
+        gt=0,
+        description="Quiet period after the last change before re-indexing, in seconds (coalesces editor save bursts)",
+    )
+    poll_interval_s: float = Field(default=2.0, gt=0, description="Seconds between scans with the polling backend")
+
+    @model_validator(mode="after")
+    def validate_backend(self) -> "DocsWatchConfig":
+        if self.backend not in ("auto", "watchdog", "polling"):
+            raise ValueError(f"Unsupported watch backend '{self.backend}'. Expected 'auto', 'watchdog' or 'polling'.")
+        return self
+
 
 class VectorDBConfig(BaseModel):
     """Configuration for the ChromaDB vector store and embeddings."""
@@ -50,13 +100,219 @@ class VectorDBConfig(BaseModel):
     docs_glob: str = Field(default="**/*.md", min_length=1, description="Glob pattern for document discovery")
     db_path: Path = Field(..., description="Path to the ChromaDB persistence directory")
     collection_name: str = Field(..., min_length=1, description="ChromaDB collection name")
+    query_cache_size: int = Field(default=256, ge=0, description="KB query results kept across turns while `watch` is enabled (0 = no cache)")
+    query_cache_ttl_s: float = Field(default=300.0, gt=0, description="Maximum age of a cached KB query result, in seconds")
+    watch: DocsWatchConfig = Field(default_factory=DocsWatchConfig)
+
+
+class ToolCacheConfig(BaseModel):
+    """Configuration for per-run memoization of tool calls."""
+
+    enabled: bool = Field(default=True, description="Reuse results of identical tool calls within a single graph run")
+    cacheable_tools: list[str] = Field(
+        default_factory=lambda: ["query_kb_tool", "get_memory_tool", "recall_memory_tool", "calculate"],
+        description="Tools whose results depend only on their arguments and can be reused",
+    )
+    invalidated_by: dict[str, list[str]] = Field(
+        default_factory=lambda: {"update_memory_tool": ["get_memory_tool", "recall_memory_tool"]},
+        description="Write tool name -> cached tools whose results it invalidates",
+    )
+    reference_duplicates: bool = Field(
+        default=True,
+        description="Answer repeated calls with a short pointer to the earlier result instead of repeating it",
+    )
+
+
+class AgentLimitsConfig(BaseModel):
+    """Latency budget for a single agent turn."""
+
+    max_tool_iterations: int = Field(default=8, ge=1, description="Maximum agent -> tools round trips per turn")
+    turn_timeout_s: float = Field(default=120.0, gt=0, description="Wall-clock deadline for a whole turn, in seconds")
+    tool_timeout_s: float = Field(default=30.0, gt=0, description="Default timeout for a single tool call, in seconds")
+    tool_timeouts: dict[str, float] = Field(
+        default_factory=dict,
+        description="Per-tool timeout overrides, in seconds (e.g. {'query_kb_tool': 10})",
+    )
+    finalize_timeout_s: float = Field(
+        default=30.0,
+        gt=0,
+        description="Time allowed for the tool-less final answer once a limit is hit, in seconds",
+    )
+
+
+class MemoryRecallConfig(BaseModel):
+    """Semantic recall over the agent memory (replaces dumping the whole memory into the prompt)."""
+
+    enabled: bool = Field(default=True, description="Offer recall_memory_tool instead of get_memory_tool")
+    top_k: int = Field(default=5, ge=1, description="Maximum number of memory entries returned per recall")
+    recency_weight: float = Field(
+        default=0.1,
+        ge=0,
+        description="Score bonus for a just-updated entry, added to the cosine similarity",
+    )
+    half_life_days: float = Field(default=30.0, gt=0, description="Age at which the recency bonus has halved, in days")
+    min_score: float = Field(default=0.0, description="Entries scoring below this are never returned")
+
+
+class MemoryNamespacesConfig(BaseModel):
+    """Per-user memory namespaces (one database file per user id, opened on demand)."""
+
+    user_id_key: str = Field(
+        default="user_id",
+        description="RunnableConfig 'configurable' key holding the user/session id; without it the shared memory is used",
+    )
+    max_open: int = Field(default=256, ge=1, description="Maximum number of namespaces kept open in RAM")
+    idle_ttl_s: float = Field(default=600.0, gt=0, description="Close namespaces unused for this long, in seconds")
+
+
+class CalculatorConfig(BaseModel):
+    """How the calculate tool evaluates model-generated expressions."""
+
+    mode: str = Field(
+        default="sandbox",
+        description="'sandbox' (resource-capped worker processes) or 'inprocess' (numexpr in the agent process, no limits)",
+    )
+    workers: int = Field(default=2, ge=1, description="Warm worker processes evaluating expressions in sandbox mode")
+    timeout_s: float = Field(default=2.0, gt=0, description="Wall-clock limit per evaluation, in seconds")
+    cpu_time_s: float = Field(default=2.0, gt=0, description="CPU-time limit per evaluation, in seconds")
+    memory_mb: int = Field(default=256, ge=0, description="Extra address space a worker may allocate, in MB (0 = no cap)")
+    max_expression_chars: int = Field(default=500, ge=1, description="Longer expressions are rejected without evaluation")
+    max_result_chars: int = Field(default=2000, ge=1, description="Longer results are rejected instead of returned")
+    cache_size: int = Field(default=1024, ge=0, description="Expressions whose outcome is remembered (0 = no cache)")
+
+    @model_validator(mode="after")
+    def validate_mode(self) -> "CalculatorConfig":
+        if self.mode not in ("sandbox", "inprocess"):
+            raise ValueError(f"Unsupported calculator mode '{self.mode}'. Expected 'sandbox' or 'inprocess'.")
+        return self
 
 
 class AgentConfig(BaseModel):
     """Configuration for agent runtime behaviour."""
 
-    memory_path: Path = Field(..., description="Path to the persistent memory JSON file")
+    memory_path: Path = Field(
+        ...,
+        description="Path to the persistent memory store (a legacy .json path is migrated to a .sqlite3 file next to it)",
+    )
     history_window: int = Field(default=10, ge=1, description="Number of messages to retain in conversation history")
+    memory_recall: MemoryRecallConfig = Field(default_factory=MemoryRecallConfig)
+    memory_namespaces: MemoryNamespacesConfig = Field(default_factory=MemoryNamespacesConfig)
+    tool_cache: ToolCacheConfig = Field(default_factory=ToolCacheConfig)
+    limits: AgentLimitsConfig = Field(default_factory=AgentLimitsConfig)
+    calculator: CalculatorConfig = Field(default_factory=CalculatorConfig)
+
+
+class HttpClientConfig(BaseModel):
+    """Connection pooling, timeouts and retries shared by all OpenAI-compatible clients."""
+
+    max_connections: int = Field(default=20, ge=1, description="Maximum concurrent connections per client pool")
+    max_keepalive_connections: int = Field(default=10, ge=0, description="Idle connections kept open for reuse")
+    keepalive_expiry_s: float = Field(default=30.0, ge=0, description="How long an idle connection is kept, in seconds")
+    connect_timeout_s: float = Field(default=5.0, gt=0, description="TCP/TLS connect timeout, in seconds")
+    read_timeout_s: float = Field(default=120.0, gt=0, description="Time to wait for response data, in seconds")
+    write_timeout_s: float = Field(default=30.0, gt=0, description="Time to send the request body, in seconds")
+    pool_timeout_s: float = Field(
+        default=30.0,
+        gt=0,
+        description="Time to wait for a free connection when max_connections is reached, in seconds",
+    )
+    max_retries: int = Field(default=3, ge=0, description="Retries on retry_statuses, timeouts and connection errors")
+    retry_statuses: list[int] = Field(
+        default_factory=lambda: [408, 409, 429, 500, 502, 503, 504],
+        description="HTTP statuses worth retrying (the OpenAI SDK's own set by default)",
+    )
+    backoff_base_s: float = Field(default=0.5, gt=0, description="Base of the exponential backoff, in seconds")
+    backoff_max_s: float = Field(default=8.0, gt=0, description="Upper bound of a single backoff delay, in seconds")
+    http2: bool = Field(default=False, description="Negotiate HTTP/2 (requires the 'h2' package)")
+
+
+class TelemetryConfig(BaseModel):
+    """Configuration for structured tracing and metrics."""
+
+    enabled: bool = Field(default=False, description="Record spans and metrics for every agent/tool/retriever step")
+    trace_path: Optional[Path] = Field(default=None, description="JSON-lines file receiving one record per finished span")
+    metrics_path: Optional[Path] = Field(
+        default=None,
+        description="Prometheus text-format file rewritten after every turn (node_exporter textfile collector)",
+    )
+    metrics_port: Optional[int] = Field(default=None, ge=0, le=65535, description="Serve GET /metrics on this port")
+    metrics_host: str = Field(default="127.0.0.1", description="Interface the metrics endpoint binds to")
+
+
+class TokenPrice(BaseModel):
+    """Price of a model's tokens, in any currency, per million tokens."""
+
+    prompt_per_mtok: float = Field(default=0.0, ge=0, description="Price of one million prompt (input) tokens")
+    completion_per_mtok: float = Field(default=0.0, ge=0, description="Price of one million completion (output) tokens")
+
+
+class UsageConfig(BaseModel):
+    """Token accounting: where prompt tokens go, per session and per day."""
+
+    enabled: bool = Field(default=False, description="Attribute the tokens of every LLM call to their sources")
+    usage_path: Optional[Path] = Field(
+        default=None,
+        description="JSON-lines file receiving one record per LLM call; totals are reloaded from it on start",
+    )
+    session_id_key: str = Field(
+        default="session_id",
+        description="RunnableConfig 'configurable' key holding the session id; runs without it count as 'default'",
+    )
+    encoding: str = Field(
+        default="o200k_base",
+        description="tiktoken encoding used to estimate token counts (a ~4 characters/token heuristic if unavailable)",
+    )
+    prices: dict[str, TokenPrice] = Field(
+        default_factory=dict,
+        description="Token prices keyed by '<provider>/<model>' or '<provider>'; calls without a price cost 0",
+    )
+
+
+class CascadeConfig(BaseModel):
+    """Two-tier model routing: simple turns go to a fast model, hard ones to the main model."""
+
+    enabled: bool = Field(default=False, description="Route turns between a fast tier and the main (strong) model")
+    provider: Optional[str] = Field(default=None, description="Fast tier provider: 'openai' or 'llamacpp'")
+    openai: Optional[OpenAIConfig] = None
+    llamacpp: Optional[LlamaCppConfig] = None
+    max_fast_chars: int = Field(
+        default=280,
+        ge=0,
+        description="User messages longer than this always go to the strong model",
+    )
+    strong_keywords: list[str] = Field(
+        default_factory=lambda: [
+            "explain", "why", "compare", "difference", "design", "analy", "summar",
+            "plan", "review", "debug", "architecture", "step by step",
+        ],
+        description="Case-insensitive substrings marking a user message as complex",
+    )
+    fast_tools: list[str] = Field(
+        default_factory=lambda: [
+            "get_today_date", "get_current_time", "calculate", "get_memory_tool", "recall_memory_tool",
+        ],
+        description="Tools the fast tier may call; asking for any other tool escalates the turn",
+    )
+    escalate_phrases: list[str] = Field(
+        default_factory=lambda: ["not sure", "don't know", "do not know", "cannot determine", "unable to"],
+        description="Case-insensitive substrings in a fast-tier answer that trigger escalation",
+    )
+    min_confidence: float = Field(
+        default=0.6,
+        ge=0,
+        le=1,
+        description="Escalate when the fast answer's mean token probability is below this (needs logprobs; 0 disables)",
+    )
+
+    @model_validator(mode="after")
+    def validate_fast_tier(self) -> "CascadeConfig":
+        if not self.enabled:
+            return self
+        if self.provider not in ("openai", "llamacpp"):
+            raise ValueError("'cascade.provider' must be 'openai' or 'llamacpp' when the cascade is enabled")
+        if getattr(self, self.provider) is None:
+            raise ValueError(f"'cascade.{self.provider}' section is required when cascade.provider is '{self.provider}'")
+        return self
 
 
 class Config(BaseModel):
@@ -67,6 +323,10 @@ class Config(BaseModel):
     llamacpp: Optional[LlamaCppConfig] = None
     vectordb: VectorDBConfig
     agent: AgentConfig
+    cascade: CascadeConfig = Field(default_factory=CascadeConfig)
+    http: HttpClientConfig = Field(default_factory=HttpClientConfig)
+    telemetry: TelemetryConfig = Field(default_factory=TelemetryConfig)
+    usage: UsageConfig = Field(default_factory=UsageConfig)
 
     @model_validator(mode="after")
     def validate_provider_config(self) -> "Config":
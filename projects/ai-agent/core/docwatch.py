@@ -0,0 +1,213 @@
+"""
+Live re-indexing of the knowledge base when files under `docs_path` change.
+
+`DocsWatcher` keeps a snapshot of the files matching the docs glob (path -> mtime and
+size) and reports the paths that were added, modified or deleted since the previous
+snapshot. It is woken up either by filesystem events (the optional `watchdog`
+package: inotify on Linux, FSEvents on macOS, ReadDirectoryChangesW on Windows) or by
+a periodic scan when watchdog is not installed. Changes are debounced: the snapshot is
+only diffed once no event arrived for `debounce_s`, so an editor's burst of writes,
+renames and temp files becomes a single re-index of the final file.
+
+`build_reindexer` turns a batch of changed paths into an incremental update of the
+live collection (see `core.vectordb.sync_sources`): only the changed chunks of those
+files are re-embedded, and the KB query cache entries citing them are dropped.
+Everything runs on the watcher's background thread; queries keep being served.
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from core.config import DocsWatchConfig
+from core.telemetry import get_telemetry
+from core.vectordb import KBQueryCache, load_file_chunks, sync_sources
+
+if TYPE_CHECKING:
+    from langchain_core.vectorstores import VectorStoreRetriever
+
+Snapshot = dict[str, tuple[int, int]]
+
+
+def scan(path: str | Path, glob: str) -> Snapshot:
+    """Returns path -> (mtime_ns, size) for every file matching `glob` under `path`."""
+
+    snapshot: Snapshot = {}
+    for item in Path(path).glob(glob):
+        try:
+            stat = item.stat()
+        except OSError:
+            continue  # deleted between listing and stat
+        if item.is_file():
+            snapshot[str(item)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff(before: Snapshot, after: Snapshot) -> set[str]:
+    """Paths added, modified or deleted between two snapshots."""
+
+    return {path for path in before.keys() | after.keys() if before.get(path) != after.get(path)}
+
+
+class DocsWatcher:
+    """Debounced watcher calling `on_change(paths)` from a background thread."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        glob: str,
+        on_change: Callable[[set[str]], object],
+        config: DocsWatchConfig | None = None,
+    ):
+        self.path = Path(path)
+        self.glob = glob
+        self.on_change = on_change
+        self.config = config or DocsWatchConfig()
+        self.backend = self._select_backend()
+
+        self._wakeup = threading.Condition()
+        self._last_event: float | None = None
+        self._stopped = False
+        self._snapshot: Snapshot = {}
+        # Polling: the scan that found a change, re-checked after the debounce period
+        self._pending_scan: Snapshot | None = None
+        self._thread: threading.Thread | None = None
+        self._observer = None
+
+    def _select_backend(self) -> str:
+        if self.config.backend == "polling":
+            return "polling"
+        try:
+            import watchdog.observers  # noqa: F401
+            return "watchdog"
+        except ImportError:
+            if self.config.backend == "watchdog":
+                raise
+            return "polling"
+
+    def notify(self) -> None:
+        """Signals that something under the docs path changed (restarts the debounce timer)."""
+
+        with self._wakeup:
+            self._last_event = time.monotonic()
+            self._wakeup.notify()
+
+    def start(self) -> "DocsWatcher":
+        self._snapshot = scan(self.path, self.glob)
+        if self.backend == "watchdog":
+            self._start_observer()
+        self._thread = threading.Thread(target=self._run, name="docs-watcher", daemon=True)
+        self._thread.start()
+        print(f"👀 Watching {self.path} for changes ({self.backend})")
+        return self
+
+    def stop(self) -> None:
+        with self._wakeup:
+            self._stopped = True
+            self._wakeup.notify()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _start_observer(self) -> None:
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        watcher = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, event) -> None:
+                # Which files changed is decided by the snapshot diff, not by the event
+                if event.event_type not in ("opened", "closed_no_write"):
+                    watcher.notify()
+
+        self._observer = Observer()
+        self._observer.schedule(_Handler(), str(self.path), recursive=True)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def _run(self) -> None:
+        polling = self.backend == "polling"
+        while True:
+            with self._wakeup:
+                if self._stopped:
+                    return
+                if self._last_event is None:
+                    # Idle until an event arrives, or until the next scan when polling
+                    self._wakeup.wait(self.config.poll_interval_s if polling else None)
+                    if self._stopped or self._last_event is not None or not polling:
+                        continue
+                else:
+                    remaining = self._last_event + self.config.debounce_s - time.monotonic()
+                    if remaining > 0:
+                        self._wakeup.wait(remaining)
+                        continue
+                    self._last_event = None
+
+            self.check()
+
+    def check(self) -> set[str]:
+        """
+        Diffs the docs folder against the last snapshot and reports the changes.
+
+        With the polling backend, a change found here only starts the debounce timer;
+        the files are reported once they have stopped changing.
+
+        Returns:
+          set[str]: The changed paths that were passed to `on_change`.
+        """
+
+        current = scan(self.path, self.glob)
+        changed = diff(self._snapshot, current)
+        if not changed:
+            return set()
+
+        if self.backend == "polling" and self._pending_scan != current:
+            # Still being written: wait for a quiet period before re-indexing
+            self._pending_scan = current
+            self.notify()
+            return set()
+
+        self._snapshot = current
+        self._pending_scan = None
+        try:
+            self.on_change(changed)
+        except Exception as e:
+            print(f"⚠️ Re-indexing {len(changed)} changed file(s) failed: {e}")
+            get_telemetry().inc("kb_reindex_total", status="error")
+        return changed
+
+
+def build_reindexer(
+    retriever_builder: Callable[[], "VectorStoreRetriever"],
+    query_cache: KBQueryCache | None = None,
+) -> Callable[[set[str]], int]:
+    """
+    Creates the `on_change` callback re-indexing changed files into the live collection.
+
+    Args:
+      retriever_builder: The (run-once) KB retriever builder; re-indexing waits for the
+                         initial ingestion and then updates its vector store.
+      query_cache (KBQueryCache | None): KB query cache to clear after each re-index.
+
+    Returns:
+      Callable[[set[str]], int]: Callback returning the number of chunks embedded.
+    """
+
+    def _reindex(paths: set[str]) -> int:
+        vectorstore = retriever_builder().vectorstore
+        telemetry = get_telemetry()
+        with telemetry.span("kb.reindex", files=len(paths)) as span:
+            chunks_by_source = {path: load_file_chunks(path) for path in sorted(paths)}
+            embedded = sync_sources(vectorstore, chunks_by_source)
+            span["embedded"] = embedded
+        dropped = query_cache.clear() if query_cache is not None else 0
+        telemetry.inc("kb_reindex_total", status="success")
+        telemetry.inc("kb_reindexed_chunks_total", embedded)
+        print(f"📚 Re-indexed {len(paths)} changed file(s): {embedded} chunk(s) embedded, {dropped} cached result(s) dropped")
+        return embedded
+
+    return _reindex
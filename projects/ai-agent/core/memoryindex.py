@@ -0,0 +1,188 @@
+"""
+Semantic index over the agent memory, so the prompt only receives relevant entries.
+
+Each memory entry is embedded as "<key>: <value as JSON>" with the configured
+`Embeddings` and stored next to it in the memory database (see
+`core.memorystore`). The index is incremental: only entries whose text changed
+since they were last embedded are sent to the embedding model, and vectors of
+deleted entries are dropped. The stored hash also covers the embedding model
+(its `model_id`, when it has one), and vectors whose dimension differs from the
+current model's are re-embedded, so switching models re-indexes the memory
+instead of mixing vector sizes.
+
+Recall ranks entries by cosine similarity to the query plus a recency bonus that
+halves every `half_life_days`, and returns at most `top_k` of them, so the tool
+output stays bounded however large the memory grows.
+"""
+
+import hashlib
+import json
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from core.config import MemoryRecallConfig
+from core.memorystore import MemoryStore
+from core.telemetry import COUNT_BUCKETS, get_telemetry
+
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain_core.embeddings import Embeddings
+
+
+def entry_text(key: str, value: Any) -> str:
+    """The text embedded for a memory entry."""
+
+    return f"{key}: {json.dumps(value, ensure_ascii=False, sort_keys=True)}"
+
+
+def _text_hash(text: str, model_id: str = "") -> str:
+    return hashlib.sha1(f"{model_id}\0{text}".encode("utf-8")).hexdigest()
+
+
+def embeddings_model_id(embeddings: "Embeddings") -> str:
+    """The model behind `embeddings` (set by core.vectordb's wrappers), or its class name."""
+
+    return getattr(embeddings, "model_id", "") or type(embeddings).__name__
+
+
+class MemoryIndex:
+    """Incrementally maintained embedding index over a MemoryStore."""
+
+    def __init__(self, store: MemoryStore, embeddings: "Embeddings", config: MemoryRecallConfig | None = None):
+        self.store = store
+        self.embeddings = embeddings
+        self.config = config or MemoryRecallConfig()
+        self._lock = threading.Lock()
+        self._synced_version: tuple[int, int] | None = None
+        self._model_id = embeddings_model_id(embeddings)
+        # Vector size of the current model, once an embedding call has shown it (bytes)
+        self._vector_bytes: int | None = None
+        # In-RAM copy of the vectors for fast scoring, rebuilt after each sync
+        self._keys: list[str] = []
+        self._matrix: "np.ndarray | None" = None
+
+    def _embed(self, keys: list[str], texts: dict[str, str]) -> dict[str, tuple[str, bytes]]:
+        import numpy as np
+
+        if not keys:
+            return {}
+        with get_telemetry().span("memory.index", entries=len(keys)):
+            vectors = self.embeddings.embed_documents([texts[key] for key in keys])
+        fresh = {
+            key: (_text_hash(texts[key], self._model_id), np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in zip(keys, vectors)
+        }
+        self._vector_bytes = len(next(iter(fresh.values()))[1])
+        return fresh
+
+    def sync(self, force: bool = False) -> int:
+        """
+        Embeds new or changed entries and drops vectors of deleted ones.
+
+        Does nothing (and touches no embedding model) when the store has not changed
+        since the last sync, unless `force` is set.
+
+        Returns:
+          int: Number of entries (re-)embedded.
+        """
+
+        import numpy as np
+
+        with self._lock:
+            version = self.store.version
+            if version == self._synced_version and not force:
+                return 0
+
+            entries = self.store.entries()
+            stored = self.store.vectors()
+
+            texts = {key: entry_text(key, value) for key, (value, _) in entries.items()}
+            changed = [
+                key for key, text in texts.items()
+                if stored.get(key, ("",))[0] != _text_hash(text, self._model_id)
+            ]
+            stale = [key for key in stored if key not in entries]
+            fresh = self._embed(changed, texts)
+
+            merged = {key: vector for key, (_, vector) in {**stored, **fresh}.items() if key in entries}
+            if self._vector_bytes is None and len({len(vector) for vector in merged.values()}) > 1:
+                # Mixed sizes and no embedding call yet: ask the model for its size
+                self._vector_bytes = len(np.asarray(self.embeddings.embed_query("size"), dtype=np.float32).tobytes())
+            if self._vector_bytes is not None:
+                # Vectors from a previous model with another dimension (e.g. same model_id)
+                resized = self._embed([key for key, vector in merged.items() if len(vector) != self._vector_bytes], texts)
+                fresh.update(resized)
+                merged.update({key: vector for key, (_, vector) in resized.items()})
+            if fresh or stale:
+                self.store.put_vectors(fresh, stale)
+
+            self._keys = list(merged)
+            if merged:
+                matrix = np.stack([np.frombuffer(merged[key], dtype=np.float32) for key in self._keys])
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                self._matrix = matrix / np.where(norms == 0, 1, norms)
+            else:
+                self._matrix = None
+
+            # Re-read: our own vector commit does not change the store version
+            self._synced_version = self.store.version
+            return len(fresh)
+
+    def recall(self, query: str, top_k: int | None = None) -> list[tuple[str, Any, float]]:
+        """
+        Returns the memory entries most relevant to `query`, most relevant first.
+
+        Args:
+          query (str): What the agent wants to know (e.g. "user's favourite food").
+          top_k (int | None): Maximum number of entries (defaults to `config.top_k`).
+
+        Returns:
+          list[tuple[str, Any, float]]: (key, value, score) triples.
+        """
+
+        import numpy as np
+
+        self.sync()
+        top_k = top_k or self.config.top_k
+        entries = self.store.entries()
+
+        with self._lock:
+            keys, matrix = self._keys, self._matrix
+        if matrix is None or not keys:
+            return []
+
+        query_vector = np.asarray(self.embeddings.embed_query(query), dtype=np.float32)
+        if query_vector.shape[0] != matrix.shape[1]:
+            # The model's dimension changed under an unchanged model_id: re-embed everything
+            with self._lock:
+                self._vector_bytes = query_vector.nbytes
+            self.sync(force=True)
+            with self._lock:
+                keys, matrix = self._keys, self._matrix
+            if matrix is None or not keys:
+                return []
+
+        with get_telemetry().span("memory.recall", indexed=len(keys)) as span:
+            query_vector /= np.linalg.norm(query_vector) or 1.0
+            similarities = matrix @ query_vector
+
+            now = time.time()
+            scored = []
+            for key, similarity in zip(keys, similarities):
+                if key not in entries:
+                    continue
+                value, updated_at = entries[key]
+                age_days = max(now - updated_at, 0.0) / 86400
+                recency = math.pow(0.5, age_days / self.config.half_life_days)
+                score = float(similarity) + self.config.recency_weight * recency
+                if score >= self.config.min_score:
+                    scored.append((key, value, score))
+
+            scored.sort(key=lambda item: item[2], reverse=True)
+            results = scored[:top_k]
+            span["returned"] = len(results)
+
+        get_telemetry().observe("memory_recalled_entries", len(results), buckets=COUNT_BUCKETS)
+        return results
@@ -0,0 +1,379 @@
+"""
+Persistent key/value store behind the agent memory tools.
+
+The memory used to be a single JSON file, re-read on every lookup and fully rewritten
+on every update with no locking, so concurrent sessions could lose each other's
+updates. It now lives in SQLite:
+
+  - every update is one `INSERT ... ON CONFLICT DO UPDATE` per key inside a single
+    `BEGIN IMMEDIATE` transaction, so writers from several threads or processes are
+    serialised by SQLite's file lock and never overwrite keys they did not touch;
+  - the database runs in WAL mode with `synchronous=FULL`, so a committed update
+    survives a crash and readers never block writers;
+  - reads are served from an in-process cache, invalidated on local writes and when
+    `PRAGMA data_version` reports a commit from another connection.
+
+A legacy `bot_memory.json` is imported automatically the first time its SQLite
+counterpart is opened (see `memory_db_path`); the JSON file itself is left untouched.
+
+For multi-tenant serving, `MemoryNamespaces` gives every user id its own database
+file, created lazily under `<memory stem>.users/` and spread over hashed
+sub-directories. Writers of different users never share a lock, and only recently
+used namespaces stay open, in an LRU bounded by `max_open` and `idle_ttl_s`.
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from core.config import MemoryNamespacesConfig
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS memory_vectors (
+    key TEXT PRIMARY KEY,
+    text_hash TEXT NOT NULL,
+    vector BLOB NOT NULL
+);
+"""
+
+
+def memory_db_path(path: str | Path) -> Path:
+    """
+    Maps the configured memory path to the SQLite file.
+
+    Existing configurations point at `bot_memory.json`; the database is then stored
+    next to it as `bot_memory.sqlite3`. Any other path is used as-is.
+
+    Args:
+      path (str | Path): The configured `agent.memory_path`.
+
+    Returns:
+      Path: The SQLite database path.
+    """
+
+    path = Path(path)
+    return path.with_suffix(".sqlite3") if path.suffix == ".json" else path
+
+
+class MemoryStore:
+    """Thread-safe SQLite key/value store with a version-checked read cache."""
+
+    def __init__(self, path: str | Path, legacy_json: str | Path | None = None, busy_timeout_s: float = 10.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=busy_timeout_s,
+            check_same_thread=False,
+            isolation_level=None,  # explicit BEGIN/COMMIT below
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(_SCHEMA)
+
+        self._cache: dict[str, tuple[Any, float]] | None = None
+        self._cache_version: int | None = None
+        self._local_writes = 0
+
+        if legacy_json is not None:
+            self._migrate_json(Path(legacy_json))
+
+    @classmethod
+    def open(cls, memory_path: str | Path) -> "MemoryStore":
+        """Opens the store for a configured memory path, importing a legacy JSON file if present."""
+
+        memory_path = Path(memory_path)
+        legacy = memory_path if memory_path.suffix == ".json" else None
+        return cls(memory_db_path(memory_path), legacy_json=legacy)
+
+    # -- internals ----------------------------------------------------------
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """Serialised write transaction; takes the database write lock up front."""
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                # data_version does not change for this connection's own commits
+                self._cache = None
+                self._local_writes += 1
+
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _migrate_json(self, legacy: Path) -> None:
+        if not legacy.exists():
+            return
+        with self._write() as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from'").fetchone() is not None:
+                return
+            data = json.loads(legacy.read_text(encoding="utf-8") or "{}")
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO memory (key, value, updated_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now) for key, value in (data.get("user_info") or {}).items()],
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES ('migrated_from', ?)", (str(legacy.resolve()),))
+        print(f"📦 Migrated memory from {legacy} to {self.path}")
+
+    # -- public API ---------------------------------------------------------
+
+    @property
+    def version(self) -> tuple[int, int]:
+        """Changes whenever this or another connection commits; cheap to poll."""
+
+        with self._lock:
+            return self._data_version(), self._local_writes
+
+    def entries(self) -> dict[str, tuple[Any, float]]:
+        """
+        Returns every stored key with its value and last update time.
+
+        Served from the cache unless this or another connection committed since the
+        last read.
+
+        Returns:
+          dict[str, tuple[Any, float]]: Key -> (value, updated_at as a Unix timestamp).
+        """
+
+        with self._lock:
+            version = self._data_version()
+            if self._cache is None or version != self._cache_version:
+                rows = self._conn.execute("SELECT key, value, updated_at FROM memory ORDER BY key").fetchall()
+                self._cache = {key: (json.loads(value), updated_at) for key, value, updated_at in rows}
+                self._cache_version = version
+            return dict(self._cache)
+
+    def get_all(self) -> dict[str, Any]:
+        """Returns every stored key and value (see `entries`)."""
+
+        return {key: value for key, (value, _) in self.entries().items()}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Returns one value (see `get_all`)."""
+
+        return self.get_all().get(key, default)
+
+    def upsert(self, values: dict[str, Any]) -> None:
+        """
+        Inserts or replaces the given keys atomically; other keys are left untouched.
+
+        Args:
+          values (dict[str, Any]): Key -> JSON-serialisable value.
+
+        Raises:
+          TypeError: If a value cannot be serialised to JSON.
+        """
+
+        if not values:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in values.items()]
+
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT INTO memory (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                rows,
+            )
+
+    def delete(self, keys: list[str]) -> None:
+        """Removes the given keys (missing keys are ignored)."""
+
+        with self._write() as conn:
+            conn.executemany("DELETE FROM memory WHERE key = ?", [(key,) for key in keys])
+            conn.executemany("DELETE FROM memory_vectors WHERE key = ?", [(key,) for key in keys])
+
+    def vectors(self) -> dict[str, tuple[str, bytes]]:
+        """Returns the stored embedding of every indexed key: key -> (text hash, raw float32 vector)."""
+
+        with self._lock:
+            rows = self._conn.execute("SELECT key, text_hash, vector FROM memory_vectors").fetchall()
+        return {key: (text_hash, vector) for key, text_hash, vector in rows}
+
+    def put_vectors(self, vectors: dict[str, tuple[str, bytes]], stale: list[str] | None = None) -> None:
+        """
+        Stores embeddings (see `vectors`) and drops those of `stale` keys, in one transaction.
+
+        Vectors do not affect the memory entries, so the read cache is kept.
+        """
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO memory_vectors (key, text_hash, vector) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET text_hash = excluded.text_hash, vector = excluded.vector",
+                    [(key, text_hash, vector) for key, (text_hash, vector) in vectors.items()],
+                )
+                self._conn.executemany("DELETE FROM memory_vectors WHERE key = ?", [(key,) for key in stale or []])
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def namespace_db_path(memory_path: str | Path, namespace: str) -> Path:
+    """
+    Maps a user/session id to its own database file.
+
+    Files live under `<memory stem>.users/<2 hex chars>/` so no single directory grows
+    to thousands of entries; the file name keeps a readable, sanitised form of the id
+    plus a hash, so distinct ids never collide.
+
+    Args:
+      memory_path (str | Path): The configured `agent.memory_path`.
+      namespace (str): The user or session id.
+
+    Returns:
+      Path: The namespace's SQLite database path.
+    """
+
+    memory_path = Path(memory_path)
+    digest = hashlib.sha1(namespace.encode("utf-8")).hexdigest()
+    readable = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace)[:48]
+    root = memory_path.with_name(f"{memory_path.stem}.users")
+    return root / digest[:2] / f"{readable}-{digest[:10]}.sqlite3"
+
+
+class MemoryNamespace:
+    """An open store for one namespace, plus whatever per-namespace state callers attach."""
+
+    def __init__(self, name: str, store: MemoryStore):
+        self.name = name
+        self.store = store
+        self.index: Any = None
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+class MemoryNamespaces:
+    """
+    Lazily opened per-namespace stores, kept in a bounded LRU.
+
+    The default namespace (None) is the store at the configured memory path itself, so
+    single-user setups and their migrated JSON memory keep working unchanged.
+
+    Stores are opened outside the registry lock (connecting, PRAGMAs and a legacy JSON
+    migration can be slow): other namespaces stay available meanwhile, and concurrent
+    callers of the namespace being opened wait for that single open.
+    """
+
+    def __init__(self, memory_path: str | Path, config: MemoryNamespacesConfig | None = None):
+        self.memory_path = Path(memory_path)
+        self.config = config or MemoryNamespacesConfig()
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str | None, MemoryNamespace]" = OrderedDict()
+        # Namespaces being opened by some thread, set once the attempt is over
+        self._opening: dict[str | None, threading.Event] = {}
+
+    def _open_store(self, name: str | None) -> MemoryStore:
+        if name is None:
+            return MemoryStore.open(self.memory_path)
+        return MemoryStore(namespace_db_path(self.memory_path, name))
+
+    def _evict(self) -> None:
+        # Called with the lock held; namespaces in use are never closed under a caller
+        now = time.monotonic()
+        for name in list(self._open):
+            namespace = self._open[name]
+            idle = now - namespace.last_used > self.config.idle_ttl_s
+            if namespace.in_use == 0 and (idle or len(self._open) > self.config.max_open):
+                del self._open[name]
+                namespace.store.close()
+
+    @contextmanager
+    def acquire(self, name: str | None) -> Iterator[MemoryNamespace]:
+        """
+        Yields the open namespace `name`, opening (and creating) it if needed.
+
+        Args:
+          name (str | None): The user or session id, or None for the default namespace.
+
+        Yields:
+          MemoryNamespace: The namespace, guaranteed to stay open until the block exits.
+        """
+
+        namespace = self._checkout(name)
+        try:
+            yield namespace
+        finally:
+            with self._lock:
+                namespace.in_use -= 1
+                namespace.last_used = time.monotonic()
+
+    def _use(self, namespace: MemoryNamespace) -> MemoryNamespace:
+        # Called with the lock held
+        self._open.move_to_end(namespace.name)
+        namespace.in_use += 1
+        namespace.last_used = time.monotonic()
+        self._evict()
+        return namespace
+
+    def _checkout(self, name: str | None) -> MemoryNamespace:
+        while True:
+            with self._lock:
+                namespace = self._open.get(name)
+                if namespace is not None:
+                    return self._use(namespace)
+                opening = self._opening.get(name)
+                if opening is None:
+                    opening = self._opening[name] = threading.Event()
+                    break
+            # Another thread is opening it: wait, then look again (or retry if it failed)
+            opening.wait()
+
+        try:
+            store = self._open_store(name)
+        except BaseException:
+            with self._lock:
+                del self._opening[name]
+            opening.set()
+            raise
+        with self._lock:
+            del self._opening[name]
+            namespace = MemoryNamespace(name, store)
+            self._open[name] = namespace
+            self._use(namespace)
+        opening.set()
+        return namespace
+
+    @property
+    def open_count(self) -> int:
+        with self._lock:
+            return len(self._open)
+
+    def close(self) -> None:
+        with self._lock:
+            for namespace in self._open.values():
+                namespace.store.close()
+            self._open.clear()
@@ -0,0 +1,262 @@
+"""
+Resource-bounded evaluation of model-generated math expressions.
+
+`numexpr.evaluate` runs native code: an expensive or memory-hungry expression
+evaluated in the agent process pins a CPU or exhausts RAM for every conversation.
+`ExpressionSandbox` evaluates expressions in a small pool of warm worker processes
+instead, each capped with `setrlimit`:
+
+  - RLIMIT_AS bounds the worker's address space, so a huge allocation raises
+    MemoryError inside the worker;
+  - RLIMIT_CPU is re-armed before every call to `cpu_time_s` seconds past the CPU
+    time used so far, so a runaway evaluation is killed by SIGXCPU;
+  - a wall-clock timeout in the parent kills and replaces a worker that does not
+    answer in time (e.g. blocked in native code).
+
+A killed worker is replaced immediately, so the pool stays warm. A worker reports when
+it is ready, and its startup (spawn and numexpr import) does not count against the
+timeout of the evaluation that waits for it.
+
+Results and deterministic failures (evaluation errors, results too large) are kept in an
+LRU cache, so a bad expression repeated by the model fails instantly. Timeouts, CPU-limit
+kills and crashes are not cached: they can come from load or an unrelated worker failure,
+and caching them would make the expression fail for the rest of the process. numexpr's
+own compiled-expression cache stays warm inside each long-lived worker. Results longer
+than `max_result_chars` are rejected rather than flooding the prompt.
+"""
+
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from collections import OrderedDict
+from multiprocessing.connection import Connection
+from typing import Any
+
+from core.config import CalculatorConfig
+from core.telemetry import get_telemetry
+
+# Spawning a worker and importing numexpr; generous, as it can be slow under load
+WORKER_START_TIMEOUT_S = 30.0
+
+
+class SandboxError(Exception):
+    """An expression could not be evaluated within the sandbox limits."""
+
+
+def format_result(result: Any) -> str:
+    """Formats a numexpr result without forcing it through float() (keeps precision, handles arrays)."""
+
+    if hasattr(result, "shape"):
+        # NumPy 0-d scalar: extract the underlying Python scalar
+        if result.shape == ():
+            try:
+                return str(result.item())
+            except Exception:
+                return str(result)
+        return str(result)
+    return str(result)
+
+
+def evaluate_expression(expression: str) -> str:
+    """
+    Evaluates an expression with numexpr in the current process, without limits.
+
+    Only literals and numexpr functions are visible: unlike a bare `numexpr.evaluate`,
+    names from the caller's frame are never picked up.
+
+    Args:
+      expression (str): A mathematical expression string.
+
+    Returns:
+      str: The formatted result.
+    """
+
+    import numexpr
+
+    return format_result(numexpr.evaluate(expression, local_dict={}, global_dict={}))
+
+
+def _virtual_memory_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _worker_main(conn: Connection, memory_mb: int, cpu_time_s: float) -> None:
+    # One native thread per worker: the pool size is the concurrency knob
+    for var in ("NUMEXPR_MAX_THREADS", "NUMEXPR_NUM_THREADS", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = "1"
+
+    import resource
+
+    import numexpr  # noqa: F401 - imported before the memory cap so the cap only bounds evaluations
+
+    if memory_mb > 0:
+        limit = _virtual_memory_bytes() + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    conn.send(("ready", ""))
+
+    while True:
+        try:
+            expression = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime + cpu_time_s) + 1
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.RLIM_INFINITY))
+
+        try:
+            reply = ("ok", evaluate_expression(expression))
+        except MemoryError:
+            reply = ("error", f"memory limit of {memory_mb} MB exceeded")
+        except Exception as e:
+            reply = ("error", str(e))
+        conn.send(reply)
+
+
+class _Worker:
+    def __init__(self, config: CalculatorConfig):
+        context = multiprocessing.get_context("spawn")
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, config.memory_mb, config.cpu_time_s),
+            name="calculator-sandbox",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+
+class ExpressionSandbox:
+    """Pool of resource-capped worker processes evaluating numexpr expressions."""
+
+    # Outcomes that depend only on the expression ("timeout", "cpu" and "crash" do not)
+    CACHED_OUTCOMES = frozenset({"ok", "error", "too_large"})
+
+    def __init__(self, config: CalculatorConfig | None = None):
+        self.config = config or CalculatorConfig()
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: list[_Worker] = []
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, tuple[str, str]]" = OrderedDict()
+        self._started = False
+
+    def start(self) -> None:
+        """Starts the worker processes (idempotent; also done on first use)."""
+
+        with self._lock:
+            if self._started:
+                return
+            for _ in range(self.config.workers):
+                worker = _Worker(self.config)
+                self._workers.append(worker)
+                self._idle.put(worker)
+            self._started = True
+
+    def close(self) -> None:
+        with self._lock:
+            for worker in self._workers:
+                worker.kill()
+            self._workers.clear()
+            self._started = False
+        self._idle = queue.Queue()
+
+    def _replace(self, worker: _Worker) -> _Worker:
+        worker.kill()
+        replacement = _Worker(self.config)
+        with self._lock:
+            self._workers = [replacement if w is worker else w for w in self._workers]
+        return replacement
+
+    def _cached(self, expression: str) -> tuple[str, str] | None:
+        with self._lock:
+            entry = self._cache.get(expression)
+            if entry is not None:
+                self._cache.move_to_end(expression)
+            return entry
+
+    def _remember(self, expression: str, entry: tuple[str, str]) -> None:
+        if self.config.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[expression] = entry
+            self._cache.move_to_end(expression)
+            while len(self._cache) > self.config.cache_size:
+                self._cache.popitem(last=False)
+
+    def _run(self, expression: str) -> tuple[str, str, str]:
+        worker = self._idle.get()
+        try:
+            if not worker.ready:
+                if not worker.conn.poll(WORKER_START_TIMEOUT_S):
+                    worker = self._replace(worker)
+                    return "error", "evaluation worker did not start in time", "crash"
+                worker.conn.recv()
+                worker.ready = True
+            worker.conn.send(expression)
+            if not worker.conn.poll(self.config.timeout_s):
+                worker = self._replace(worker)
+                return "error", f"evaluation exceeded {self.config.timeout_s:g}s and was cancelled", "timeout"
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            # The worker died mid-evaluation: SIGXCPU from the CPU limit, or a native crash
+            worker.process.join(timeout=1)
+            exitcode = worker.process.exitcode
+            worker = self._replace(worker)
+            if exitcode == -signal.SIGXCPU:
+                return "error", f"evaluation exceeded the CPU limit of {self.config.cpu_time_s:g}s", "cpu"
+            return "error", f"evaluation worker exited unexpectedly (exit code {exitcode})", "crash"
+        finally:
+            self._idle.put(worker)
+        return status, value, status
+
+    def evaluate(self, expression: str) -> str:
+        """
+        Evaluates `expression` in a worker process.
+
+        Args:
+          expression (str): A mathematical expression string.
+
+        Returns:
+          str: The formatted result.
+
+        Raises:
+          SandboxError: If the expression is invalid, too long, exceeds a limit or its
+            result is too large.
+        """
+
+        telemetry = get_telemetry()
+        if len(expression) > self.config.max_expression_chars:
+            telemetry.inc("calculator_evaluations_total", result="rejected")
+            raise SandboxError(f"expression longer than {self.config.max_expression_chars} characters")
+
+        entry = self._cached(expression)
+        if entry is not None:
+            telemetry.inc("calculator_evaluations_total", result="cached")
+        else:
+            self.start()
+            with telemetry.span("calculator.evaluate", chars=len(expression)):
+                status, value, outcome = self._run(expression)
+            if status == "ok" and len(value) > self.config.max_result_chars:
+                status, value, outcome = "error", f"result longer than {self.config.max_result_chars} characters", "too_large"
+            telemetry.inc("calculator_evaluations_total", result=outcome)
+            entry = (status, value)
+            if outcome in self.CACHED_OUTCOMES:
+                self._remember(expression, entry)
+
+        status, value = entry
+        if status != "ok":
+            raise SandboxError(value)
+        return value
@@ -0,0 +1,108 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+
+T = TypeVar("T")
+
+
+class StartupProfiler:
+    """Collects a named, ordered breakdown of where startup time goes."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: list[tuple[str, str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, kind: str, name: str) -> Iterator[None]:
+        """
+        Times the enclosed block and records it as one line of the report.
+
+        Args:
+          kind (str): Step category, 'import' or 'init'.
+          name (str): Human-readable step name.
+        """
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps.append((kind, name, time.perf_counter() - started))
+
+    def report(self) -> str:
+        """Formats the recorded steps as a table, with per-kind subtotals."""
+
+        total = time.perf_counter() - self.started
+        lines = [f"{'kind':<8} {'step':<48} {'seconds':>8}", "-" * 66]
+        for kind, name, seconds in self.steps:
+            lines.append(f"{kind:<8} {name:<48} {seconds:>8.3f}")
+        lines.append("-" * 66)
+        for kind in ("import", "init", "warmup"):
+            subtotal = sum(seconds for k, _, seconds in self.steps if k == kind)
+            if subtotal:
+                lines.append(f"{kind + ' total':<57} {subtotal:>8.3f}")
+        lines.append(f"{'wall clock since start':<57} {total:>8.3f}")
+        return "\n".join(lines)
+
+
+def run_once(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Wraps a zero-argument factory so it runs at most once, even across threads.
+
+    Concurrent callers block until the first call completes and then share its result,
+    so a background warm-up and a first tool call never build the same object twice.
+    If the factory raises, the error is propagated and the next call retries.
+
+    Args:
+      factory (Callable[[], T]): The expensive builder (e.g. the vector DB retriever builder).
+
+    Returns:
+      Callable[[], T]: A thread-safe memoized version of `factory`.
+    """
+
+    lock = threading.Lock()
+    state: dict = {"done": False, "value": None}
+
+    def _once() -> T:
+        if state["done"]:
+            return state["value"]
+        with lock:
+            if not state["done"]:
+                state["value"] = factory()
+                state["done"] = True
+        return state["value"]
+
+    return _once
+
+
+def warm_in_background(name: str, fn: Callable[[], object], profiler: StartupProfiler | None = None) -> threading.Thread:
+    """
+    Starts `fn` in a daemon thread so expensive initialisation overlaps with other work.
+
+    Errors are reported but not raised: the same initialisation runs again lazily on
+    first real use, where the error surfaces to the caller.
+
+    Args:
+      name (str): Name used for the thread and in the profiler report.
+      fn (Callable[[], object]): The warm-up function.
+      profiler (StartupProfiler | None): Optional profiler recording the warm-up duration.
+
+    Returns:
+      threading.Thread: The started thread (join it to wait for the warm-up).
+    """
+
+    def _run() -> None:
+        try:
+            if profiler is not None:
+                with profiler.step("warmup", name):
+                    fn()
+            else:
+                fn()
+        except Exception as e:
+            print(f"⚠️ Background warm-up '{name}' failed: {e}")
+
+    thread = threading.Thread(target=_run, name=f"warmup-{name}", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,273 @@
+"""
+Structured tracing and metrics for the agent.
+
+Every instrumented step (agent LLM call, tools node, each tool, retriever, embedding
+calls, ingestion) opens a span with `get_telemetry().span(name)`. Spans nest through a
+context variable, so a tool span started inside the tools node is recorded as its child
+and shares the trace id of the turn that started it.
+
+Outputs:
+  - JSON-lines traces: one object per finished span, appended to `trace_path`.
+  - Prometheus text-format metrics: rewritten atomically to `metrics_path` after each
+    root span (textfile-collector style) and/or served on `http://host:port/metrics`.
+
+Telemetry is disabled by default; a disabled instance turns every call into a no-op.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+
+from core.config import TelemetryConfig
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current_span: ContextVar[dict | None] = ContextVar("telemetry_current_span", default=None)
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...], extra: dict[str, str] | None = None) -> str:
+    items = list(labels) + list((extra or {}).items())
+    if not items:
+        return ""
+    escaped = []
+    for k, v in items:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{k}="{v}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Telemetry:
+    """Span recorder and in-process metrics registry."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        trace_path: str | Path | None = None,
+        metrics_path: str | Path | None = None,
+    ):
+        self.enabled = enabled
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.metrics_path = Path(metrics_path) if metrics_path else None
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, _Histogram]] = {}
+        self._server: ThreadingHTTPServer | None = None
+
+    # -- tracing ------------------------------------------------------------
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[dict[str, Any]]:
+        """
+        Records a timed span around the enclosed block.
+
+        The yielded dict holds the span attributes; callers may add entries to it
+        (e.g. token counts known only after the call) before the block exits.
+
+        Args:
+          name (str): Span name, dotted by component (e.g. 'agent.llm', 'kb.retrieve').
+          **attributes: Initial span attributes.
+
+        Yields:
+          dict[str, Any]: The mutable span attributes.
+        """
+
+        if not self.enabled:
+            yield dict(attributes)
+            return
+
+        parent = _current_span.get()
+        span: dict[str, Any] = {
+            "trace_id": parent["trace_id"] if parent else uuid.uuid4().hex,
+            "span_id": uuid.uuid4().hex[:16],
+            "parent_id": parent["span_id"] if parent else None,
+            "name": name,
+            "start": time.time(),
+            "attributes": dict(attributes),
+        }
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        span["status"] = "ok"
+        try:
+            yield span["attributes"]
+        except BaseException as e:
+            span["status"] = "error"
+            span["error"] = repr(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            duration = time.perf_counter() - started
+            span["duration_ms"] = round(duration * 1000, 3)
+            self.observe("agent_span_duration_seconds", duration, span=name)
+            if span["status"] == "error":
+                self.inc("agent_span_errors_total", span=name)
+            self._write_trace(span)
+            if parent is None and self.metrics_path:
+                self.write_metrics(self.metrics_path)
+
+    def _write_trace(self, span: dict[str, Any]) -> None:
+        if not self.trace_path:
+            return
+        line = json.dumps(span, default=str)
+        with self._lock:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # -- metrics ------------------------------------------------------------
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Adds `value` to a counter."""
+
+        if not self.enabled:
+            return
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+        **labels: Any,
+    ) -> None:
+        """Records an observation in a histogram (buckets are fixed by the first observation)."""
+
+        if not self.enabled:
+            return
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+
+    def counter_value(self, name: str, **labels: Any) -> float:
+        """Returns the current value of a counter series (0 if never incremented)."""
+
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            return self._counters.get(name, {}).get(key, 0)
+
+    def render_prometheus(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+
+        lines: list[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# TYPE {name} histogram")
+                for labels, hist in sorted(series.items()):
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, {'le': f'{bound:g}'})} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, {'le': '+Inf'})} {hist.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(hist.total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_metrics(self, path: str | Path) -> None:
+        """Writes the metrics to `path` atomically (write to a temp file, then rename)."""
+
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def serve_metrics(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Starts a background HTTP server exposing `GET /metrics`.
+
+        Args:
+          port (int): TCP port to listen on (0 picks a free port).
+          host (str): Interface to bind to.
+
+        Returns:
+          ThreadingHTTPServer: The running server (call `shutdown()` to stop it).
+        """
+
+        telemetry = self
+
+        class _MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = telemetry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server
+
+
+_telemetry = Telemetry()
+
+
+def get_telemetry() -> Telemetry:
+    """Returns the process-wide Telemetry instance (disabled until configured)."""
+
+    return _telemetry
+
+
+def configure_telemetry(config: TelemetryConfig) -> Telemetry:
+    """
+    Replaces the process-wide Telemetry instance according to the configuration.
+
+    Args:
+      config (TelemetryConfig): The telemetry configuration section.
+
+    Returns:
+      Telemetry: The newly installed instance.
+    """
+
+    global _telemetry
+
+    _telemetry = Telemetry(
+        enabled=config.enabled,
+        trace_path=config.trace_path,
+        metrics_path=config.metrics_path,
+    )
+    if config.enabled and config.metrics_port is not None:
+        _telemetry.serve_metrics(config.metrics_port, config.metrics_host)
+        print(f"📈 Metrics available at http://{config.metrics_host}:{config.metrics_port}/metrics")
+
+    return _telemetry
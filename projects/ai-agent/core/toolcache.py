@@ -0,0 +1,127 @@
+import json
+from typing import Any, Callable, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest, ToolCallWrapper
+
+from core.config import ToolCacheConfig
+from core.telemetry import get_telemetry
+
+
+def tool_call_key(name: str, args: Any) -> str:
+    """
+    Builds a canonical cache key for a tool call.
+
+    Arguments are serialised with sorted keys so that `{"a": 1, "b": 2}` and
+    `{"b": 2, "a": 1}` map to the same entry.
+
+    Args:
+      name (str): The tool name.
+      args (Any): The tool call arguments, as produced by the model.
+
+    Returns:
+      str: A stable key identifying the (tool, args) pair.
+    """
+
+    return f"{name}:{json.dumps(args, sort_keys=True, default=str)}"
+
+
+def current_run_results(
+    messages: Sequence[BaseMessage],
+    cacheable_tools: set[str],
+    invalidated_by: dict[str, list[str]],
+) -> dict[str, ToolMessage]:
+    """
+    Rebuilds the memo table of the current graph run from the message history.
+
+    A run starts at the last HumanMessage: everything before it belongs to earlier
+    turns and is never reused. Results are recorded in order, so a write tool
+    (e.g. `update_memory_tool`) drops every cached result of the tools it invalidates
+    that was produced before it ran.
+
+    Args:
+      messages (Sequence[BaseMessage]): The agent state message history.
+      cacheable_tools (set[str]): Names of the tools whose results can be reused.
+      invalidated_by (dict[str, list[str]]): Write tool name -> tools it invalidates.
+
+    Returns:
+      dict[str, ToolMessage]: Cache key -> first successful ToolMessage for that key.
+    """
+
+    start = 0
+    for i in range(len(messages) - 1, -1, -1):
+        if isinstance(messages[i], HumanMessage):
+            start = i + 1
+            break
+
+    pending: dict[str, str] = {}
+    results: dict[str, ToolMessage] = {}
+
+    for message in messages[start:]:
+        if isinstance(message, AIMessage):
+            for tool_call in message.tool_calls:
+                if tool_call.get("id"):
+                    pending[tool_call["id"]] = tool_call_key(tool_call["name"], tool_call["args"])
+        elif isinstance(message, ToolMessage):
+            stale = set(invalidated_by.get(message.name or "", []))
+            if stale:
+                results = {k: v for k, v in results.items() if v.name not in stale}
+
+            key = pending.pop(message.tool_call_id, None)
+            if key is None or message.name not in cacheable_tools or message.status == "error":
+                continue
+            results.setdefault(key, message)
+
+    return results
+
+
+def build_tool_cache_wrapper(config: ToolCacheConfig) -> ToolCallWrapper:
+    """
+    Creates a `ToolNode` wrapper that memoizes pure tool calls within a single graph run.
+
+    Identical (tool, args) pairs requested again later in the same run are answered
+    from the earlier ToolMessage instead of re-running the tool. Only tools listed in
+    `config.cacheable_tools` are memoized, and results of the tools listed in
+    `config.invalidated_by` are discarded once the corresponding write tool runs.
+
+    The memo table is derived from the run's own message history, so there is no
+    state shared across runs, sessions or threads.
+
+    Args:
+      config (ToolCacheConfig): The tool cache configuration section.
+
+    Returns:
+      ToolCallWrapper: A callable suitable for `ToolNode(wrap_tool_call=...)`.
+    """
+
+    cacheable_tools = set(config.cacheable_tools)
+    invalidated_by = dict(config.invalidated_by)
+
+    def _wrapper(request: ToolCallRequest, execute: Callable[[ToolCallRequest], Any]) -> Any:
+        tool_call = request.tool_call
+        if not config.enabled or tool_call["name"] not in cacheable_tools:
+            return execute(request)
+
+        state = request.state if isinstance(request.state, dict) else {}
+        results = current_run_results(state.get("messages", []), cacheable_tools, invalidated_by)
+        cached = results.get(tool_call_key(tool_call["name"], tool_call["args"]))
+        get_telemetry().inc("agent_tool_cache_total", tool=tool_call["name"], result="miss" if cached is None else "hit")
+        if cached is None:
+            return execute(request)
+
+        print(f"♻️ Reusing cached result for tool: {tool_call['name']}")
+        content = cached.content
+        if config.reference_duplicates:
+            content = (
+                f"Same call as tool_call_id '{cached.tool_call_id}' earlier in this turn; "
+                "its result is unchanged, use that output."
+            )
+
+        return ToolMessage(
+            content=content,
+            name=tool_call["name"],
+            tool_call_id=tool_call["id"],
+            artifact=cached.artifact,
+        )
+
+    return _wrapper
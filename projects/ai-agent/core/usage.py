@@ -0,0 +1,345 @@
+"""
+Token accounting: where the tokens of every LLM call go, and what they cost.
+
+For each call the ledger splits the prompt into its sources:
+
+  - `system_prompt`: the system message;
+  - `tool_schemas`: the tool definitions bound to the model;
+  - `history`: user and assistant messages (including tool-call arguments);
+  - `tool:<name>`: the results of each tool (e.g. `tool:query_kb_tool`).
+
+Source sizes are estimated with tiktoken when it is installed and its encoding is
+available offline, otherwise with a ~4 characters/token heuristic. When the provider
+reports the real prompt size (`usage_metadata.input_tokens`), the estimates are
+scaled to add up to it, so the breakdown always matches the billed total.
+
+Calls roll up per session (the `session_id_key` of the run's `configurable`) and
+per local calendar day, with a cost when `prices` has an entry for the provider or
+model. With `usage_path` set, every call is appended as one JSON line and the
+rollups are rebuilt from that file on start, so totals survive restarts.
+
+Accounting is disabled by default; a disabled ledger turns every call into a no-op.
+"""
+
+import functools
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+from core.config import TokenPrice, UsageConfig
+from core.telemetry import get_telemetry
+
+SYSTEM_PROMPT_SOURCE = "system_prompt"
+TOOL_SCHEMAS_SOURCE = "tool_schemas"
+HISTORY_SOURCE = "history"
+TOOL_RESULT_PREFIX = "tool:"
+DEFAULT_SESSION = "default"
+
+# Role markers and separators the chat template adds around every message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class TokenCounter:
+    """Counts tokens with a tiktoken encoding, falling back to a character heuristic."""
+
+    def __init__(self, encoding: str = "o200k_base"):
+        self.encoding_name = encoding
+        self._encoding: Any = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        # The system prompt and tool schemas are identical on every call
+        self.count = functools.lru_cache(maxsize=4096)(self._count)
+
+    def _load(self) -> Any:
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                if self.encoding_name:
+                    try:
+                        import tiktoken
+                        self._encoding = tiktoken.get_encoding(self.encoding_name)
+                    except Exception:
+                        # Not installed, or the encoding file cannot be downloaded
+                        print(f"⚠️ tiktoken encoding '{self.encoding_name}' unavailable, estimating ~4 characters/token")
+            return self._encoding
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from a real tokenizer rather than the heuristic."""
+
+        return self._load() is not None
+
+    def _count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._load()
+        if encoding is None:
+            return math.ceil(len(text) / 4)
+        return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_text(message: Any) -> str:
+    """The text a chat message contributes to the prompt, including tool-call arguments."""
+
+    content = getattr(message, "content", "") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    parts = [str(content)]
+    for call in getattr(message, "tool_calls", None) or []:
+        parts.append(call["name"] + json.dumps(call.get("args", {}), ensure_ascii=False))
+    return " ".join(part for part in parts if part)
+
+
+def reconcile(sources: dict[str, int], total: int) -> dict[str, int]:
+    """
+    Scales estimated per-source counts so they add up to a reported total.
+
+    Uses largest-remainder rounding, so the result sums to `total` exactly.
+
+    Args:
+      sources (dict[str, int]): Estimated tokens per source.
+      total (int): The prompt size reported by the provider (0 keeps the estimates).
+
+    Returns:
+      dict[str, int]: Tokens per source.
+    """
+
+    estimated = sum(sources.values())
+    if total <= 0 or estimated <= 0:
+        return dict(sources)
+
+    shares = {source: tokens * total / estimated for source, tokens in sources.items()}
+    scaled = {source: math.floor(share) for source, share in shares.items()}
+    leftover = total - sum(scaled.values())
+    for source in sorted(shares, key=lambda s: shares[s] - scaled[s], reverse=True)[:leftover]:
+        scaled[source] += 1
+    return scaled
+
+
+def _empty_totals() -> dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost": 0.0, "sources": {}}
+
+
+def _accumulate(totals: dict[str, Any], record: dict[str, Any]) -> None:
+    totals["calls"] += 1
+    totals["prompt_tokens"] += record["prompt_tokens"]
+    totals["completion_tokens"] += record["completion_tokens"]
+    totals["cost"] += record["cost"]
+    for source, tokens in record["sources"].items():
+        totals["sources"][source] = totals["sources"].get(source, 0) + tokens
+
+
+class UsageLedger:
+    """Per-call token attribution with per-session and per-day rollups."""
+
+    def __init__(self, config: UsageConfig | None = None, providers: dict[str, str | None] | None = None):
+        self.config = config or UsageConfig()
+        self.enabled = self.config.enabled
+        # Model tier -> provider name, to look up prices (see core.cascade tiers)
+        self.providers = providers or {}
+        self.counter = TokenCounter(self.config.encoding)
+        self._lock = threading.Lock()
+        self._sessions: dict[str, dict[str, Any]] = {}
+        self._days: dict[str, dict[str, Any]] = {}
+
+        if self.enabled and self.config.usage_path and Path(self.config.usage_path).exists():
+            self._replay(Path(self.config.usage_path))
+
+    def _replay(self, path: Path) -> None:
+        ends_with_newline = True
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                ends_with_newline = line.endswith("\n")
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interruption
+                self._add(record)
+        if not ends_with_newline:
+            # Keeps the next record off the truncated line
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+    def _add(self, record: dict[str, Any]) -> None:
+        _accumulate(self._sessions.setdefault(record["session"], _empty_totals()), record)
+        _accumulate(self._days.setdefault(record["day"], _empty_totals()), record)
+
+    def price_for(self, provider: str | None, model: str | None) -> TokenPrice | None:
+        """Returns the most specific configured price ('<provider>/<model>', then '<provider>')."""
+
+        prices = self.config.prices
+        return prices.get(f"{provider}/{model}") or prices.get(str(provider))
+
+    def attribute(
+        self,
+        messages: Sequence[Any],
+        system_prompt: str = "",
+        tool_schemas: str = "",
+        prompt_tokens: int = 0,
+    ) -> dict[str, int]:
+        """
+        Splits a prompt into its sources (see the module docstring).
+
+        Args:
+          messages (Sequence[BaseMessage]): The conversation sent after the system prompt.
+          system_prompt (str): The system prompt text.
+          tool_schemas (str): The serialised tool definitions bound to the model.
+          prompt_tokens (int): The prompt size reported by the provider, if any.
+
+        Returns:
+          dict[str, int]: Tokens per source.
+        """
+
+        sources = {
+            SYSTEM_PROMPT_SOURCE: self.counter.count(system_prompt) + MESSAGE_OVERHEAD_TOKENS,
+            TOOL_SCHEMAS_SOURCE: self.counter.count(tool_schemas),
+        }
+        for message in messages:
+            if getattr(message, "type", "") == "tool":
+                source = TOOL_RESULT_PREFIX + (getattr(message, "name", None) or "unknown")
+            else:
+                source = HISTORY_SOURCE
+            tokens = self.counter.count(message_text(message)) + MESSAGE_OVERHEAD_TOKENS
+            sources[source] = sources.get(source, 0) + tokens
+        return reconcile(sources, prompt_tokens)
+
+    def record(
+        self,
+        messages: Sequence[Any],
+        response: Any,
+        session: str | None = None,
+        tier: str = "strong",
+        system_prompt: str = "",
+        tool_schemas: str = "",
+    ) -> dict[str, Any] | None:
+        """
+        Attributes one LLM call and adds it to the rollups.
+
+        Args:
+          messages (Sequence[BaseMessage]): The conversation sent after the system prompt.
+          response (AIMessage): The model's response (its usage metadata is used when present).
+          session (str | None): The session id (None counts as 'default').
+          tier (str): The model tier that served the call ('fast' or 'strong').
+          system_prompt (str): The system prompt text.
+          tool_schemas (str): The serialised tool definitions bound to the model.
+
+        Returns:
+          dict[str, Any] | None: The call record, or None when accounting is disabled.
+        """
+
+        if not self.enabled:
+            return None
+
+        usage = getattr(response, "usage_metadata", None) or {}
+        reported_prompt = usage.get("input_tokens", 0)
+        sources = self.attribute(messages, system_prompt, tool_schemas, reported_prompt)
+        completion = usage.get("output_tokens", 0) or (
+            self.counter.count(message_text(response)) if response is not None else 0
+        )
+
+        provider = self.providers.get(tier)
+        model = (getattr(response, "response_metadata", None) or {}).get("model_name")
+        price = self.price_for(provider, model)
+        prompt_tokens = sum(sources.values())
+        cost = 0.0
+        if price is not None:
+            cost = (prompt_tokens * price.prompt_per_mtok + completion * price.completion_per_mtok) / 1_000_000
+
+        now = time.time()
+        record = {
+            "ts": now,
+            "day": time.strftime("%Y-%m-%d", time.localtime(now)),
+            "session": session or DEFAULT_SESSION,
+            "tier": tier,
+            "provider": provider,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion,
+            "estimated": reported_prompt == 0,
+            "sources": sources,
+            "cost": cost,
+        }
+
+        with self._lock:
+            self._add(record)
+            if self.config.usage_path:
+                with open(self.config.usage_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record) + "\n")
+
+        telemetry = get_telemetry()
+        for source, tokens in sources.items():
+            telemetry.inc("agent_prompt_tokens_total", tokens, source=source)
+        if cost:
+            telemetry.inc("agent_llm_cost_total", cost, provider=provider)
+        return record
+
+    def session_totals(self, session: str | None = None) -> dict[str, Any]:
+        """Returns the totals of one session (see `summary`)."""
+
+        with self._lock:
+            return json.loads(json.dumps(self._sessions.get(session or DEFAULT_SESSION, _empty_totals())))
+
+    def summary(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """
+        Returns the rollups: {"sessions": {id: totals}, "days": {"YYYY-MM-DD": totals}}.
+
+        Each totals entry has calls, prompt_tokens, completion_tokens, cost and the
+        prompt tokens per source.
+        """
+
+        with self._lock:
+            return json.loads(json.dumps({"sessions": self._sessions, "days": self._days}))
+
+
+def format_totals(totals: dict[str, Any]) -> str:
+    """Renders one rollup entry, largest prompt sources first."""
+
+    lines = [
+        f"{totals['calls']} calls, {totals['prompt_tokens']} prompt + {totals['completion_tokens']} completion tokens"
+        + (f", cost {totals['cost']:.4f}" if totals["cost"] else "")
+    ]
+    prompt = totals["prompt_tokens"] or 1
+    for source, tokens in sorted(totals["sources"].items(), key=lambda item: item[1], reverse=True):
+        lines.append(f"  {source:<28} {tokens:>10} {100 * tokens / prompt:>6.1f}%")
+    return "\n".join(lines)
+
+
+def format_summary(summary: dict[str, dict[str, dict[str, Any]]]) -> str:
+    """Renders `UsageLedger.summary()` as per-day and per-session tables."""
+
+    sections = []
+    for title, key in (("Per day", "days"), ("Per session", "sessions")):
+        sections.append(f"{title}:")
+        for name, totals in sorted(summary[key].items()):
+            sections.append(f"{name}: {format_totals(totals)}")
+    return "\n".join(sections)
+
+
+_ledger = UsageLedger()
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Returns the process-wide UsageLedger (disabled until configured)."""
+
+    return _ledger
+
+
+def configure_usage(config: UsageConfig, providers: dict[str, str | None] | None = None) -> UsageLedger:
+    """
+    Replaces the process-wide UsageLedger according to the configuration.
+
+    Args:
+      config (UsageConfig): The usage accounting configuration section.
+      providers (dict[str, str | None] | None): Model tier -> provider name, for prices.
+
+    Returns:
+      UsageLedger: The newly installed instance.
+    """
+
+    global _ledger
+
+    _ledger = UsageLedger(config, providers)
+    return _ledger
@@ -1,14 +1,68 @@
 
-from typing import Callable
+from typing import TYPE_CHECKING, Any, Callable
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_core.embeddings import Embeddings
-from langchain_community.document_loaders import DirectoryLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
 
-import chromadb
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from core.startup import run_once
+from core.telemetry import get_telemetry
+
+# chromadb, langchain-chroma and langchain-community are slow to import, so they are
+# imported inside the functions that need them rather than at module load.
+if TYPE_CHECKING:
+    from langchain_core.vectorstores import VectorStoreRetriever
+
+    from core.config import HttpClientConfig
+
+
+class InstrumentedEmbeddings(Embeddings):
+    """Embeddings decorator that records a span and counters for every embedding call."""
+
+    def __init__(self, inner: Embeddings, provider: str, model: str = ""):
+        self.inner = inner
+        self.provider = provider
+        # Identifies the model behind stored vectors (see core.memoryindex)
+        self.model_id = f"{provider}/{model}"
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        telemetry = get_telemetry()
+        with telemetry.span("embeddings.embed_documents", provider=self.provider, texts=len(texts)):
+            vectors = self.inner.embed_documents(texts)
+        telemetry.inc("embedding_calls_total", provider=self.provider, kind="documents")
+        telemetry.inc("embedding_texts_total", len(texts), provider=self.provider)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        telemetry = get_telemetry()
+        with telemetry.span("embeddings.embed_query", provider=self.provider):
+            vector = self.inner.embed_query(text)
+        telemetry.inc("embedding_calls_total", provider=self.provider, kind="query")
+        telemetry.inc("embedding_texts_total", provider=self.provider)
+        return vector
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embeddings proxy that builds the real model on first use.
+
+    Constructing HuggingFace embeddings loads sentence-transformers and the model
+    weights; deferring it keeps startup fast and lets a background thread pay the cost.
+    """
+
+    def __init__(self, factory: Callable[[], Embeddings], model_id: str = ""):
+        self._get = run_once(factory)
+        self.model_id = model_id
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._get().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._get().embed_query(text)
 
 
 def build_embeddings(
@@ -16,6 +70,7 @@ def build_embeddings(
     embedding_name: str,
     embedding_base_url: str | None = None,
     embedding_api_key_env: str = "OPENAI_API_KEY",
+    http: "HttpClientConfig | None" = None,
 ) -> Embeddings:
     """
     Constructs an embeddings model from a provider name and model name.
@@ -25,9 +80,10 @@ def build_embeddings(
       embedding_name (str): Name of the embedding model.
       embedding_base_url (str | None): Optional base URL for OpenAI-compatible local servers.
       embedding_api_key_env (str): Environment variable name holding the API key (openai only).
+      http (HttpClientConfig | None): Shared connection pool / retry settings (openai only).
 
     Returns:
-      Embeddings: A LangChain-compatible embeddings instance.
+      Embeddings: A LangChain-compatible embeddings instance, instrumented for telemetry.
 
     Raises:
       ValueError: If the embedding provider is not supported.
@@ -35,23 +91,69 @@ def build_embeddings(
 
     if embedding_provider == "openai":
         from langchain_openai import OpenAIEmbeddings
-        kwargs: dict = {"model": embedding_name}
+        from providers.http import openai_client_kwargs
+        kwargs: dict = {"model": embedding_name, **openai_client_kwargs(http)}
         if embedding_base_url:
             kwargs["base_url"] = embedding_base_url
         api_key = os.getenv(embedding_api_key_env)
         if api_key:
             kwargs["openai_api_key"] = api_key
-        return OpenAIEmbeddings(**kwargs)
+        return InstrumentedEmbeddings(OpenAIEmbeddings(**kwargs), embedding_provider, embedding_name)
 
     if embedding_provider == "huggingface":
         from langchain_huggingface import HuggingFaceEmbeddings
-        return HuggingFaceEmbeddings(model_name=embedding_name)
+        return InstrumentedEmbeddings(HuggingFaceEmbeddings(model_name=embedding_name), embedding_provider,
+                                      embedding_name)
 
     raise ValueError(
         f"Unknown embedding provider '{embedding_provider}'. Supported: 'openai', 'huggingface'."
     )
 
 
+class KBQueryCache:
+    """
+    LRU cache of KB query results, shared across turns and sessions.
+
+    Only used alongside the docs watcher, which empties it on every re-index (see
+    `clear`): an edited file can change the results of any query, not only of those
+    that cited it before. `ttl_s` bounds the age of an entry in between.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_s: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    def get(self, query: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[1] > self.ttl_s:
+                del self._entries[query]
+                return None
+            self._entries.move_to_end(query)
+            return entry[0]
+
+    def put(self, query: str, result: str) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[query] = (result, time.monotonic())
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> int:
+        """Drops every cached result; returns how many were dropped."""
+
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+        return dropped
+
+
 def vbd_load_documents(path: str, glob: str, chunk_size=1000, chunk_overlap=200) -> list[Document]:
     """
     Loads and splits documents from a specified folder using a glob pattern.
@@ -69,6 +171,9 @@ def vbd_load_documents(path: str, glob: str, chunk_size=1000, chunk_overlap=200)
       FileNotFoundError: If the specified folder does not exist.
     """
 
+    from langchain_community.document_loaders import DirectoryLoader, TextLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
     if not os.path.exists(path):
         raise FileNotFoundError(f"Markdown folder not found: {path}")
 
@@ -91,6 +196,80 @@ def vbd_load_documents(path: str, glob: str, chunk_size=1000, chunk_overlap=200)
     return docs_chunks
 
 
+def load_file_chunks(file_path: str, chunk_size=1000, chunk_overlap=200) -> list[Document]:
+    """
+    Loads and splits a single document, the same way `vbd_load_documents` does.
+
+    Args:
+      file_path (str): Path of the document (as found by the docs glob).
+      chunk_size (int): Maximum size of each document chunk.
+      chunk_overlap (int): Number of characters overlapping between chunks.
+
+    Returns:
+      list[Document]: The document chunks, or an empty list if the file no longer exists.
+    """
+
+    from langchain_community.document_loaders import TextLoader
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    if not os.path.exists(file_path):
+        return []
+
+    docs = TextLoader(file_path).load()
+    docs_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return docs_splitter.split_documents(docs)
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def sync_sources(vectorstore: Any, chunks_by_source: dict[str, list[Document]]) -> int:
+    """
+    Makes the collection hold exactly the given chunks for each source file.
+
+    Chunk ids are `<source>#<index>` and every chunk stores the hash of its text, so
+    only chunks whose text changed are re-embedded; chunks past the new end of a file
+    (and every chunk of a source mapped to an empty list) are deleted. Writes go to the
+    live collection, so queries keep being served while a file is re-indexed.
+
+    Args:
+      vectorstore: A LangChain Chroma vector store (get / delete / add_texts).
+      chunks_by_source (dict[str, list[Document]]): Source path -> its current chunks.
+
+    Returns:
+      int: Number of chunks embedded.
+    """
+
+    embedded = 0
+    for source, chunks in chunks_by_source.items():
+        existing = vectorstore.get(where={"source": source}, include=["metadatas"])
+        indexed = {
+            chunk_id: (metadata or {}).get("content_hash")
+            for chunk_id, metadata in zip(existing["ids"], existing["metadatas"])
+        }
+
+        wanted: dict[str, Document] = {}
+        for i, chunk in enumerate(chunks):
+            chunk.metadata = {**chunk.metadata, "source": source, "content_hash": _content_hash(chunk.page_content)}
+            wanted[f"{source}#{i}"] = chunk
+
+        stale = [chunk_id for chunk_id in indexed if chunk_id not in wanted]
+        changed = [chunk_id for chunk_id, chunk in wanted.items() if indexed.get(chunk_id) != chunk.metadata["content_hash"]]
+
+        if stale:
+            vectorstore.delete(ids=stale)
+        if changed:
+            vectorstore.add_texts(
+                texts=[wanted[chunk_id].page_content for chunk_id in changed],
+                metadatas=[wanted[chunk_id].metadata for chunk_id in changed],
+                ids=changed,
+            )
+        embedded += len(changed)
+    return embedded
+
+
 def vdb_builder(
     embeddings: Embeddings,
     path: str,
@@ -98,7 +277,7 @@ def vdb_builder(
     db_path: str,
     collection_name: str,
     recreate: bool,
-) -> Callable[[], VectorStoreRetriever]:
+) -> Callable[[], "VectorStoreRetriever"]:
     """
     Creates a builder closure that initialises or updates a ChromaDB vector store
     collection with embedded document chunks, and returns a retriever for similarity search.
@@ -115,40 +294,43 @@ def vdb_builder(
       Callable[[], VectorStoreRetriever]: A factory that returns a retriever when called.
     """
 
-    def _builder_function() -> VectorStoreRetriever:
+    def _builder_function() -> "VectorStoreRetriever":
+        with get_telemetry().span("kb.ingest", collection=collection_name) as span:
+            return _build(span)
+
+    def _build(span: dict) -> "VectorStoreRetriever":
+        import chromadb
+        from langchain_chroma import Chroma
+        from langchain_core.vectorstores import VectorStoreRetriever
+
         docs_chunks = vbd_load_documents(path, glob)
+        span["chunks"] = len(docs_chunks)
 
         client = chromadb.PersistentClient(path=db_path)
         if recreate or not os.path.exists(db_path):
             client.reset()
             print(f"Initialized ChromaDB at {db_path}")
 
-        collection = client.get_or_create_collection(
-            name=collection_name, embedding_function=None)
-
-        doc_contents = [doc.page_content if hasattr(doc, "page_content") else str(doc) for doc in docs_chunks]
-        doc_ids = []
-        for i, doc in enumerate(docs_chunks):
-            doc_id = doc.metadata.get("source", "")
-            if not doc_id:
-                doc_id = f"Unknown Source [{str(hash(doc_contents[i]))}]"
-            doc_ids.append(doc_id)
-        doc_metadatas = [doc.metadata for doc in docs_chunks]
-        embeddings_list = embeddings.embed_documents(doc_contents)
-        collection.upsert(
-            ids=doc_ids,
-            documents=doc_contents,
-            embeddings=embeddings_list,
-            metadatas=doc_metadatas,
+        vectorstore = Chroma(
+            collection_name=collection_name,
+            embedding_function=embeddings,
+            client=client,
         )
-        print(f"ChromaDB collection '{collection_name}' updated with {len(docs_chunks)} documents.")
+
+        chunks_by_source: dict[str, list[Document]] = {}
+        for doc in docs_chunks:
+            chunks_by_source.setdefault(doc.metadata.get("source") or "unknown", []).append(doc)
+        # Files deleted since the last run
+        for metadata in vectorstore.get(include=["metadatas"])["metadatas"]:
+            chunks_by_source.setdefault((metadata or {}).get("source") or "unknown", [])
+
+        # Only chunks whose text changed since the last run are embedded again
+        embedded = sync_sources(vectorstore, chunks_by_source)
+        span["embedded"] = embedded
+        print(f"ChromaDB collection '{collection_name}' updated with {len(docs_chunks)} documents ({embedded} embedded).")
 
         retriever = VectorStoreRetriever(
-            vectorstore=Chroma(
-                collection_name=collection_name,
-                embedding_function=embeddings,
-                client=client,
-            ),
+            vectorstore=vectorstore,
             search_type="similarity",
             # K is the amount of chunks to return (usually between 3 and 5 is good)
             search_kwargs={"k": 5},
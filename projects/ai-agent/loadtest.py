@@ -0,0 +1,267 @@
+"""
+End-to-end load test: N concurrent simulated users against the full agent stack.
+
+By default an in-process `MockInferenceServer` stands in for the chat and embedding
+endpoints, so the numbers isolate agent overhead (graph, tools, HTTP clients) from
+model speed. Point `--base-url` at a real server to measure the whole system instead.
+
+Every user sends `--turns` questions back to back (closed-loop load). The report
+gives throughput, p50/p99 turn latency, per-node latencies and, with the mock server,
+the time spent inside the "model" versus everything else.
+
+Usage:
+  python loadtest.py --users 16 --turns 10 --ttft-ms 100 --tokens-per-s 50
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from batch import load_questions, percentile, run_question
+from core.config import Config, LlamaCppConfig
+from mock_server import MockInferenceServer
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+# Scripted behaviour of the mock model for DEFAULT_QUESTIONS (see mock_server.py)
+DEFAULT_SCRIPT: list[dict[str, Any]] = [
+    {"match": "what day", "tool_calls": [{"name": "get_today_date", "arguments": {}}]},
+    {"match": "what time", "tool_calls": [{"name": "get_current_time", "arguments": {}}]},
+    {"match": "how much is", "tool_calls": [{"name": "calculate", "arguments": {"expression": "17 * 23 + 4"}}]},
+    {"match": "about me", "tool_calls": [{"name": "recall_memory_tool", "arguments": {"query": "user profile"}}]},
+    {"match": "meeting", "tool_calls": [{"name": "query_kb_tool", "arguments": {"query": "meeting auth code"}}]},
+]
+
+DEFAULT_QUESTIONS: list[dict[str, Any]] = [
+    {"id": "date", "question": "What day is it today?"},
+    {"id": "time", "question": "What time is it?"},
+    {"id": "math", "question": "How much is 17 * 23 + 4?"},
+    {"id": "memory", "question": "What do you remember about me?"},
+    {"id": "chat", "question": "Hello there!"},
+]
+
+MOCK_API_KEY_ENV = "MOCK_INFERENCE_API_KEY"
+
+
+def mock_config(cfg: Config, base_url: str, workdir: Path, mock: bool = True) -> Config:
+    """
+    Points a configuration at a mock (or any OpenAI-compatible) server.
+
+    The chat model and the embeddings both target `base_url`; the vector DB and the
+    memory file live in `workdir` so a load test never touches the real ones. The model
+    names are replaced by the ones the bundled mock server answers to only when `mock`
+    is set: a real server keeps the chat and embedding models named in `cfg`.
+
+    Args:
+      cfg (Config): The base configuration (vector DB docs, limits, HTTP settings...).
+      base_url (str): OpenAI-compatible endpoint, e.g. 'http://127.0.0.1:5000/v1'.
+      workdir (Path): Scratch directory for the vector DB and memory file.
+      mock (bool): Whether `base_url` is the bundled mock server.
+
+    Returns:
+      Config: A modified copy of `cfg`.
+    """
+
+    if mock:
+        llamacpp = LlamaCppConfig(model="mock-model", base_url=base_url)
+        embedding_name = "mock-embedding"
+    elif cfg.provider == "llamacpp":
+        llamacpp = cfg.llamacpp.model_copy(update={"base_url": base_url, "backends": []})
+        embedding_name = cfg.vectordb.embedding_name
+    else:
+        llamacpp = LlamaCppConfig(model=cfg.openai.model, base_url=base_url)
+        embedding_name = cfg.vectordb.embedding_name
+
+    os.environ.setdefault(MOCK_API_KEY_ENV, "not-needed")
+    return cfg.model_copy(update={
+        "provider": "llamacpp",
+        "llamacpp": llamacpp,
+        "cascade": cfg.cascade.model_copy(update={"enabled": False}),
+        "vectordb": cfg.vectordb.model_copy(update={
+            "embedding_provider": "openai",
+            "embedding_name": embedding_name,
+            "embedding_base_url": base_url,
+            "embedding_api_key_env": MOCK_API_KEY_ENV,
+            "db_path": workdir / "chroma_db",
+        }),
+        "agent": cfg.agent.model_copy(update={"memory_path": workdir / "memory.json"}),
+    })
+
+
+def run_load_test(
+    app: "CompiledStateGraph",
+    questions: list[dict[str, Any]],
+    users: int,
+    turns: int,
+    user_id_key: str = "user_id",
+) -> tuple[list[dict[str, Any]], float]:
+    """
+    Runs `users` concurrent simulated users, each sending `turns` questions in a row.
+
+    User `u` starts at question `u` of the set and walks through it cyclically, so
+    concurrent users are not all asking the same question at the same time.
+
+    Args:
+      app (CompiledStateGraph): The compiled agent graph.
+      questions (list[dict[str, Any]]): The question records (see `batch.load_questions`).
+      users (int): Number of concurrent users.
+      turns (int): Questions per user.
+      user_id_key (str): `configurable` key the memory tools read the user id from.
+
+    Returns:
+      tuple[list[dict[str, Any]], float]: Per-turn results (see `batch.run_question`) and wall time.
+    """
+
+    def _user(index: int) -> list[dict[str, Any]]:
+        # Each simulated user has its own memory namespace, as in multi-tenant serving
+        return [
+            run_question(
+                app, {"user_id": f"loadtest-{index}", **questions[(index + turn) % len(questions)]}, user_id_key
+            )
+            for turn in range(turns)
+        ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users, thread_name_prefix="user") as pool:
+        per_user = list(pool.map(_user, range(users)))
+    return [result for results in per_user for result in results], time.perf_counter() - started
+
+
+def summarize(
+    results: list[dict[str, Any]],
+    elapsed_s: float,
+    server: MockInferenceServer | None = None,
+) -> dict[str, Any]:
+    """
+    Aggregates load-test results into a report.
+
+    Args:
+      results (list[dict[str, Any]]): Per-turn results from `run_load_test`.
+      elapsed_s (float): Wall time of the run.
+      server (MockInferenceServer | None): The mock server, to split model time from overhead.
+
+    Returns:
+      dict[str, Any]: Throughput, latency percentiles, per-node stats and overhead.
+    """
+
+    latencies = [r["latency_ms"] for r in results]
+    steps: dict[str, list[float]] = {}
+    for result in results:
+        for step in result["steps"]:
+            steps.setdefault(step["node"], []).append(step["latency_ms"])
+
+    report: dict[str, Any] = {
+        "turns": len(results),
+        "errors": sum(1 for r in results if r["error"]),
+        "elapsed_s": round(elapsed_s, 2),
+        "turns_per_s": round(len(results) / elapsed_s, 2) if elapsed_s > 0 else 0.0,
+        "turn_p50_ms": percentile(latencies, 0.50),
+        "turn_p99_ms": percentile(latencies, 0.99),
+        "nodes": {
+            node: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 1),
+                "p50_ms": percentile(values, 0.50),
+                "p99_ms": percentile(values, 0.99),
+            }
+            for node, values in steps.items()
+        },
+        "tokens": {
+            "prompt": sum(r["tokens"]["prompt"] for r in results),
+            "completion": sum(r["tokens"]["completion"] for r in results),
+        },
+    }
+
+    if server is not None and results:
+        # Every request the mock served came from one of these turns
+        model_ms = sum(server.stats["service_s"]) * 1000
+        report["model_ms_per_turn"] = round(model_ms / len(results), 1)
+        report["overhead_ms_per_turn"] = round((sum(latencies) - model_ms) / len(results), 1)
+        report["model_requests"] = server.stats["chat_requests"] + server.stats["embedding_requests"]
+
+    return report
+
+
+def format_report(report: dict[str, Any]) -> str:
+    """Renders a report as a human-readable table."""
+
+    lines = [
+        f"turns: {report['turns']} ({report['errors']} errors) in {report['elapsed_s']} s "
+        f"-> {report['turns_per_s']} turns/s",
+        f"turn latency: p50 {report['turn_p50_ms']:.0f} ms, p99 {report['turn_p99_ms']:.0f} ms",
+    ]
+    if "overhead_ms_per_turn" in report:
+        lines.append(
+            f"per turn: {report['model_ms_per_turn']:.1f} ms in the model, "
+            f"{report['overhead_ms_per_turn']:.1f} ms agent overhead"
+        )
+    lines.append("")
+    lines.append(f"{'node':<12} {'count':>7} {'mean ms':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for node, stats in report["nodes"].items():
+        lines.append(f"{node:<12} {stats['count']:>7} {stats['mean_ms']:>9.1f} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the load test and prints the report."""
+
+    parser = argparse.ArgumentParser(description="Load-test the agent with concurrent simulated users")
+    parser.add_argument("--config", default="config.json", help="Base configuration file")
+    parser.add_argument("--users", type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument("--turns", type=int, default=5, help="Questions per user")
+    parser.add_argument("--questions", help="Questions JSONL (default: a built-in set matching the mock script)")
+    parser.add_argument("--script", help="Mock server script JSON (default: built-in)")
+    parser.add_argument("--ttft-ms", type=float, default=50.0, help="Mock time to first token, in milliseconds")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Mock decode speed (0 = instant)")
+    parser.add_argument("--base-url", help="Use this OpenAI-compatible server instead of the in-process mock")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from main import build_runtime
+
+    questions = load_questions(args.questions) if args.questions else DEFAULT_QUESTIONS
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    with contextlib.ExitStack() as stack:
+        server = None
+        base_url = args.base_url
+        if base_url is None:
+            server = stack.enter_context(
+                MockInferenceServer(ttft_s=args.ttft_ms / 1000, tokens_per_s=args.tokens_per_s, script=script)
+            )
+            base_url = server.url
+
+        workdir = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="agent-loadtest-")))
+        cfg = mock_config(Config.load_from_file(args.config), base_url, workdir, mock=server is not None)
+        app, _ = build_runtime(cfg)
+
+        devnull = stack.enter_context(open(os.devnull, "w"))
+        with contextlib.redirect_stdout(devnull):
+            # One warm-up turn per question so first-call costs are not measured
+            for record in questions:
+                run_question(app, record)
+            if server is not None:
+                server.stats.update(chat_requests=0, embedding_requests=0, service_s=[])
+            results, elapsed = run_load_test(
+                app, questions, args.users, args.turns, cfg.agent.memory_namespaces.user_id_key
+            )
+
+        report = summarize(results, elapsed, server)
+
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,64 +1,261 @@
-from dotenv import load_dotenv
-from langchain_core.messages import HumanMessage
-
-from agent import build_agent, print_graph
-from core.config import Config
-from core.vectordb import build_embeddings, vdb_builder
-from tools import load_all_tools
-
-# Load secrets from .env (OPENAI_API_KEY, optional LangSmith vars)
-load_dotenv()
-
-# Load and validate configuration
-cfg = Config.load_from_file("config.json")
-
-# Build the chat model from the configured provider
-if cfg.provider == "openai":
-    from providers.openai import build_chat_model
-    assert cfg.openai is not None  # guaranteed by model_validator
-    llm = build_chat_model(cfg.openai)
-elif cfg.provider == "llamacpp":
-    from providers.llamacpp import build_chat_model
-    assert cfg.llamacpp is not None  # guaranteed by model_validator
-    llm = build_chat_model(cfg.llamacpp)
-else:
-    raise ValueError(f"Unknown provider '{cfg.provider}'. Check config.json.")
-
-# Build embeddings (configured independently of the chat model provider)
-embeddings = build_embeddings(
-    embedding_provider=cfg.vectordb.embedding_provider,
-    embedding_name=cfg.vectordb.embedding_name,
-    embedding_base_url=cfg.vectordb.embedding_base_url,
-    embedding_api_key_env=cfg.vectordb.embedding_api_key_env,
-)
-
-# Build the vector DB retriever closure (lazy — no I/O until first query)
-retriever_builder = vdb_builder(
-    embeddings=embeddings,
-    path=str(cfg.vectordb.docs_path),
-    glob=cfg.vectordb.docs_glob,
-    db_path=str(cfg.vectordb.db_path),
-    collection_name=cfg.vectordb.collection_name,
-    recreate=False,
-)
-
-# Load all agent tools
-all_tools = load_all_tools(
-    vdb_builder=retriever_builder,
-    memory_path=str(cfg.agent.memory_path),
-)
-
-# Compile the LangGraph agent
-app = build_agent(llm, all_tools)
-
-
-def main() -> None:
+import argparse
+import threading
+import uuid
+from typing import TYPE_CHECKING, Callable
+
+from core.config import Config, HttpClientConfig, LlamaCppConfig, OpenAIConfig
+from core.startup import StartupProfiler, run_once, warm_in_background
+from core.telemetry import configure_telemetry, get_telemetry
+from core.usage import UsageLedger, configure_usage, format_summary, format_totals
+
+# Heavy dependencies (LangChain, LangGraph, ChromaDB, sentence-transformers) are imported
+# inside the functions below, so `import main` stays cheap for tests and tooling.
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.vectorstores import VectorStoreRetriever
+    from langgraph.graph.state import CompiledStateGraph
+
+
+def _build_provider_model(
+    provider: str | None,
+    openai: OpenAIConfig | None,
+    llamacpp: LlamaCppConfig | None,
+    http: HttpClientConfig,
+) -> "BaseChatModel":
+    if provider == "openai":
+        from providers.openai import build_chat_model as build_openai_model
+        assert openai is not None  # guaranteed by model_validator
+        return build_openai_model(openai, http)
+    if provider == "llamacpp":
+        from providers.llamacpp import build_chat_model as build_llamacpp_model
+        assert llamacpp is not None  # guaranteed by model_validator
+        return build_llamacpp_model(llamacpp, http)
+    raise ValueError(f"Unknown provider '{provider}'. Check config.json.")
+
+
+def build_chat_model(cfg: Config) -> "BaseChatModel":
+    """
+    Builds the chat model from the configured provider.
+
+    Args:
+      cfg (Config): The application configuration.
+
+    Returns:
+      BaseChatModel: The chat model of the active provider.
+
+    Raises:
+      ValueError: If the provider is unknown.
+    """
+
+    return _build_provider_model(cfg.provider, cfg.openai, cfg.llamacpp, cfg.http)
+
+
+def build_fast_chat_model(cfg: Config) -> "BaseChatModel | None":
+    """
+    Builds the fast-tier chat model of the cascade, if enabled.
+
+    Token logprobs are requested when `cascade.min_confidence` is set, so escalation
+    can use the model's own confidence.
+
+    Args:
+      cfg (Config): The application configuration.
+
+    Returns:
+      BaseChatModel | None: The fast model, or None when the cascade is disabled.
+    """
+
+    if not cfg.cascade.enabled:
+        return None
+    llm = _build_provider_model(cfg.cascade.provider, cfg.cascade.openai, cfg.cascade.llamacpp, cfg.http)
+    if cfg.cascade.min_confidence > 0 and "logprobs" in type(llm).model_fields:
+        llm = llm.model_copy(update={"logprobs": True})
+    return llm
+
+
+def configure_usage_accounting(cfg: Config) -> UsageLedger:
+    """Installs the token ledger, pricing each model tier with its provider's prices."""
+
+    return configure_usage(cfg.usage, providers={"strong": cfg.provider, "fast": cfg.cascade.provider})
+
+
+def build_runtime(
+    cfg: Config,
+    profiler: StartupProfiler | None = None,
+) -> tuple["CompiledStateGraph", Callable[[], "VectorStoreRetriever"]]:
+    """
+    Builds the compiled agent graph and the (not yet built) KB retriever.
+
+    Nothing expensive happens here beyond importing LangChain/LangGraph: embeddings are
+    wrapped in a LazyEmbeddings proxy and the retriever builder runs at most once, on
+    first use or when `warm_up` is called.
+
+    Args:
+      cfg (Config): The application configuration.
+      profiler (StartupProfiler | None): Optional profiler recording each step.
+
+    Returns:
+      tuple: The compiled agent graph and the memoized retriever builder.
+    """
+
+    profiler = profiler or StartupProfiler()
+
+    with profiler.step("import", "agent (langgraph, langchain-core)"):
+        from agent import build_agent
+    with profiler.step("import", "core.vectordb"):
+        from core.vectordb import KBQueryCache, LazyEmbeddings, build_embeddings, vdb_builder
+    with profiler.step("import", "tools"):
+        from tools import load_all_tools
+    with profiler.step("import", "langchain-openai"):
+        import langchain_openai  # noqa: F401 - used by the providers and OpenAI embeddings
+
+    with profiler.step("init", f"chat model ({cfg.provider})"):
+        llm = build_chat_model(cfg)
+    if cfg.cascade.enabled:
+        with profiler.step("init", f"fast chat model ({cfg.cascade.provider})"):
+            fast_llm = build_fast_chat_model(cfg)
+    else:
+        fast_llm = None
+
+    def _build_embeddings():
+        with profiler.step("init", f"embeddings ({cfg.vectordb.embedding_provider})"):
+            return build_embeddings(
+                embedding_provider=cfg.vectordb.embedding_provider,
+                embedding_name=cfg.vectordb.embedding_name,
+                embedding_base_url=cfg.vectordb.embedding_base_url,
+                embedding_api_key_env=cfg.vectordb.embedding_api_key_env,
+                http=cfg.http,
+            )
+
+    # Embeddings are configured independently of the chat model provider
+    embeddings = LazyEmbeddings(
+        _build_embeddings, model_id=f"{cfg.vectordb.embedding_provider}/{cfg.vectordb.embedding_name}"
+    )
+
+    # The vector DB retriever is built once, by the warm-up thread or the first KB query
+    build_retriever = vdb_builder(
+        embeddings=embeddings,
+        path=str(cfg.vectordb.docs_path),
+        glob=cfg.vectordb.docs_glob,
+        db_path=str(cfg.vectordb.db_path),
+        collection_name=cfg.vectordb.collection_name,
+        recreate=False,
+    )
+
+    def _build_retriever():
+        with profiler.step("init", "vector DB retriever (ingestion)"):
+            return build_retriever()
+
+    retriever_builder = run_once(_build_retriever)
+
+    # KB results are reused across turns only while the docs watcher runs: it is what
+    # empties the cache when the documents change
+    kb_query_cache = None
+    if cfg.vectordb.watch.enabled:
+        from core.docwatch import DocsWatcher, build_reindexer
+        if cfg.vectordb.query_cache_size > 0:
+            kb_query_cache = KBQueryCache(cfg.vectordb.query_cache_size, cfg.vectordb.query_cache_ttl_s)
+        DocsWatcher(
+            cfg.vectordb.docs_path,
+            cfg.vectordb.docs_glob,
+            build_reindexer(retriever_builder, kb_query_cache),
+            cfg.vectordb.watch,
+        ).start()
+
+    with profiler.step("init", "tools"):
+        all_tools = load_all_tools(
+            vdb_builder=retriever_builder,
+            memory_path=str(cfg.agent.memory_path),
+            embeddings=embeddings,
+            memory_recall=cfg.agent.memory_recall,
+            memory_namespaces=cfg.agent.memory_namespaces,
+            calculator=cfg.agent.calculator,
+            kb_query_cache=kb_query_cache,
+        )
+
+    with profiler.step("init", "agent graph"):
+        app = build_agent(
+            llm,
+            all_tools,
+            tool_cache=cfg.agent.tool_cache,
+            limits=cfg.agent.limits,
+            fast_llm=fast_llm,
+            cascade=cfg.cascade,
+        )
+
+    return app, retriever_builder
+
+
+def warm_up(
+    retriever_builder: Callable[[], "VectorStoreRetriever"],
+    profiler: StartupProfiler | None = None,
+) -> threading.Thread:
+    """Loads the embedding model and builds the retriever in a background thread."""
+
+    return warm_in_background("embeddings + retriever", retriever_builder, profiler)
+
+
+def main(argv: list[str] | None = None) -> None:
     """Runs the AI agent in an interactive REPL loop."""
 
+    parser = argparse.ArgumentParser(description="ReAct + RAG AI agent")
+    parser.add_argument("--config", default="config.json", help="Path to the configuration file")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Print an import-time and init-time breakdown (including the warm-up) and exit",
+    )
+    parser.add_argument("--user", help="User id scoping the persistent memory (default: the shared memory)")
+    parser.add_argument("--session", help="Session id for token accounting (default: a new id per run)")
+    parser.add_argument(
+        "--usage",
+        action="store_true",
+        help="Print the recorded token usage per day and per session (see usage.usage_path) and exit",
+    )
+    args = parser.parse_args(argv)
+
+    profiler = StartupProfiler()
+
+    with profiler.step("import", "python-dotenv"):
+        from dotenv import load_dotenv
+
+    # Load secrets from .env (OPENAI_API_KEY, optional LangSmith vars)
+    load_dotenv()
+
+    # Load and validate configuration
+    with profiler.step("init", "config"):
+        cfg = Config.load_from_file(args.config)
+
+    # Enable tracing/metrics and token accounting before anything instrumented is built
+    configure_telemetry(cfg.telemetry)
+    ledger = configure_usage_accounting(cfg)
+
+    if args.usage:
+        print(format_summary(ledger.summary()))
+        return
+
+    app, retriever_builder = build_runtime(cfg, profiler)
+
+    # Embedding model + retriever load in parallel with the user's first question
+    warmup = warm_up(retriever_builder, profiler)
+
+    if args.profile_startup:
+        warmup.join()
+        print(profiler.report())
+        return
+
+    from langchain_core.messages import HumanMessage
+
+    from agent import print_graph
+
     print("🤖 Welcome to the AI Agent. You can ask questions about the loaded documents.\n")
     print_graph(app, "ascii")
     print("\nType 'exit' or 'quit' to end the conversation.")
 
+    session_id = args.session or uuid.uuid4().hex[:12]
+    configurable = {cfg.usage.session_id_key: session_id}
+    if args.user:
+        configurable[cfg.agent.memory_namespaces.user_id_key] = args.user
+
     conversation_history = []
 
     while True:
@@ -68,13 +265,18 @@ def main() -> None:
             user_input = "exit"
 
         if user_input.lower() in ("exit", "quit"):
+            if ledger.enabled:
+                print(f"\n📊 Token usage of session {session_id}: {format_totals(ledger.session_totals(session_id))}")
             print("\nExiting the conversation. Goodbye!")
             break
 
         conversation_history.append(HumanMessage(content=user_input))
 
-        result = app.invoke(
-            {"messages": conversation_history[-cfg.agent.history_window:]})
+        with get_telemetry().span("agent.turn"):
+            result = app.invoke(
+                {"messages": conversation_history[-cfg.agent.history_window:]},
+                config={"configurable": configurable},
+            )
         if not result or "messages" not in result:
             print("🤖 Agent: No response from the agent.")
             continue
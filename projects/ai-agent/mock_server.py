@@ -0,0 +1,338 @@
+"""
+Mock OpenAI-compatible inference server for load tests and offline development.
+
+Serves the endpoints the providers use (`/v1/chat/completions`, `/v1/embeddings`,
+`/v1/models`, `/health`) from the standard library only, with a configurable
+time-to-first-token and decode speed, so agent overhead can be measured separately
+from model speed on a single machine without network access.
+
+Chat behaviour is driven by a script: a JSON list of rules such as
+
+  [
+    {"match": "2+2", "tool_calls": [{"name": "calculate", "arguments": {"expression": "2+2"}}]},
+    {"match": "vpn", "content": "Use the corporate VPN profile."}
+  ]
+
+When the last message is from the user, the first rule whose "match" substring appears
+in it (case-insensitive) is applied: its tool calls are returned if the request offers
+tools, otherwise its content. When the last message is a tool result, the rule's
+"content" (or a summary of the tool results) is returned as the final answer. Without
+a matching rule the server answers "Mock answer to: <question>".
+
+Usage:
+  python mock_server.py --port 5000 --ttft-ms 150 --tokens-per-s 40 --script script.json
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+def count_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for a stand-in server."""
+
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def _message_text(message: dict[str, Any]) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def fake_embedding(text: str, dimensions: int) -> list[float]:
+    """Deterministic unit vector derived from the text hash (equal texts, equal vectors)."""
+
+    values: list[float] = []
+    counter = 0
+    while len(values) < dimensions:
+        digest = hashlib.sha256(f"{counter}:{text}".encode("utf-8")).digest()
+        values.extend((byte - 127.5) / 127.5 for byte in digest)
+        counter += 1
+    values = values[:dimensions]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+class MockInferenceServer:
+    """A scripted, latency-simulating OpenAI-compatible server running in a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ttft_s: float = 0.0,
+        tokens_per_s: float = 0.0,
+        script: list[dict[str, Any]] | None = None,
+        embedding_dimensions: int = 384,
+        model: str = "mock-model",
+    ):
+        self.ttft_s = ttft_s
+        self.tokens_per_s = tokens_per_s
+        self.script = script or []
+        self.embedding_dimensions = embedding_dimensions
+        self.model = model
+        self._lock = threading.Lock()
+        self.stats: dict[str, Any] = {"chat_requests": 0, "embedding_requests": 0, "service_s": []}
+
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                path = self.path.split("?")[0]
+                if path == "/health":
+                    self._json(200, {"status": "ok"})
+                elif path.endswith("/models"):
+                    self._json(200, {"object": "list", "data": [{"id": server.model, "object": "model"}]})
+                else:
+                    self._json(404, {"error": {"message": f"Unknown path {path}"}})
+
+            def do_POST(self) -> None:
+                path = self.path.split("?")[0]
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if path.endswith("/chat/completions"):
+                    server._chat(self, body)
+                elif path.endswith("/embeddings"):
+                    server._embeddings(self, body)
+                else:
+                    self._json(404, {"error": {"message": f"Unknown path {path}"}})
+
+            def _json(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://{host}:{self._server.server_address[1]}/v1"
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self) -> "MockInferenceServer":
+        threading.Thread(target=self._server.serve_forever, name="mock-inference", daemon=True).start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves in the calling thread until interrupted."""
+
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockInferenceServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    # -- chat ---------------------------------------------------------------
+
+    def _find_rule(self, text: str) -> dict[str, Any] | None:
+        lowered = text.lower()
+        for rule in self.script:
+            if rule.get("match", "").lower() in lowered:
+                return rule
+        return None
+
+    def reply_for(self, body: dict[str, Any]) -> tuple[str, list[dict[str, Any]]]:
+        """
+        Computes the scripted reply to a chat request.
+
+        Args:
+          body (dict[str, Any]): The chat completions request body.
+
+        Returns:
+          tuple[str, list[dict[str, Any]]]: The answer text and the tool calls (OpenAI wire format).
+        """
+
+        messages = body.get("messages") or []
+        question = next((_message_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+        rule = self._find_rule(question)
+
+        if messages and messages[-1].get("role") == "tool":
+            if rule and rule.get("content"):
+                return rule["content"], []
+            results = [_message_text(m) for m in messages if m.get("role") == "tool"]
+            return "Based on the tools: " + "; ".join(results[-3:]), []
+
+        if rule and rule.get("tool_calls") and body.get("tools"):
+            tool_calls = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call in rule["tool_calls"]
+            ]
+            return "", tool_calls
+
+        if rule and rule.get("content"):
+            return rule["content"], []
+        return f"Mock answer to: {question}", []
+
+    def _decode_delay(self, tokens: int) -> float:
+        return tokens / self.tokens_per_s if self.tokens_per_s > 0 else 0.0
+
+    def _chat(self, handler: BaseHTTPRequestHandler, body: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        content, tool_calls = self.reply_for(body)
+        prompt_tokens = sum(count_tokens(_message_text(m)) for m in body.get("messages") or [])
+        completion_tokens = count_tokens(content) + sum(count_tokens(c["function"]["arguments"]) for c in tool_calls)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        response_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        finish_reason = "tool_calls" if tool_calls else "stop"
+
+        time.sleep(self.ttft_s)
+        if body.get("stream"):
+            self._stream_chat(handler, response_id, content, tool_calls, finish_reason, usage, body)
+        else:
+            time.sleep(self._decode_delay(completion_tokens))
+            message: dict[str, Any] = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            handler._json(200, {
+                "id": response_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", self.model),
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage,
+            })
+
+        with self._lock:
+            self.stats["chat_requests"] += 1
+            self.stats["service_s"].append(time.perf_counter() - started)
+
+    def _stream_chat(
+        self,
+        handler: BaseHTTPRequestHandler,
+        response_id: str,
+        content: str,
+        tool_calls: list[dict[str, Any]],
+        finish_reason: str,
+        usage: dict[str, int],
+        body: dict[str, Any],
+    ) -> None:
+        handler.send_response(200)
+        handler.send_header("Content-Type", "text/event-stream")
+        handler.send_header("Cache-Control", "no-cache")
+        handler.send_header("Connection", "close")
+        handler.end_headers()
+        handler.close_connection = True
+
+        def _send(delta: dict[str, Any], finish: str | None = None, extra: dict | None = None) -> None:
+            chunk = {
+                "id": response_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", self.model),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                **(extra or {}),
+            }
+            handler.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+
+        _send({"role": "assistant", "content": ""})
+        # Roughly one token per 4 characters, paced at tokens_per_s
+        for start in range(0, len(content), 4):
+            time.sleep(self._decode_delay(1))
+            _send({"content": content[start:start + 4]})
+        for index, call in enumerate(tool_calls):
+            time.sleep(self._decode_delay(count_tokens(call["function"]["arguments"])))
+            _send({"tool_calls": [{"index": index, **call}]})
+
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        _send({}, finish_reason)
+        if include_usage:
+            handler.wfile.write(
+                f"data: {json.dumps({'id': response_id, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n".encode("utf-8")
+            )
+        handler.wfile.write(b"data: [DONE]\n\n")
+        handler.wfile.flush()
+
+    # -- embeddings ---------------------------------------------------------
+
+    def _embeddings(self, handler: BaseHTTPRequestHandler, body: dict[str, Any]) -> None:
+        started = time.perf_counter()
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        # Token-id inputs (as sent by OpenAIEmbeddings) are hashed the same way as text
+        texts = [json.dumps(item) if not isinstance(item, str) else item for item in inputs]
+        dimensions = body.get("dimensions") or self.embedding_dimensions
+        tokens = sum(len(item) if isinstance(item, list) else count_tokens(item) for item in inputs)
+
+        time.sleep(self.ttft_s)
+        handler._json(200, {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, dimensions)}
+                for i, text in enumerate(texts)
+            ],
+            "model": body.get("model", self.model),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        })
+
+        with self._lock:
+            self.stats["embedding_requests"] += 1
+            self.stats["service_s"].append(time.perf_counter() - started)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Runs the mock server in the foreground."""
+
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible inference server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--ttft-ms", type=float, default=0.0, help="Delay before the first token, in milliseconds")
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Decode speed (0 = instant)")
+    parser.add_argument("--script", help="JSON file with the scripted chat rules")
+    parser.add_argument("--embedding-dimensions", type=int, default=384)
+    args = parser.parse_args(argv)
+
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+
+    server = MockInferenceServer(
+        host=args.host,
+        port=args.port,
+        ttft_s=args.ttft_ms / 1000,
+        tokens_per_s=args.tokens_per_s,
+        script=script,
+        embedding_dimensions=args.embedding_dimensions,
+    )
+    print(f"🧪 Mock inference server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Client-side load balancing over several OpenAI-compatible inference servers.
+
+A single llama.cpp server only has a few parallel slots, so `LlamaCppConfig.backends`
+may list several `llama-server` instances. Requests go through a `BackendPool`, plugged
+into the shared HTTP clients as an httpx transport:
+
+  - Least outstanding requests: each backend counts the requests it is serving (until
+    the response body is fully read), and new work goes to the least loaded one.
+  - Sticky sessions: requests of the same conversation (same `X-Session-Id` header, sent
+    inside `providers.http.session_scope`; else same system prompt + first user message)
+    prefer the same backend, chosen by
+    rendezvous hashing, so the server's prompt cache stays warm. Stickiness yields to
+    load when the preferred backend is `sticky_max_skew` requests busier than the least
+    loaded one.
+  - Health checks: a background thread polls `<backend root><health_path>` (llama.cpp
+    answers 503 while a model is loading). Connection failures mark a backend down
+    immediately; the health check brings it back.
+  - Failover: if the chosen backend refuses the connection or answers 502/503/504, the
+    same request is sent to the next backend, mid-conversation included.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Iterator
+
+import httpx
+
+from core.config import LlamaCppConfig
+from providers.http import SESSION_HEADER
+
+# Virtual base URL given to the OpenAI client; the pool rewrites it to a real backend
+POOL_BASE_URL = "http://llamacpp-pool"
+
+_FAILOVER_STATUSES = (502, 503, 504)
+_FAILOVER_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+
+
+class Backend:
+    """One inference server and its live load/health state."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+        url = httpx.URL(self.base_url)
+        self.root = f"{url.scheme}://{url.netloc.decode('ascii')}"
+        self.outstanding = 0
+        self.healthy = True
+        self.served = 0
+
+    def __repr__(self) -> str:
+        return f"Backend({self.base_url}, outstanding={self.outstanding}, healthy={self.healthy})"
+
+
+def session_key(request: httpx.Request) -> str | None:
+    """
+    Derives the stickiness key of a request.
+
+    An explicit `X-Session-Id` header wins: the agent sends the run's session id (see
+    `providers.http.session_scope`). Otherwise the key is a hash of the first two chat
+    messages (system prompt + first user message), the prefix a server-side prompt cache
+    can reuse; it only holds while the history is sent from its first message on.
+
+    Args:
+      request (httpx.Request): The outgoing request (body already in memory).
+
+    Returns:
+      str | None: The key, or None for requests without chat messages.
+    """
+
+    explicit = request.headers.get(SESSION_HEADER)
+    if explicit:
+        return explicit
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return None
+    messages = body.get("messages") if isinstance(body, dict) else None
+    if not messages:
+        return None
+    return hashlib.sha1(json.dumps(messages[:2], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class BackendPool:
+    """Thread-safe registry of backends with least-loaded, sticky selection."""
+
+    def __init__(
+        self,
+        base_urls: list[str],
+        health_path: str = "/health",
+        health_check_interval_s: float = 5.0,
+        sticky_sessions: bool = True,
+        sticky_max_skew: int = 2,
+    ):
+        if not base_urls:
+            raise ValueError("BackendPool needs at least one backend URL")
+        self.backends = [Backend(url) for url in base_urls]
+        self.health_path = health_path
+        self.health_check_interval_s = health_check_interval_s
+        self.sticky_sessions = sticky_sessions
+        self.sticky_max_skew = sticky_max_skew
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+
+    # -- selection ----------------------------------------------------------
+
+    def _rendezvous_order(self, key: str, candidates: list[Backend]) -> list[Backend]:
+        def _score(backend: Backend) -> int:
+            return int.from_bytes(hashlib.sha1(f"{key}|{backend.base_url}".encode()).digest()[:8], "big")
+
+        return sorted(candidates, key=_score, reverse=True)
+
+    def acquire(self, key: str | None = None, exclude: set[str] | None = None) -> Backend:
+        """
+        Picks a backend for a request and counts it as outstanding.
+
+        Args:
+          key (str | None): The session key (see `session_key`), or None.
+          exclude (set[str] | None): Base URLs already tried for this request.
+
+        Returns:
+          Backend: The chosen backend; call `release()` when the response is done.
+
+        Raises:
+          httpx.ConnectError: If every backend is excluded.
+        """
+
+        exclude = exclude or set()
+        with self._lock:
+            candidates = [b for b in self.backends if b.base_url not in exclude]
+            if not candidates:
+                raise httpx.ConnectError("No inference backend left to try")
+
+            # Prefer healthy backends, but fall back to "unhealthy" ones rather than failing:
+            # the health information may simply be stale.
+            healthy = [b for b in candidates if b.healthy] or candidates
+            least_loaded = min(healthy, key=lambda b: b.outstanding)
+
+            chosen = least_loaded
+            if self.sticky_sessions and key is not None:
+                preferred = self._rendezvous_order(key, healthy)[0]
+                if preferred.outstanding - least_loaded.outstanding <= self.sticky_max_skew:
+                    chosen = preferred
+
+            chosen.outstanding += 1
+            chosen.served += 1
+            return chosen
+
+    def release(self, backend: Backend) -> None:
+        with self._lock:
+            backend.outstanding = max(backend.outstanding - 1, 0)
+
+    def mark(self, backend: Backend, healthy: bool) -> None:
+        with self._lock:
+            if backend.healthy != healthy:
+                print(f"{'✅' if healthy else '❌'} Inference backend {backend.base_url} is {'up' if healthy else 'down'}")
+            backend.healthy = healthy
+
+    # -- health checks ------------------------------------------------------
+
+    def check_health(self, client: httpx.Client | None = None) -> None:
+        """Probes every backend's health endpoint once and updates its state."""
+
+        own_client = client is None
+        client = client or httpx.Client(timeout=2.0)
+        try:
+            for backend in self.backends:
+                try:
+                    ok = client.get(backend.root + self.health_path).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                self.mark(backend, ok)
+        finally:
+            if own_client:
+                client.close()
+
+    def start_health_checks(self) -> None:
+        """Starts the background health-check thread (idempotent)."""
+
+        if self._health_thread is not None:
+            return
+
+        def _loop() -> None:
+            with httpx.Client(timeout=min(2.0, self.health_check_interval_s)) as client:
+                while not self._stop.is_set():
+                    self.check_health(client)
+                    self._stop.wait(self.health_check_interval_s)
+
+        self._health_thread = threading.Thread(target=_loop, name="llamacpp-health", daemon=True)
+        self._health_thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    # -- request routing ----------------------------------------------------
+
+    def route(self, request: httpx.Request, backend: Backend) -> httpx.Request:
+        """Rewrites a request addressed to POOL_BASE_URL so it targets `backend`."""
+
+        url = httpx.URL(backend.base_url + request.url.raw_path.decode("ascii"))
+        headers = httpx.Headers(request.headers)
+        headers["host"] = url.netloc.decode("ascii")
+        return httpx.Request(request.method, url, headers=headers, content=request.content, extensions=request.extensions)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """Response stream that releases its backend slot once the body is consumed or closed."""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._stream.close()
+            self._on_close()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            await self._stream.aclose()
+            self._on_close()
+
+
+class BalancingTransport(httpx.BaseTransport):
+    """Sync transport sending each request to a backend picked by a BackendPool."""
+
+    def __init__(self, inner: httpx.BaseTransport, pool: BackendPool):
+        self.inner = inner
+        self.pool = pool
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key = session_key(request)
+        tried: set[str] = set()
+
+        while True:
+            backend = self.pool.acquire(key, tried)
+            tried.add(backend.base_url)
+            try:
+                response = self.inner.handle_request(self.pool.route(request, backend))
+            except _FAILOVER_ERRORS:
+                self.pool.release(backend)
+                self.pool.mark(backend, False)
+                if len(tried) == len(self.pool.backends):
+                    raise
+                continue
+
+            if response.status_code in _FAILOVER_STATUSES and len(tried) < len(self.pool.backends):
+                response.read()
+                response.close()
+                self.pool.release(backend)
+                continue
+
+            response.stream = _ReleasingStream(response.stream, lambda b=backend: self.pool.release(b))
+            return response
+
+    def close(self) -> None:
+        self.pool.stop()
+        self.inner.close()
+
+
+class AsyncBalancingTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of BalancingTransport."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, pool: BackendPool):
+        self.inner = inner
+        self.pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key = session_key(request)
+        tried: set[str] = set()
+
+        while True:
+            backend = self.pool.acquire(key, tried)
+            tried.add(backend.base_url)
+            try:
+                response = await self.inner.handle_async_request(self.pool.route(request, backend))
+            except _FAILOVER_ERRORS:
+                self.pool.release(backend)
+                self.pool.mark(backend, False)
+                if len(tried) == len(self.pool.backends):
+                    raise
+                continue
+
+            if response.status_code in _FAILOVER_STATUSES and len(tried) < len(self.pool.backends):
+                await response.aread()
+                await response.aclose()
+                self.pool.release(backend)
+                continue
+
+            response.stream = _AsyncReleasingStream(response.stream, lambda b=backend: self.pool.release(b))
+            return response
+
+    async def aclose(self) -> None:
+        self.pool.stop()
+        await self.inner.aclose()
+
+
+def build_backend_pool(config: LlamaCppConfig) -> BackendPool:
+    """
+    Creates the backend pool described by a llama-cpp configuration section and starts
+    its health checks.
+
+    Args:
+      config (LlamaCppConfig): The llama-cpp provider configuration section.
+
+    Returns:
+      BackendPool: The running pool.
+    """
+
+    pool = BackendPool(
+        base_urls=config.backend_urls(),
+        health_path=config.health_path,
+        health_check_interval_s=config.health_check_interval_s,
+        sticky_sessions=config.sticky_sessions,
+        sticky_max_skew=config.sticky_max_skew,
+    )
+    pool.start_health_checks()
+    return pool
+
@@ -9,6 +9,8 @@ Provider modules:
   - providers/llamacpp.py — Local model via an OpenAI-compatible API server
 
 The provider is selected at startup via `config.provider` in config.json.
+All providers share the pooled HTTP clients from `providers/http.py`, configured by
+the `http` section of config.json.
 Embeddings are configured separately in the `vectordb` section and are not
 the responsibility of the chat model provider.
 """
@@ -0,0 +1,298 @@
+"""
+Shared HTTP transport for all OpenAI-compatible provider clients.
+
+`ChatOpenAI` and `OpenAIEmbeddings` each create their own HTTP client by default, so
+every provider instance opens its own connections and retries with its own policy.
+This module builds one pooled `httpx.Client` / `httpx.AsyncClient` pair per distinct
+`HttpClientConfig` and hands the same pair to every provider instance, so concurrent
+sessions reuse keep-alive connections and share one concurrency limit towards the
+inference server.
+
+Retries on the statuses and transport errors the SDK would retry (408/409/429/5xx,
+timeouts, connection errors) are handled here with capped exponential backoff and full
+jitter, honouring `Retry-After`.
+The OpenAI SDK's own retries are disabled when these clients are used (see
+`openai_client_kwargs`), so a request is never retried by both layers.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import importlib.util
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Iterator
+
+import httpx
+
+from core.config import HttpClientConfig
+
+if TYPE_CHECKING:
+    from providers.balancer import BackendPool
+
+# Transport failures retried like the OpenAI SDK does (its own retries are disabled, see
+# `openai_client_kwargs`): the server was unreachable, timed out or dropped the connection
+_RETRYABLE_ERRORS = (httpx.ConnectError, httpx.TimeoutException, httpx.RemoteProtocolError)
+
+_clients: dict[str, tuple[httpx.Client, httpx.AsyncClient]] = {}
+_clients_lock = threading.Lock()
+
+SESSION_HEADER = "x-session-id"
+
+# Conversation the requests of the current context belong to (see `session_scope`)
+_session_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("http_session_id", default=None)
+
+
+@contextlib.contextmanager
+def session_scope(session_id: str | None) -> Iterator[None]:
+    """
+    Tags every request the shared clients send inside the block with `X-Session-Id`.
+
+    Worker threads started with a copy of the context (see `core.budget.call_with_timeout`)
+    are included. The load balancer keys stickiness on this header (see
+    `providers.balancer.session_key`), so a conversation stays on one backend whatever
+    its messages look like.
+
+    Args:
+      session_id (str | None): The conversation id; None sends no header.
+    """
+
+    token = _session_id.set(session_id)
+    try:
+        yield
+    finally:
+        _session_id.reset(token)
+
+
+def _tag_session(request: httpx.Request) -> None:
+    session_id = _session_id.get()
+    if session_id and SESSION_HEADER not in request.headers:
+        request.headers[SESSION_HEADER] = session_id
+
+
+async def _atag_session(request: httpx.Request) -> None:
+    _tag_session(request)
+
+
+def retry_delay(attempt: int, config: HttpClientConfig, response: httpx.Response | None = None) -> float:
+    """
+    Computes how long to wait before retry number `attempt` (0-based).
+
+    A `Retry-After` header (seconds or HTTP date) wins when present; otherwise the delay
+    is drawn uniformly from [0, min(backoff_max_s, backoff_base_s * 2**attempt)]
+    ("full jitter"), which spreads retries from concurrent sessions apart instead of
+    having them hit the server again in lockstep.
+
+    Args:
+      attempt (int): Zero-based retry number.
+      config (HttpClientConfig): The HTTP client configuration section.
+      response (httpx.Response | None): The response that triggered the retry, if any.
+
+    Returns:
+      float: Delay in seconds.
+    """
+
+    if response is not None:
+        retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(float(retry_after), config.backoff_max_s)
+            except ValueError:
+                parsed = email.utils.parsedate_to_datetime(retry_after)
+                if parsed is not None:
+                    return min(max(parsed.timestamp() - time.time(), 0.0), config.backoff_max_s)
+
+    return random.uniform(0, min(config.backoff_max_s, config.backoff_base_s * (2 ** attempt)))
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Sync transport decorator retrying busy-server responses and connection errors."""
+
+    def __init__(self, inner: httpx.BaseTransport, config: HttpClientConfig):
+        self.inner = inner
+        self.config = config
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.config.max_retries + 1):
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = self.inner.handle_request(request)
+            except _RETRYABLE_ERRORS:
+                if last_attempt:
+                    raise
+                time.sleep(retry_delay(attempt, self.config))
+                continue
+
+            if response.status_code not in self.config.retry_statuses or last_attempt:
+                return response
+
+            delay = retry_delay(attempt, self.config, response)
+            # Drain the body so the connection goes back to the pool instead of being dropped
+            response.read()
+            response.close()
+            time.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RetryTransport."""
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, config: HttpClientConfig):
+        self.inner = inner
+        self.config = config
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.config.max_retries + 1):
+            last_attempt = attempt == self.config.max_retries
+            try:
+                response = await self.inner.handle_async_request(request)
+            except _RETRYABLE_ERRORS:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(retry_delay(attempt, self.config))
+                continue
+
+            if response.status_code not in self.config.retry_statuses or last_attempt:
+                return response
+
+            delay = retry_delay(attempt, self.config, response)
+            await response.aread()
+            await response.aclose()
+            await asyncio.sleep(delay)
+
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+def build_limits(config: HttpClientConfig) -> httpx.Limits:
+    """Connection pool limits (concurrency cap and keep-alive) from the configuration."""
+
+    return httpx.Limits(
+        max_connections=config.max_connections,
+        max_keepalive_connections=config.max_keepalive_connections,
+        keepalive_expiry=config.keepalive_expiry_s,
+    )
+
+
+def build_timeout(config: HttpClientConfig) -> httpx.Timeout:
+    """Per-request timeouts from the configuration."""
+
+    return httpx.Timeout(
+        connect=config.connect_timeout_s,
+        read=config.read_timeout_s,
+        write=config.write_timeout_s,
+        pool=config.pool_timeout_s,
+    )
+
+
+def _check_http2(config: HttpClientConfig) -> None:
+    if config.http2 and importlib.util.find_spec("h2") is None:
+        raise ImportError("HTTP/2 requires the 'h2' package. Install it with: pip install 'httpx[http2]'")
+
+
+def build_http_clients(
+    config: HttpClientConfig,
+    pool: "BackendPool | None" = None,
+) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Builds a new sync/async HTTP client pair (prefer `get_http_clients`, which shares them).
+
+    Args:
+      config (HttpClientConfig): The HTTP client configuration section.
+      pool (BackendPool | None): Optional backend pool; requests are then load-balanced
+        across its backends (see `providers.balancer`) underneath the retry layer.
+
+    Returns:
+      tuple[httpx.Client, httpx.AsyncClient]: The new clients.
+
+    Raises:
+      ImportError: If HTTP/2 is requested but the 'h2' package is not installed.
+    """
+
+    _check_http2(config)
+    limits = build_limits(config)
+    sync_transport: httpx.BaseTransport = httpx.HTTPTransport(limits=limits, http2=config.http2)
+    async_transport: httpx.AsyncBaseTransport = httpx.AsyncHTTPTransport(limits=limits, http2=config.http2)
+
+    if pool is not None:
+        from providers.balancer import AsyncBalancingTransport, BalancingTransport
+        sync_transport = BalancingTransport(sync_transport, pool)
+        async_transport = AsyncBalancingTransport(async_transport, pool)
+
+    return (
+        httpx.Client(
+            transport=RetryTransport(sync_transport, config),
+            timeout=build_timeout(config),
+            event_hooks={"request": [_tag_session]},
+        ),
+        httpx.AsyncClient(
+            transport=AsyncRetryTransport(async_transport, config),
+            timeout=build_timeout(config),
+            event_hooks={"request": [_atag_session]},
+        ),
+    )
+
+
+def get_http_clients(config: HttpClientConfig | None = None) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    Returns the process-wide sync/async HTTP client pair for the given configuration.
+
+    Clients are created once per distinct configuration and then shared, so every
+    provider instance built with the same settings draws from one connection pool.
+
+    Args:
+      config (HttpClientConfig | None): The HTTP client configuration (defaults apply if None).
+
+    Returns:
+      tuple[httpx.Client, httpx.AsyncClient]: The shared clients.
+
+    Raises:
+      ImportError: If HTTP/2 is requested but the 'h2' package is not installed.
+    """
+
+    config = config or HttpClientConfig()
+    key = config.model_dump_json()
+
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = build_http_clients(config)
+        return _clients[key]
+
+
+def openai_client_kwargs(
+    config: HttpClientConfig | None = None,
+    pool: "BackendPool | None" = None,
+) -> dict[str, Any]:
+    """
+    Keyword arguments wiring the shared clients into `ChatOpenAI` / `OpenAIEmbeddings`.
+
+    The SDK's own retries are disabled because RetryTransport already retries, and the
+    timeout is passed explicitly because the SDK otherwise applies its own default.
+
+    Args:
+      config (HttpClientConfig | None): The HTTP client configuration (defaults apply if None).
+      pool (BackendPool | None): Optional backend pool; gets its own load-balanced clients.
+
+    Returns:
+      dict[str, Any]: `http_client`, `http_async_client`, `max_retries` and `timeout`.
+    """
+
+    config = config or HttpClientConfig()
+    if pool is not None:
+        http_client, http_async_client = build_http_clients(config, pool)
+    else:
+        http_client, http_async_client = get_http_clients(config)
+    return {
+        "http_client": http_client,
+        "http_async_client": http_async_client,
+        "max_retries": 0,
+        "timeout": build_timeout(config),
+    }
@@ -19,31 +19,52 @@ Configuration example (config.json):
     }
   }
 
+Several servers running the same model can be listed in "backends" instead of
+"base_url"; requests are then load-balanced across them (see providers/balancer.py).
+
 NOTE: The local server must support tool/function calling. Verify that your chosen
 runtime and model support the `tools` field in the chat completions request.
 """
 
 from langchain_openai import ChatOpenAI
 
-from core.config import LlamaCppConfig
+from core.config import HttpClientConfig, LlamaCppConfig
+from providers.balancer import POOL_BASE_URL, build_backend_pool
+from providers.http import openai_client_kwargs
 
 
-def build_chat_model(config: LlamaCppConfig) -> ChatOpenAI:
+def build_chat_model(config: LlamaCppConfig, http: HttpClientConfig | None = None) -> ChatOpenAI:
     """
     Builds a ChatOpenAI instance pointed at a local OpenAI-compatible server.
 
+    HTTP connections come from the shared, pooled clients in `providers.http`, so a busy
+    server answering 429/503 is retried with jittered backoff instead of failing the turn.
+    When `config.backends` lists several servers, requests are routed to the least
+    loaded healthy one, with sticky sessions and failover.
+
     Args:
       config (LlamaCppConfig): The llama-cpp provider configuration section.
+      http (HttpClientConfig | None): Connection pool / retry settings (defaults apply if None).
 
     Returns:
       ChatOpenAI: A chat model instance targeting the local API server.
     """
 
-    kwargs: dict = {
-        "model": config.model,
-        "base_url": config.base_url,
-        "api_key": "not-needed",
-    }
+    if config.backends:
+        pool = build_backend_pool(config)
+        kwargs: dict = {
+            "model": config.model,
+            "base_url": POOL_BASE_URL,
+            "api_key": "not-needed",
+            **openai_client_kwargs(http, pool),
+        }
+    else:
+        kwargs = {
+            "model": config.model,
+            "base_url": config.base_url,
+            "api_key": "not-needed",
+            **openai_client_kwargs(http),
+        }
 
     if config.extra_body:
         kwargs["model_kwargs"] = {"extra_body": config.extra_body}
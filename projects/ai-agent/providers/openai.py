@@ -2,25 +2,28 @@ import os
 
 from langchain_openai import ChatOpenAI
 
-from core.config import OpenAIConfig
+from core.config import HttpClientConfig, OpenAIConfig
+from providers.http import openai_client_kwargs
 
 
-def build_chat_model(config: OpenAIConfig) -> ChatOpenAI:
+def build_chat_model(config: OpenAIConfig, http: HttpClientConfig | None = None) -> ChatOpenAI:
     """
     Builds a ChatOpenAI instance from the given OpenAI provider configuration.
 
     Reads the API key from the environment variable specified by `config.api_key_env`.
     If `config.base_url` is set, it is passed to ChatOpenAI to support
     OpenAI-compatible local servers (e.g. llama.cpp server, Ollama, LM Studio).
+    HTTP connections come from the shared, pooled clients in `providers.http`.
 
     Args:
       config (OpenAIConfig): The OpenAI provider configuration section.
+      http (HttpClientConfig | None): Connection pool / retry settings (defaults apply if None).
 
     Returns:
       ChatOpenAI: A configured chat model instance.
     """
 
-    kwargs: dict = {"model": config.model}
+    kwargs: dict = {"model": config.model, **openai_client_kwargs(http)}
 
     if config.base_url:
         kwargs["base_url"] = config.base_url
@@ -0,0 +1,78 @@
+"""Test doubles shared by the agent graph tests."""
+
+from typing import Any
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model stub that replays a fixed list of AIMessages, one per call."""
+
+    responses: list[AIMessage]
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def _generate(self, messages: list, stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=response)])
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+
+def tool_call(name: str, args: dict, call_id: str) -> dict:
+    """Builds a ToolCall dict as produced by a tool-calling model."""
+
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+class KeywordEmbeddings(Embeddings):
+    """Embeddings stub: one dimension per vocabulary word, counting embedded texts."""
+
+    def __init__(self, vocabulary: list[str]):
+        self.vocabulary = vocabulary
+        self.embedded: list[str] = []
+
+    def _embed(self, text: str) -> list[float]:
+        lowered = text.lower()
+        return [1.0 if word in lowered else 0.0 for word in self.vocabulary] + [0.01]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded.extend(texts)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(text)
+
+
+class DictVectorStore:
+    """Vector store stub implementing the Chroma calls used for incremental indexing."""
+
+    def __init__(self):
+        self.chunks: dict[str, tuple[str, dict]] = {}
+        self.embedded: list[str] = []
+
+    def get(self, where: dict | None = None, include: list | None = None) -> dict:
+        matches = [
+            (chunk_id, metadata)
+            for chunk_id, (_, metadata) in self.chunks.items()
+            if all(metadata.get(key) == value for key, value in (where or {}).items())
+        ]
+        return {"ids": [chunk_id for chunk_id, _ in matches], "metadatas": [metadata for _, metadata in matches]}
+
+    def delete(self, ids: list[str]) -> None:
+        for chunk_id in ids:
+            self.chunks.pop(chunk_id, None)
+
+    def add_texts(self, texts: list[str], metadatas: list[dict], ids: list[str]) -> list[str]:
+        self.embedded.extend(texts)
+        for chunk_id, text, metadata in zip(ids, texts, metadatas):
+            self.chunks[chunk_id] = (text, metadata)
+        return ids
@@ -0,0 +1,166 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from agent import build_agent
+from core.config import HttpClientConfig, LlamaCppConfig
+from providers.balancer import BackendPool
+from providers.http import build_http_clients
+from providers.llamacpp import build_chat_model
+
+
+class _FakeLlamaServer:
+    """Minimal OpenAI-compatible chat server that records the requests it serves."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.status = 200
+        self.chat_requests = 0
+        owner = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                self._reply(owner.status, {"status": "ok" if owner.status == 200 else "loading"})
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if owner.status != 200:
+                    self._reply(owner.status, {"error": "busy"})
+                    return
+                owner.chat_requests += 1
+                self._reply(200, {
+                    "id": "chatcmpl-1",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "fake",
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": owner.name},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+                })
+
+            def _reply(self, status: int, payload: dict) -> None:
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def backends():
+    servers = [_FakeLlamaServer("a"), _FakeLlamaServer("b")]
+    yield servers
+    for server in servers:
+        server.server.shutdown()
+        server.server.server_close()
+
+
+def _conversation(topic: str) -> list:
+    return [SystemMessage(content="You are helpful."), HumanMessage(content=f"Tell me about {topic}")]
+
+
+def test_least_outstanding_backend_is_chosen() -> None:
+    pool = BackendPool(["http://a/v1", "http://b/v1", "http://c/v1"], sticky_sessions=False)
+
+    first = pool.acquire()
+    second = pool.acquire()
+    third = pool.acquire()
+
+    assert len({first.base_url, second.base_url, third.base_url}) == 3
+    pool.release(second)
+    assert pool.acquire() is second
+
+
+def test_sticky_sessions_yield_to_load_beyond_skew() -> None:
+    pool = BackendPool(["http://a/v1", "http://b/v1"], sticky_max_skew=1)
+
+    preferred = pool.acquire("conversation-1")
+    assert pool.acquire("conversation-1") is preferred  # skew 1 is tolerated
+    assert pool.acquire("conversation-1") is not preferred  # skew 2 is not
+
+
+def test_conversation_stays_on_one_backend(backends) -> None:
+    llm = build_chat_model(LlamaCppConfig(model="fake", backends=[s.url for s in backends]), HttpClientConfig())
+
+    answers = {llm.invoke(_conversation("llamas")).content for _ in range(5)}
+    llm.http_client.close()  # also stops the pool's health checks
+
+    assert len(answers) == 1
+    assert sum(s.chat_requests for s in backends) == 5
+
+
+def test_agent_session_stays_on_one_backend_whatever_its_messages(backends) -> None:
+    """The run's session id is sent as X-Session-Id, so changing history does not move it."""
+
+    llm = build_chat_model(LlamaCppConfig(model="fake", backends=[s.url for s in backends]), HttpClientConfig())
+    app = build_agent(llm, [])
+
+    answers = {
+        app.invoke(
+            {"messages": [HumanMessage(content=f"Tell me about {topic}")]},
+            config={"configurable": {"session_id": "s1"}},
+        )["messages"][-1].content
+        for topic in ("llamas", "alpacas", "vicunas", "guanacos", "camels", "dromedaries")
+    }
+    llm.http_client.close()
+
+    assert len(answers) == 1
+
+
+def test_failover_when_a_backend_is_busy(backends) -> None:
+    pool = BackendPool([s.url for s in backends], sticky_sessions=False)
+    client, _ = build_http_clients(HttpClientConfig(max_retries=0), pool)
+    body = {"model": "fake", "messages": [{"role": "user", "content": "hi"}]}
+
+    backends[0].status = 503
+    for _ in range(3):
+        response = client.post("http://llamacpp-pool/v1/chat/completions", json=body)
+        assert response.json()["choices"][0]["message"]["content"] == "b"
+    assert all(b.outstanding == 0 for b in pool.backends)
+
+
+def test_failover_when_a_backend_is_down(backends) -> None:
+    # Nothing listens on the discard port, so the first backend refuses connections
+    pool = BackendPool(["http://127.0.0.1:9/v1", backends[1].url], sticky_sessions=False)
+    client, _ = build_http_clients(HttpClientConfig(max_retries=0), pool)
+    body = {"model": "fake", "messages": [{"role": "user", "content": "hi"}]}
+
+    assert client.post("http://llamacpp-pool/v1/chat/completions", json=body).status_code == 200
+    assert not pool.backends[0].healthy
+    assert client.post("http://llamacpp-pool/v1/chat/completions", json=body).status_code == 200
+    assert backends[1].chat_requests == 2
+    assert pool.backends[0].served == 1
+
+
+def test_health_checks_mark_loading_backends_down(backends) -> None:
+    pool = BackendPool([s.url for s in backends])
+
+    backends[1].status = 503
+    pool.check_health()
+    assert [b.healthy for b in pool.backends] == [True, False]
+
+    backends[1].status = 200
+    pool.check_health()
+    assert all(b.healthy for b in pool.backends)
+
+
+def test_config_requires_an_endpoint() -> None:
+    with pytest.raises(ValueError):
+        LlamaCppConfig(model="fake")
+    assert LlamaCppConfig(model="fake", base_url="http://x/v1").backend_urls() == ["http://x/v1"]
@@ -0,0 +1,95 @@
+import json
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from agent import build_agent
+from core.config import AgentLimitsConfig
+from batch import completed_ids, load_questions, run_batch
+from fakes import ScriptedChatModel, tool_call
+
+
+@tool
+def calculate(expression: str) -> str:
+    """Evaluates an expression."""
+    return "4"
+
+
+def _write_jsonl(path, records) -> None:
+    path.write_text("".join(json.dumps(r) + "\n" for r in records), encoding="utf-8")
+
+
+def test_batch_records_answers_tools_steps_and_tokens(tmp_path) -> None:
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("calculate", {"expression": "2+2"}, "c1")],
+                  usage_metadata={"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}),
+        AIMessage(content="4", usage_metadata={"input_tokens": 20, "output_tokens": 1, "total_tokens": 21}),
+    ])
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(questions_path, [{"question": "2+2?"}])
+
+    summary = run_batch(build_agent(llm, [calculate]), load_questions(questions_path), output_path, concurrency=1)
+
+    result = json.loads(output_path.read_text(encoding="utf-8"))
+    assert summary["answered"] == 1 and summary["errors"] == 0
+    assert result["answer"] == "4"
+    assert result["tool_calls"][0]["name"] == "calculate" and result["tool_calls"][0]["result"] == "4"
+    assert [step["node"] for step in result["steps"]] == ["agent", "tools", "agent"]
+    assert result["tokens"] == {"prompt": 30, "completion": 6}
+
+
+def test_batch_counts_the_tokens_of_a_forced_final_answer(tmp_path) -> None:
+    usage = {"input_tokens": 10, "output_tokens": 5, "total_tokens": 15}
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("calculate", {"expression": "2+2"}, "c1")], usage_metadata=usage),
+        AIMessage(content="", tool_calls=[tool_call("calculate", {"expression": "3+3"}, "c2")], usage_metadata=usage),
+        AIMessage(content="Best effort.", usage_metadata={"input_tokens": 40, "output_tokens": 3, "total_tokens": 43}),
+    ])
+    app = build_agent(llm, [calculate], limits=AgentLimitsConfig(max_tool_iterations=1))
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(questions_path, [{"question": "loop"}])
+
+    run_batch(app, load_questions(questions_path), output_path, concurrency=1)
+
+    result = json.loads(output_path.read_text(encoding="utf-8"))
+    assert result["answer"] == "Best effort."
+    assert result["tokens"] == {"prompt": 60, "completion": 13}
+
+
+def test_batch_resumes_and_retries_failed_questions(tmp_path) -> None:
+    llm = ScriptedChatModel(responses=[AIMessage(content="done")])
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(questions_path, [{"id": f"q{i}", "question": f"question {i}"} for i in range(6)])
+    _write_jsonl(output_path, [
+        {"id": "q0", "answer": "earlier", "error": None},
+        {"id": "q1", "answer": None, "error": "TimeoutError: slow"},
+    ])
+
+    summary = run_batch(build_agent(llm, [calculate]), load_questions(questions_path), output_path, concurrency=3)
+
+    assert summary["skipped"] == 1 and summary["answered"] == 5
+    assert llm.calls == 5
+    assert completed_ids(output_path) == {f"q{i}" for i in range(6)}
+
+
+def test_batch_passes_user_ids_and_the_session_id(tmp_path) -> None:
+    seen = []
+
+    @tool
+    def whoami(config: RunnableConfig) -> str:
+        """Returns the run's configurable."""
+        seen.append({k: v for k, v in config["configurable"].items() if k in ("tenant", "user_id", "session_id")})
+        return "ok"
+
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("whoami", {}, "c1")]),
+        AIMessage(content="done"),
+    ])
+    questions_path, output_path = tmp_path / "q.jsonl", tmp_path / "out.jsonl"
+    _write_jsonl(questions_path, [{"question": "who am I?", "user_id": "alice"}])
+
+    run_batch(build_agent(llm, [whoami]), load_questions(questions_path), output_path,
+              concurrency=1, user_id_key="tenant", configurable={"session_id": "batch-1"})
+
+    assert seen == [{"tenant": "alice", "session_id": "batch-1"}]
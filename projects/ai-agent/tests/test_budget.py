@@ -0,0 +1,75 @@
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from agent import build_agent
+from core.config import AgentLimitsConfig
+from fakes import ScriptedChatModel, tool_call
+
+
+@tool
+def query_kb_tool(query: str) -> str:
+    """Searches the KB."""
+    return f"KB result for {query}"
+
+
+@tool
+def slow_tool() -> str:
+    """Takes far too long."""
+    time.sleep(2)
+    return "late"
+
+
+def test_iteration_cap_forces_a_final_answer() -> None:
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "a"}, "c1")]),
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "b"}, "c2")]),
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "c"}, "c3")]),
+        AIMessage(content="Best effort answer."),
+    ])
+
+    app = build_agent(llm, [query_kb_tool], limits=AgentLimitsConfig(max_tool_iterations=2))
+    messages = app.invoke({"messages": [HumanMessage(content="loop")]})["messages"]
+
+    assert messages[-1].content == "Best effort answer."
+    # The third tool call was never executed but still got a matching ToolMessage
+    skipped = [m for m in messages if isinstance(m, ToolMessage) and m.tool_call_id == "c3"]
+    assert len(skipped) == 1 and skipped[0].status == "error"
+
+
+def test_slow_tool_is_cut_off_by_its_timeout() -> None:
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("slow_tool", {}, "c1")]),
+        AIMessage(content="The tool timed out."),
+    ])
+
+    app = build_agent(llm, [slow_tool], limits=AgentLimitsConfig(tool_timeouts={"slow_tool": 0.1}))
+    started = time.monotonic()
+    messages = app.invoke({"messages": [HumanMessage(content="go")]})["messages"]
+
+    assert time.monotonic() - started < 1.5
+    assert messages[2].status == "error"
+    assert "did not answer" in messages[2].content
+    # The call keeps running in its abandoned thread: the model must not assume it was undone
+    assert "may still complete" in messages[2].content
+
+
+def test_deadline_falls_back_to_gathered_results() -> None:
+    class SlowAfterFirstCall(ScriptedChatModel):
+        def _generate(self, *args, **kwargs):
+            if self.calls > 0:
+                time.sleep(2)
+            return super()._generate(*args, **kwargs)
+
+    llm = SlowAfterFirstCall(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "auth code"}, "c1")]),
+        AIMessage(content="never returned in time"),
+    ])
+
+    app = build_agent(llm, [query_kb_tool], limits=AgentLimitsConfig(turn_timeout_s=0.5))
+    started = time.monotonic()
+    answer = app.invoke({"messages": [HumanMessage(content="auth code?")]})["messages"][-1].content
+
+    assert time.monotonic() - started < 1.5
+    assert "KB result for auth code" in answer
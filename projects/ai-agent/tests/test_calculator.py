@@ -0,0 +1,74 @@
+import time
+
+import pytest
+
+from core.config import CalculatorConfig
+from core.sandbox import ExpressionSandbox, SandboxError
+from tools import calculate, get_math_tools
+
+
+@pytest.fixture
+def sandbox():
+    sandbox = ExpressionSandbox(CalculatorConfig(workers=1, timeout_s=10, cpu_time_s=1, memory_mb=64))
+    yield sandbox
+    sandbox.close()
+
+
+def test_sandboxed_tool_matches_inprocess_results() -> None:
+    (sandboxed,) = get_math_tools(CalculatorConfig(workers=1))
+    assert sandboxed.name == calculate.name
+    assert get_math_tools(CalculatorConfig(mode="inprocess")) == [calculate]
+
+    for expression in ("2 ** 10 + sqrt(144)", "7 / 2", "1 +"):
+        assert sandboxed.invoke({"expression": expression}) == calculate.invoke({"expression": expression})
+
+
+def test_runaway_expressions_are_killed_and_the_worker_recovers(sandbox) -> None:
+    # Both are folded with Python ints before numexpr evaluates anything
+    with pytest.raises(SandboxError, match="CPU limit"):
+        sandbox.evaluate("10 ** 10 ** 9")
+    with pytest.raises(SandboxError, match="memory limit"):
+        sandbox.evaluate("2 ** 2 ** 2 ** 2 ** 2 ** 2")
+
+    assert sandbox.evaluate("6 * 7") == "42"
+
+
+def test_wall_clock_timeout_and_size_limits() -> None:
+    sandbox = ExpressionSandbox(CalculatorConfig(
+        workers=1, timeout_s=0.5, cpu_time_s=60, max_expression_chars=20, max_result_chars=5,
+    ))
+    try:
+        with pytest.raises(SandboxError, match="cancelled"):
+            sandbox.evaluate("10 ** 10 ** 9")
+        with pytest.raises(SandboxError, match="expression longer"):
+            sandbox.evaluate("1 + " * 10 + "1")
+        with pytest.raises(SandboxError, match="result longer"):
+            sandbox.evaluate("2 ** 40")
+        assert sandbox.evaluate("2 ** 4") == "16"
+    finally:
+        sandbox.close()
+
+
+def test_deterministic_failures_are_cached(sandbox) -> None:
+    with pytest.raises(SandboxError):
+        sandbox.evaluate("2 ** 2 ** 2 ** 2 ** 2 ** 2")
+
+    started = time.perf_counter()
+    with pytest.raises(SandboxError, match="memory limit"):
+        sandbox.evaluate("2 ** 2 ** 2 ** 2 ** 2 ** 2")
+    assert time.perf_counter() - started < 0.1
+
+
+def test_timeouts_and_killed_workers_are_not_cached(sandbox) -> None:
+    # A CPU-limit kill or a timeout may be caused by load: the next call evaluates again
+    with pytest.raises(SandboxError, match="CPU limit"):
+        sandbox.evaluate("10 ** 10 ** 9")
+    assert sandbox._cached("10 ** 10 ** 9") is None
+
+    quick = ExpressionSandbox(CalculatorConfig(workers=1, timeout_s=0.5, cpu_time_s=60))
+    try:
+        with pytest.raises(SandboxError, match="cancelled"):
+            quick.evaluate("10 ** 10 ** 9")
+        assert quick._cached("10 ** 10 ** 9") is None
+    finally:
+        quick.close()
@@ -0,0 +1,70 @@
+import math
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+from agent import ROUTER_NODE, build_agent
+from core.cascade import escalation_reason, route_turn
+from core.config import CascadeConfig
+from fakes import ScriptedChatModel, tool_call
+
+CASCADE = CascadeConfig(enabled=True, provider="openai", openai={"model": "gpt-5-nano"})
+
+
+@tool
+def calculate(expression: str) -> str:
+    """Evaluates an expression."""
+    return "4"
+
+
+@tool
+def query_kb_tool(query: str) -> str:
+    """Searches the KB."""
+    return f"KB result for {query}"
+
+
+def test_router_keeps_complex_turns_on_the_strong_model() -> None:
+    assert route_turn([HumanMessage(content="what is 2+2?")], CASCADE) == ("fast", "simple")
+    assert route_turn([HumanMessage(content="Explain the auth flow")], CASCADE) == ("strong", "keyword")
+    assert route_turn([HumanMessage(content="x" * 500)], CASCADE) == ("strong", "length")
+
+
+def test_escalation_reasons() -> None:
+    assert escalation_reason(AIMessage(content="", tool_calls=[tool_call("calculate", {}, "c1")]), CASCADE) is None
+    assert escalation_reason(AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {}, "c1")]), CASCADE) == "tool"
+    assert escalation_reason(AIMessage(content="I'm not sure."), CASCADE) == "hedge"
+
+    unsure = {"logprobs": {"content": [{"token": "Paris", "logprob": math.log(0.3)}]}}
+    assert escalation_reason(AIMessage(content="Paris", response_metadata=unsure), CASCADE) == "confidence"
+
+
+def test_simple_turn_is_served_by_the_fast_model() -> None:
+    fast = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("calculate", {"expression": "2+2"}, "c1")]),
+        AIMessage(content="2 + 2 = 4"),
+    ])
+    strong = ScriptedChatModel(responses=[AIMessage(content="unused")])
+
+    app = build_agent(strong, [calculate], fast_llm=fast, cascade=CASCADE)
+    answer = app.invoke({"messages": [HumanMessage(content="2+2?")]})["messages"][-1].content
+
+    assert ROUTER_NODE in app.get_graph().nodes
+    assert answer == "2 + 2 = 4"
+    assert (fast.calls, strong.calls) == (2, 0)
+
+
+def test_fast_model_escalates_and_the_run_stays_strong() -> None:
+    fast = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "vpn"}, "c1")]),
+    ])
+    strong = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "vpn setup"}, "c2")]),
+        AIMessage(content="Use the corporate VPN profile."),
+    ])
+
+    app = build_agent(strong, [query_kb_tool], fast_llm=fast, cascade=CASCADE)
+    messages = app.invoke({"messages": [HumanMessage(content="vpn?")]})["messages"]
+
+    assert messages[-1].content == "Use the corporate VPN profile."
+    assert messages[1].tool_calls[0]["id"] == "c2"
+    assert (fast.calls, strong.calls) == (1, 2)
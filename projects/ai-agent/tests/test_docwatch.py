@@ -0,0 +1,108 @@
+import threading
+import time
+
+from langchain_core.documents import Document
+
+from core.config import DocsWatchConfig
+from core.docwatch import DocsWatcher, build_reindexer
+from core.vectordb import KBQueryCache, sync_sources
+from fakes import DictVectorStore
+from tools.kb import get_kb_tools
+
+
+def _chunks(source: str, *texts: str) -> list[Document]:
+    return [Document(page_content=text, metadata={"source": source}) for text in texts]
+
+
+def test_only_changed_chunks_are_embedded() -> None:
+    store = DictVectorStore()
+
+    assert sync_sources(store, {"a.md": _chunks("a.md", "one", "two", "three")}) == 3
+    assert sync_sources(store, {"a.md": _chunks("a.md", "one", "TWO", "three")}) == 1
+    assert store.embedded[-1] == "TWO"
+
+    # Shrinking a file drops its trailing chunks; an empty list drops the source
+    assert sync_sources(store, {"a.md": _chunks("a.md", "one")}) == 0
+    assert sorted(store.chunks) == ["a.md#0"]
+    sync_sources(store, {"a.md": []})
+    assert store.chunks == {}
+
+
+def test_polling_watcher_debounces_bursts(tmp_path) -> None:
+    doc = tmp_path / "guide.md"
+    doc.write_text("v0", encoding="utf-8")
+    batches: list[set[str]] = []
+    changed = threading.Event()
+
+    def _on_change(paths: set[str]) -> None:
+        batches.append(paths)
+        changed.set()
+
+    config = DocsWatchConfig(backend="polling", debounce_s=0.3, poll_interval_s=0.05)
+    watcher = DocsWatcher(tmp_path, "**/*.md", _on_change, config).start()
+    try:
+        for i in range(5):
+            doc.write_text(f"v{i + 1}" * (i + 1), encoding="utf-8")
+            time.sleep(0.05)
+        assert changed.wait(5)
+        time.sleep(0.5)
+        assert batches == [{str(doc)}]
+
+        changed.clear()
+        doc.unlink()
+        assert changed.wait(5)
+        assert batches[-1] == {str(doc)}
+    finally:
+        watcher.stop()
+
+
+def test_reindexing_invalidates_cached_kb_results(tmp_path) -> None:
+    doc = tmp_path / "vpn.md"
+    doc.write_text("The VPN profile is corp-vpn.", encoding="utf-8")
+    store = DictVectorStore()
+    sync_sources(store, {str(doc): _chunks(str(doc), "The VPN profile is corp-vpn.")})
+
+    class _Retriever:
+        vectorstore = store
+        queries = 0
+
+        def invoke(self, query: str) -> list[Document]:
+            self.queries += 1
+            return [Document(page_content=text, metadata=metadata) for text, metadata in store.chunks.values()]
+
+    retriever = _Retriever()
+    cache = KBQueryCache()
+    (query_kb_tool,) = get_kb_tools(lambda: retriever, cache)
+
+    assert "corp-vpn" in query_kb_tool.invoke({"query": "vpn"})
+    assert "corp-vpn" in query_kb_tool.invoke({"query": "vpn"})
+    assert retriever.queries == 1
+
+    doc.write_text("The VPN profile is new-vpn.", encoding="utf-8")
+    assert build_reindexer(lambda: retriever, cache)({str(doc)}) == 1
+
+    assert "new-vpn" in query_kb_tool.invoke({"query": "vpn"})
+    assert retriever.queries == 2
+
+
+def test_reindexing_a_new_file_clears_unrelated_cached_results(tmp_path) -> None:
+    """A new file can answer a query whose cached result never cited it."""
+
+    store = DictVectorStore()
+    sync_sources(store, {"vpn.md": _chunks("vpn.md", "The VPN profile is corp-vpn.")})
+
+    class _Retriever:
+        vectorstore = store
+
+        def invoke(self, query: str) -> list[Document]:
+            return [Document(page_content=text, metadata=metadata) for text, metadata in store.chunks.values()]
+
+    cache = KBQueryCache()
+    (query_kb_tool,) = get_kb_tools(lambda: _Retriever(), cache)
+    assert "Wi-Fi" not in query_kb_tool.invoke({"query": "wifi"})
+
+    doc = tmp_path / "wifi.md"
+    doc.write_text("The Wi-Fi network is corp-wlan.", encoding="utf-8")
+    build_reindexer(lambda: _Retriever(), cache)({str(doc)})
+
+    assert "corp-wlan" in query_kb_tool.invoke({"query": "wifi"})
@@ -0,0 +1,104 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from core.config import HttpClientConfig, OpenAIConfig
+from providers.http import get_http_clients, retry_delay
+from providers.openai import build_chat_model
+
+
+class _BusyThenOkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    busy_responses = 2
+    busy_status = 503
+    stall_s = 0.0
+    requests = 0
+    client_ports: set = set()
+
+    def do_GET(self) -> None:
+        cls = type(self)
+        cls.requests += 1
+        cls.client_ports.add(self.client_address[1])
+        busy = cls.requests <= cls.busy_responses
+        if busy and cls.stall_s:
+            time.sleep(cls.stall_s)
+        status = cls.busy_status if busy else 200
+        body = b"busy" if busy else b"ok"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        if busy:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+@pytest.fixture
+def busy_server():
+    _BusyThenOkHandler.requests = 0
+    _BusyThenOkHandler.busy_responses = 2
+    _BusyThenOkHandler.busy_status = 503
+    _BusyThenOkHandler.stall_s = 0.0
+    _BusyThenOkHandler.client_ports = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BusyThenOkHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_busy_responses_are_retried_over_a_reused_connection(busy_server) -> None:
+    client, _ = get_http_clients(HttpClientConfig(max_retries=3, backoff_base_s=0.01))
+
+    response = client.get(f"{busy_server}/health")
+
+    assert response.status_code == 200
+    assert _BusyThenOkHandler.requests == 3
+    assert len(_BusyThenOkHandler.client_ports) == 1
+
+
+@pytest.mark.parametrize("status", [408, 409, 500, 502, 504])
+def test_transient_server_errors_are_retried_by_default(busy_server, status) -> None:
+    _BusyThenOkHandler.busy_status = status
+    client, _ = get_http_clients(HttpClientConfig(backoff_base_s=0.01))
+
+    assert client.get(f"{busy_server}/health").status_code == 200
+    assert _BusyThenOkHandler.requests == 3
+
+
+def test_read_timeouts_are_retried(busy_server) -> None:
+    _BusyThenOkHandler.busy_responses = 1
+    _BusyThenOkHandler.stall_s = 0.5
+    client, _ = get_http_clients(HttpClientConfig(read_timeout_s=0.1, backoff_base_s=0.01))
+
+    assert client.get(f"{busy_server}/health").status_code == 200
+    assert _BusyThenOkHandler.requests == 2
+
+
+def test_retries_give_up_after_max_retries(busy_server) -> None:
+    client, _ = get_http_clients(HttpClientConfig(max_retries=1, backoff_base_s=0.01))
+
+    assert client.get(f"{busy_server}/health").status_code == 503
+    assert _BusyThenOkHandler.requests == 2
+
+
+def test_providers_share_one_client_pool(monkeypatch) -> None:
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    http = HttpClientConfig(max_connections=4)
+    first = build_chat_model(OpenAIConfig(model="gpt-5-mini", base_url="http://127.0.0.1:9/v1"), http)
+    second = build_chat_model(OpenAIConfig(model="gpt-5-mini", base_url="http://127.0.0.1:9/v1"), http)
+
+    assert first.http_client is second.http_client
+    assert first.max_retries == 0
+
+
+def test_backoff_uses_full_jitter_and_caps() -> None:
+    config = HttpClientConfig(backoff_base_s=1.0, backoff_max_s=4.0)
+
+    delays = [retry_delay(10, config) for _ in range(50)]
+
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
@@ -0,0 +1,179 @@
+import json
+import threading
+
+from core.config import MemoryNamespacesConfig, MemoryRecallConfig
+from core.memoryindex import MemoryIndex
+from core.memorystore import MemoryNamespaces, MemoryStore, memory_db_path, namespace_db_path
+from fakes import KeywordEmbeddings
+from tools.memory import get_memory_tools
+
+
+def test_legacy_json_is_migrated_once(tmp_path) -> None:
+    legacy = tmp_path / "bot_memory.json"
+    legacy.write_text(json.dumps({"user_info": {"name": "Rick", "pets": ["dog"]}}), encoding="utf-8")
+
+    store = MemoryStore.open(legacy)
+    assert memory_db_path(legacy) == tmp_path / "bot_memory.sqlite3"
+    assert store.get_all() == {"name": "Rick", "pets": ["dog"]}
+
+    store.upsert({"name": "Morty"})
+    store.close()
+    # Re-opening does not re-import the (stale) JSON file over newer values
+    assert MemoryStore.open(legacy).get("name") == "Morty"
+
+
+def test_concurrent_updates_are_not_lost(tmp_path) -> None:
+    path = tmp_path / "memory.sqlite3"
+    stores = [MemoryStore(path) for _ in range(4)]
+
+    def _writer(index: int) -> None:
+        for i in range(25):
+            stores[index].upsert({f"writer{index}-{i}": i})
+
+    threads = [threading.Thread(target=_writer, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(MemoryStore(path).get_all()) == 100
+
+
+def test_read_cache_sees_writes_from_other_connections(tmp_path) -> None:
+    path = tmp_path / "memory.sqlite3"
+    reader, writer = MemoryStore(path), MemoryStore(path)
+
+    assert reader.get_all() == {}
+    writer.upsert({"color": "blue"})
+    assert reader.get_all() == {"color": "blue"}
+
+
+def test_memory_tools_merge_updates(tmp_path) -> None:
+    get_memory_tool, update_memory_tool = get_memory_tools(str(tmp_path / "bot_memory.json"))
+
+    assert update_memory_tool.invoke({"updated_memory": {"user_info": {"name": "Rick"}}}) == "Memory updated successfully."
+    assert update_memory_tool.invoke({"updated_memory": '{"favorite_color": "blue"}'}) == "Memory updated successfully."
+    assert update_memory_tool.invoke({"updated_memory": "not json"}).startswith("Error")
+
+    assert get_memory_tool.invoke({}).user_info == {"name": "Rick", "favorite_color": "blue"}
+
+
+def test_recall_returns_relevant_entries_and_indexes_incrementally(tmp_path) -> None:
+    embeddings = KeywordEmbeddings(["name", "color", "pet", "food"])
+    recall_memory_tool, update_memory_tool = get_memory_tools(
+        str(tmp_path / "bot_memory.json"), embeddings, MemoryRecallConfig(top_k=1)
+    )
+    assert recall_memory_tool.name == "recall_memory_tool"
+
+    update_memory_tool.invoke({"updated_memory": {"name": "Rick", "favorite_color": "blue", "pet": "dog"}})
+    assert len(embeddings.embedded) == 3
+
+    update_memory_tool.invoke({"updated_memory": {"pet": "cat"}})
+    # Only the changed entry was re-embedded
+    assert embeddings.embedded[3:] == ['pet: "cat"']
+
+    assert json.loads(recall_memory_tool.invoke({"query": "what pet do I have?"})) == {"pet": "cat"}
+    assert len(embeddings.embedded) == 4
+
+
+def test_recall_prefers_recent_entries_on_ties(tmp_path) -> None:
+    store = MemoryStore(tmp_path / "memory.sqlite3")
+    store.upsert({"food_old": "pizza"})
+    store._conn.execute("UPDATE memory SET updated_at = updated_at - 365 * 86400")
+    store.upsert({"food_new": "sushi"})
+
+    index = MemoryIndex(store, KeywordEmbeddings(["food"]), MemoryRecallConfig(top_k=2))
+    assert [key for key, _, _ in index.recall("favourite food")] == ["food_new", "food_old"]
+
+
+def test_changing_the_embedding_model_reindexes(tmp_path) -> None:
+    store = MemoryStore(tmp_path / "memory.sqlite3")
+    store.upsert({"food": "pizza", "pet": "dog"})
+    MemoryIndex(store, KeywordEmbeddings(["food"])).sync()
+
+    # Same model id (class name) but another dimension: vectors are re-embedded on recall
+    bigger = KeywordEmbeddings(["food", "pet", "color"])
+    index = MemoryIndex(store, bigger, MemoryRecallConfig(top_k=1))
+    assert [key for key, _, _ in index.recall("my pet")] == ["pet"]
+    assert len(bigger.embedded) == 2
+
+    # A new entry embedded by a model of yet another size: older vectors follow
+    smaller = KeywordEmbeddings(["pet"])
+    index = MemoryIndex(store, smaller, MemoryRecallConfig(top_k=1))
+    store.upsert({"color": "blue"})
+    assert index.sync() == 3
+    assert [key for key, _, _ in index.recall("my pet")] == ["pet"]
+
+    # Another model id: every entry is re-embedded even if the dimension matches
+    renamed = KeywordEmbeddings(["pet"])
+    renamed.model_id = "huggingface/other-model"
+    assert MemoryIndex(store, renamed).sync() == 3
+    assert MemoryIndex(store, renamed).sync() == 0
+
+
+def test_memory_is_scoped_per_user(tmp_path) -> None:
+    get_memory_tool, update_memory_tool = get_memory_tools(str(tmp_path / "bot_memory.json"))
+    alice, bob = {"configurable": {"user_id": "alice"}}, {"configurable": {"user_id": "bob"}}
+
+    update_memory_tool.invoke({"updated_memory": {"name": "Alice"}}, config=alice)
+    update_memory_tool.invoke({"updated_memory": {"name": "Bob"}}, config=bob)
+
+    assert get_memory_tool.invoke({}, config=alice).user_info == {"name": "Alice"}
+    assert get_memory_tool.invoke({}, config=bob).user_info == {"name": "Bob"}
+    assert get_memory_tool.invoke({}).user_info == {}
+    assert namespace_db_path(tmp_path / "bot_memory.json", "alice").exists()
+
+
+def test_idle_namespaces_are_evicted_beyond_max_open(tmp_path) -> None:
+    registry = MemoryNamespaces(tmp_path / "bot_memory.json", MemoryNamespacesConfig(max_open=2))
+
+    for user in ("u1", "u2", "u3"):
+        with registry.acquire(user) as namespace:
+            namespace.store.upsert({"user": user})
+    assert registry.open_count == 2
+
+    # An evicted namespace is reopened from disk on demand
+    with registry.acquire("u1") as namespace:
+        assert namespace.store.get_all() == {"user": "u1"}
+
+
+def test_update_reports_a_store_that_cannot_be_opened(tmp_path) -> None:
+    (tmp_path / "not_a_dir").write_text("", encoding="utf-8")
+    _, update_memory_tool = get_memory_tools(str(tmp_path / "not_a_dir" / "bot_memory.json"))
+
+    result = update_memory_tool.invoke({"updated_memory": {"name": "Rick"}}, config={"configurable": {"user_id": "u1"}})
+    assert result.startswith("Error updating memory:")
+
+
+def test_slow_open_does_not_block_other_namespaces(tmp_path) -> None:
+    registry = MemoryNamespaces(tmp_path / "bot_memory.json")
+    release = threading.Event()
+    opened: list[str | None] = []
+    open_store = registry._open_store
+
+    def slow_open_store(name):
+        opened.append(name)
+        if name == "slow":
+            release.wait(5)
+        return open_store(name)
+
+    def use(name):
+        with registry.acquire(name) as namespace:
+            namespace.store.get_all()
+
+    registry._open_store = slow_open_store
+    waiters = [threading.Thread(target=use, args=("slow",)) for _ in range(3)]
+    for waiter in waiters:
+        waiter.start()
+
+    fast = threading.Thread(target=use, args=("fast",))
+    fast.start()
+    fast.join(timeout=2)
+    # "fast" was opened and used while "slow" is still being opened
+    assert not fast.is_alive() and not release.is_set()
+
+    release.set()
+    for waiter in waiters:
+        waiter.join(timeout=5)
+    # Concurrent callers of the namespace being opened share a single open
+    assert sorted(opened) == ["fast", "slow"]
@@ -0,0 +1,80 @@
+import pytest
+from langchain_core.messages import HumanMessage
+
+from agent import build_agent
+from core.config import Config, HttpClientConfig, LlamaCppConfig
+from loadtest import DEFAULT_QUESTIONS, DEFAULT_SCRIPT, mock_config, run_load_test, summarize
+from mock_server import MockInferenceServer
+from providers.llamacpp import build_chat_model
+from tools import calculate
+from tools.utils import get_current_time, get_today_date
+
+
+@pytest.fixture
+def mock_server():
+    with MockInferenceServer(script=DEFAULT_SCRIPT) as server:
+        yield server
+
+
+def _llm(server: MockInferenceServer, **kwargs):
+    return build_chat_model(LlamaCppConfig(model="mock-model", base_url=server.url), HttpClientConfig()).model_copy(
+        update=kwargs
+    )
+
+
+def test_scripted_tool_call_round_trip(mock_server) -> None:
+    app = build_agent(_llm(mock_server), [calculate])
+
+    messages = app.invoke({"messages": [HumanMessage(content="How much is 17 * 23 + 4?")]})["messages"]
+
+    assert messages[1].tool_calls[0]["name"] == "calculate"
+    assert messages[2].content == "395"
+    assert "395" in messages[-1].content
+    assert messages[-1].usage_metadata["input_tokens"] > 0
+    assert mock_server.stats["chat_requests"] == 2
+
+
+def test_streaming_is_paced_by_tokens_per_second(mock_server) -> None:
+    mock_server.tokens_per_s = 200
+    llm = _llm(mock_server, streaming=True)
+
+    chunks = list(llm.stream([HumanMessage(content="Hello there!")]))
+
+    assert "".join(chunk.content for chunk in chunks) == "Mock answer to: Hello there!"
+    assert len(chunks) > 5
+
+
+def test_embeddings_are_deterministic(mock_server) -> None:
+    from langchain_openai import OpenAIEmbeddings
+
+    embeddings = OpenAIEmbeddings(model="mock", base_url=mock_server.url, api_key="x", check_embedding_ctx_length=False)
+
+    first, second = embeddings.embed_documents(["alpha", "beta"])
+    assert len(first) == 384
+    assert embeddings.embed_query("alpha") == first != second
+
+
+def test_load_test_reports_overhead(mock_server) -> None:
+    app = build_agent(_llm(mock_server), [calculate, get_today_date, get_current_time])
+    questions = [q for q in DEFAULT_QUESTIONS if q["id"] in ("date", "math", "chat")]
+
+    results, elapsed = run_load_test(app, questions, users=3, turns=2)
+    report = summarize(results, elapsed, mock_server)
+
+    assert report["turns"] == 6 and report["errors"] == 0
+    assert set(report["nodes"]) == {"agent", "tools"}
+    assert report["model_requests"] == mock_server.stats["chat_requests"]
+    assert report["overhead_ms_per_turn"] >= 0
+
+
+def test_real_servers_keep_the_configured_model_names(tmp_path) -> None:
+    cfg = Config.load_from_file("config.json")
+    configured = cfg.llamacpp.model if cfg.provider == "llamacpp" else cfg.openai.model
+
+    real = mock_config(cfg, "http://10.0.0.5:8080/v1", tmp_path, mock=False)
+    assert real.llamacpp.model == configured
+    assert real.llamacpp.backend_urls() == ["http://10.0.0.5:8080/v1"]
+    assert real.vectordb.embedding_name == cfg.vectordb.embedding_name
+
+    mocked = mock_config(cfg, "http://127.0.0.1:5000/v1", tmp_path)
+    assert (mocked.llamacpp.model, mocked.vectordb.embedding_name) == ("mock-model", "mock-embedding")
@@ -0,0 +1,50 @@
+import subprocess
+import sys
+import threading
+import time
+
+from core.startup import StartupProfiler, run_once
+
+
+def test_run_once_builds_a_single_time_across_threads() -> None:
+    calls = []
+
+    def _factory() -> object:
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    build = run_once(_factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(build())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_importing_main_does_not_load_heavy_dependencies() -> None:
+    code = (
+        "import sys, main; "
+        "heavy = [m for m in ('langgraph', 'langchain_openai', 'chromadb', 'sentence_transformers') if m in sys.modules]; "
+        "print(','.join(heavy))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == ""
+
+
+def test_profiler_report_lists_steps() -> None:
+    profiler = StartupProfiler()
+    with profiler.step("import", "agent"):
+        pass
+    with profiler.step("init", "agent graph"):
+        pass
+
+    report = profiler.report()
+
+    assert "agent graph" in report
+    assert "wall clock since start" in report
@@ -0,0 +1,68 @@
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+import core.telemetry as telemetry_module
+from agent import build_agent
+from core.config import TelemetryConfig
+from core.telemetry import Telemetry, configure_telemetry, get_telemetry
+from fakes import ScriptedChatModel, tool_call
+
+
+def test_spans_nest_and_share_the_trace_id(tmp_path) -> None:
+    trace_path = tmp_path / "traces.jsonl"
+    telemetry = Telemetry(enabled=True, trace_path=trace_path)
+
+    with telemetry.span("agent.turn"):
+        with telemetry.span("agent.llm") as span:
+            span["prompt_tokens"] = 12
+
+    child, root = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert root["parent_id"] is None
+    assert child["parent_id"] == root["span_id"]
+    assert child["trace_id"] == root["trace_id"]
+    assert child["attributes"]["prompt_tokens"] == 12
+
+
+def test_prometheus_rendering() -> None:
+    telemetry = Telemetry(enabled=True)
+    telemetry.inc("agent_llm_tokens_total", 1500, kind="prompt")
+    telemetry.observe("kb_retrieved_chunks", 5, buckets=(1, 5, 10))
+
+    text = telemetry.render_prometheus()
+
+    assert "# TYPE agent_llm_tokens_total counter" in text
+    assert 'agent_llm_tokens_total{kind="prompt"} 1500' in text
+    assert 'kb_retrieved_chunks_bucket{le="1"} 0' in text
+    assert 'kb_retrieved_chunks_bucket{le="5"} 1' in text
+    assert 'kb_retrieved_chunks_bucket{le="+Inf"} 1' in text
+    assert "kb_retrieved_chunks_count 1" in text
+
+
+def test_agent_run_records_tokens_and_tool_spans(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(telemetry_module, "_telemetry", telemetry_module._telemetry)
+    configure_telemetry(TelemetryConfig(enabled=True, trace_path=tmp_path / "t.jsonl", metrics_path=tmp_path / "m.prom"))
+
+    @tool
+    def calculate(expression: str) -> str:
+        """Evaluates an expression."""
+        return "4"
+
+    llm = ScriptedChatModel(responses=[
+        AIMessage(
+            content="",
+            tool_calls=[tool_call("calculate", {"expression": "2+2"}, "c1")],
+            usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110},
+        ),
+        AIMessage(content="4", usage_metadata={"input_tokens": 120, "output_tokens": 5, "total_tokens": 125}),
+    ])
+
+    with get_telemetry().span("agent.turn"):
+        build_agent(llm, [calculate]).invoke({"messages": [HumanMessage(content="2+2?")]})
+
+    names = [json.loads(line)["name"] for line in (tmp_path / "t.jsonl").read_text().splitlines()]
+    assert names.count("agent.llm") == 2
+    assert "tool" in names and "agent.tools" in names
+    assert get_telemetry().counter_value("agent_llm_tokens_total", kind="prompt") == 220
+    assert 'agent_tool_calls_total{status="success",tool="calculate"} 1' in (tmp_path / "m.prom").read_text()
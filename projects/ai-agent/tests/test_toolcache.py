@@ -0,0 +1,82 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+
+from agent import build_agent
+from core.config import ToolCacheConfig
+from fakes import ScriptedChatModel, tool_call
+
+
+def _build_counting_tools():
+    counts = {"kb": 0, "memory": 0}
+
+    @tool
+    def query_kb_tool(query: str) -> str:
+        """Searches the KB."""
+        counts["kb"] += 1
+        return f"KB result for {query}"
+
+    @tool
+    def get_memory_tool() -> str:
+        """Reads memory."""
+        counts["memory"] += 1
+        return f"memory v{counts['memory']}"
+
+    @tool
+    def update_memory_tool(updated_memory: str) -> str:
+        """Writes memory."""
+        return "Memory updated successfully."
+
+    return counts, [query_kb_tool, get_memory_tool, update_memory_tool]
+
+
+def test_identical_calls_are_memoized_within_a_run() -> None:
+    counts, tools = _build_counting_tools()
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "auth code"}, "c1")]),
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "auth code"}, "c2")]),
+        AIMessage(content="The code is 42."),
+    ])
+
+    app = build_agent(llm, tools, tool_cache=ToolCacheConfig(reference_duplicates=False))
+    result = app.invoke({"messages": [HumanMessage(content="auth code?")]})
+
+    tool_messages = [m for m in result["messages"] if isinstance(m, ToolMessage)]
+    assert counts["kb"] == 1
+    assert [m.content for m in tool_messages] == ["KB result for auth code"] * 2
+    assert tool_messages[1].tool_call_id == "c2"
+
+
+def test_memory_reads_are_invalidated_by_updates() -> None:
+    counts, tools = _build_counting_tools()
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("get_memory_tool", {}, "c1")]),
+        AIMessage(content="", tool_calls=[tool_call("get_memory_tool", {}, "c2")]),
+        AIMessage(content="", tool_calls=[tool_call("update_memory_tool", {"updated_memory": "{}"}, "c3")]),
+        AIMessage(content="", tool_calls=[tool_call("get_memory_tool", {}, "c4")]),
+        AIMessage(content="Done."),
+    ])
+
+    app = build_agent(llm, tools)
+    result = app.invoke({"messages": [HumanMessage(content="remember me")]})
+
+    assert counts["memory"] == 2
+    assert result["messages"][-2].content == "memory v2"
+
+
+def test_cache_does_not_span_runs() -> None:
+    counts, tools = _build_counting_tools()
+    llm = ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "x"}, "c2")]),
+        AIMessage(content="Again."),
+    ])
+    history = [
+        HumanMessage(content="first"),
+        AIMessage(content="", tool_calls=[tool_call("query_kb_tool", {"query": "x"}, "c1")]),
+        ToolMessage(content="KB result for x", name="query_kb_tool", tool_call_id="c1"),
+        AIMessage(content="Found it."),
+        HumanMessage(content="second"),
+    ]
+
+    build_agent(llm, tools).invoke({"messages": history})
+
+    assert counts["kb"] == 1
@@ -0,0 +1,83 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.tools import tool
+
+import core.usage as usage_module
+from agent import build_agent
+from core.config import TokenPrice, UsageConfig
+from core.usage import UsageLedger, configure_usage, get_usage_ledger, reconcile
+from fakes import ScriptedChatModel, tool_call
+
+
+def test_reconcile_matches_the_reported_total() -> None:
+    scaled = reconcile({"system_prompt": 30, "history": 7, "tool:query_kb_tool": 63}, 211)
+
+    assert sum(scaled.values()) == 211
+    assert scaled["tool:query_kb_tool"] > scaled["system_prompt"] > scaled["history"]
+    assert reconcile({"history": 5}, 0) == {"history": 5}
+
+
+def test_agent_calls_are_attributed_per_source_and_rolled_up(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(usage_module, "_ledger", usage_module._ledger)
+    usage_path = tmp_path / "usage.jsonl"
+    config = UsageConfig(
+        enabled=True,
+        usage_path=usage_path,
+        encoding="",
+        prices={"openai/gpt-test": TokenPrice(prompt_per_mtok=1000, completion_per_mtok=4000)},
+    )
+    configure_usage(config, providers={"strong": "openai"})
+
+    @tool
+    def query_kb_tool(query: str) -> str:
+        """Searches the knowledge base."""
+        return "The VPN profile is called corp-vpn. " * 50
+
+    metadata = {"model_name": "gpt-test"}
+    llm = ScriptedChatModel(responses=[
+        AIMessage(
+            content="",
+            tool_calls=[tool_call("query_kb_tool", {"query": "vpn"}, "c1")],
+            usage_metadata={"input_tokens": 400, "output_tokens": 10, "total_tokens": 410},
+            response_metadata=metadata,
+        ),
+        AIMessage(
+            content="Use corp-vpn.",
+            usage_metadata={"input_tokens": 900, "output_tokens": 5, "total_tokens": 905},
+            response_metadata=metadata,
+        ),
+    ])
+
+    build_agent(llm, [query_kb_tool]).invoke(
+        {"messages": [HumanMessage(content="Which VPN?")]},
+        config={"configurable": {"session_id": "s1"}},
+    )
+
+    totals = get_usage_ledger().session_totals("s1")
+    assert totals["calls"] == 2
+    assert totals["prompt_tokens"] == 1300
+    assert totals["completion_tokens"] == 15
+    assert totals["cost"] == (1300 * 1000 + 15 * 4000) / 1_000_000
+    # The tool result only exists in the second prompt, where it dominates
+    assert {"system_prompt", "tool_schemas", "history", "tool:query_kb_tool"} <= set(totals["sources"])
+    assert totals["sources"]["tool:query_kb_tool"] > totals["sources"]["history"]
+
+    # Rollups are rebuilt from the usage file
+    reloaded = UsageLedger(config).summary()
+    assert reloaded["sessions"]["s1"] == totals
+    assert sum(day["calls"] for day in reloaded["days"].values()) == 2
+
+
+def test_a_truncated_last_line_is_skipped_on_replay(tmp_path) -> None:
+    usage_path = tmp_path / "usage.jsonl"
+    config = UsageConfig(enabled=True, usage_path=usage_path, encoding="")
+    response = AIMessage(content="ok", usage_metadata={"input_tokens": 10, "output_tokens": 2, "total_tokens": 12})
+    UsageLedger(config).record([HumanMessage(content="hi")], response, session="s1")
+    with open(usage_path, "a", encoding="utf-8") as f:
+        f.write('{"session": "s1", "prompt_tok')
+
+    ledger = UsageLedger(config)
+    assert ledger.session_totals("s1")["calls"] == 1
+
+    # The next record starts on a line of its own
+    ledger.record([HumanMessage(content="hi")], response, session="s1")
+    assert UsageLedger(config).session_totals("s1")["calls"] == 2
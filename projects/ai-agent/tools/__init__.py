@@ -1,8 +1,13 @@
 
 from typing import Callable
+from langchain_core.embeddings import Embeddings
 from langchain_core.tools import BaseTool, tool
 from langchain_core.vectorstores import VectorStoreRetriever
 
+from core.config import CalculatorConfig, MemoryNamespacesConfig, MemoryRecallConfig
+from core.sandbox import ExpressionSandbox, SandboxError, evaluate_expression
+from core.vectordb import KBQueryCache
+
 from tools.utils import get_today_date, get_current_time
 from tools.kb import get_kb_tools
 from tools.memory import get_memory_tools
@@ -24,45 +29,69 @@ def calculate(expression: str) -> str:
     """
 
     try:
-        import numexpr
-        result = numexpr.evaluate(expression)
-
-        # Handle NumPy scalars and arrays without forcing through float(),
-        # to avoid precision loss and errors on non-scalar results.
-        if hasattr(result, "shape"):
-            # NumPy 0-d scalar: extract the underlying Python scalar
-            if result.shape == ():
-                try:
-                    return str(result.item())
-                except Exception:
-                    return str(result)
-            # NumPy array: return its string representation directly
-            return str(result)
-
-        # Fallback for plain Python scalars or other types
-        return str(result)
+        return evaluate_expression(expression)
     except Exception as e:
         return f"Error evaluating '{expression}': {e}"
 
 
+def get_math_tools(config: CalculatorConfig | None = None) -> list[BaseTool]:
+    """
+    Returns the calculate tool for the configured evaluation mode.
+
+    In 'sandbox' mode expressions run in a pool of resource-capped worker processes
+    (see core.sandbox); 'inprocess' evaluates them in the agent process, without limits.
+
+    Args:
+      config (CalculatorConfig | None): Calculator settings.
+
+    Returns:
+      list[BaseTool]: A single-item list with the calculate tool.
+    """
+
+    config = config or CalculatorConfig()
+    if config.mode == "inprocess":
+        return [calculate]
+
+    sandbox = ExpressionSandbox(config)
+
+    @tool("calculate", description=calculate.description)
+    def sandboxed_calculate(expression: str) -> str:
+        try:
+            return sandbox.evaluate(expression)
+        except SandboxError as e:
+            return f"Error evaluating '{expression}': {e}"
+
+    return [sandboxed_calculate]
+
+
 def load_all_tools(
     vdb_builder: Callable[[], VectorStoreRetriever],
     memory_path: str,
+    embeddings: Embeddings | None = None,
+    memory_recall: MemoryRecallConfig | None = None,
+    memory_namespaces: MemoryNamespacesConfig | None = None,
+    calculator: CalculatorConfig | None = None,
+    kb_query_cache: KBQueryCache | None = None,
 ) -> list[BaseTool]:
     """
     Loads and returns the full list of tools available to the agent.
 
     Args:
       vdb_builder: A callable returning a VectorStoreRetriever (lazy init closure).
-      memory_path (str): Path to the persistent memory JSON file.
+      memory_path (str): Path to the persistent memory store (see core.memorystore).
+      embeddings (Embeddings | None): Embedding model enabling semantic memory recall.
+      memory_recall (MemoryRecallConfig | None): Memory recall settings.
+      memory_namespaces (MemoryNamespacesConfig | None): Per-user memory settings.
+      calculator (CalculatorConfig | None): How calculate evaluates expressions.
+      kb_query_cache (KBQueryCache | None): KB results cache shared across turns.
 
     Returns:
       list[BaseTool]: A flat list of initialised tool instances.
     """
 
     datetime_tools = [get_today_date, get_current_time]
-    math_tools = [calculate]
-    kb_and_memory_tools = get_kb_tools(vdb_builder) + get_memory_tools(memory_path)
+    math_tools = get_math_tools(calculator)
+    kb_and_memory_tools = get_kb_tools(vdb_builder, kb_query_cache) + get_memory_tools(memory_path, embeddings, memory_recall, memory_namespaces)
 
     return datetime_tools + math_tools + kb_and_memory_tools
 
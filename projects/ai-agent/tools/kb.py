@@ -3,8 +3,14 @@ from typing import Callable
 from langchain_core.vectorstores import VectorStoreRetriever
 from langchain_core.tools import tool, BaseTool
 
+from core.telemetry import COUNT_BUCKETS, get_telemetry
+from core.vectordb import KBQueryCache
 
-def get_kb_tools(vdb_builder: Callable[[], VectorStoreRetriever] | None) -> list[BaseTool]:
+
+def get_kb_tools(
+    vdb_builder: Callable[[], VectorStoreRetriever] | None,
+    query_cache: KBQueryCache | None = None,
+) -> list[BaseTool]:
     """
     Creates tools for querying the internal knowledge base.
 
@@ -15,6 +21,8 @@ def get_kb_tools(vdb_builder: Callable[[], VectorStoreRetriever] | None) -> list
     Args:
       vdb_builder: A callable that returns a VectorStoreRetriever when invoked.
                    Pass None to disable KB tools entirely.
+      query_cache (KBQueryCache | None): Results cache shared across turns; the docs
+                   watcher clears it whenever files are re-indexed.
 
     Returns:
       list[BaseTool]: A list containing query_kb_tool, or an empty list if
@@ -45,11 +53,21 @@ def get_kb_tools(vdb_builder: Callable[[], VectorStoreRetriever] | None) -> list
           str: The search results from the internal KB.
         """
 
+        telemetry = get_telemetry()
+        if query_cache is not None:
+            cached = query_cache.get(query)
+            telemetry.inc("kb_query_cache_total", result="hit" if cached is not None else "miss")
+            if cached is not None:
+                return cached
+
         retriever = _get_retriever()
 
         print(f"🔍 Searching internal KB for: {query}")
 
-        docs = retriever.invoke(query)
+        with telemetry.span("kb.retrieve", query_chars=len(query)) as span:
+            docs = retriever.invoke(query)
+            span["chunks"] = len(docs)
+        telemetry.observe("kb_retrieved_chunks", len(docs), buckets=COUNT_BUCKETS)
 
         if not docs:
             return "I found no relevant documentation in the internal KB (vector db)."
@@ -58,6 +76,9 @@ def get_kb_tools(vdb_builder: Callable[[], VectorStoreRetriever] | None) -> list
         for i, doc in enumerate(docs):
             results.append(f"Document {i + 1}:\n{doc.page_content}")
 
-        return "\n\n".join(results)
+        answer = "\n\n".join(results)
+        if query_cache is not None:
+            query_cache.put(query, answer)
+        return answer
 
     return [query_kb_tool]
@@ -1,9 +1,17 @@
 import json
-from pathlib import Path
-from typing import Any, Dict, List
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List
 
 from pydantic import BaseModel, Field
 from langchain.tools import BaseTool, tool
+from langchain_core.runnables import RunnableConfig
+
+from core.config import MemoryNamespacesConfig, MemoryRecallConfig
+from core.memoryindex import MemoryIndex
+from core.memorystore import MemoryNamespace, MemoryNamespaces, MemoryStore
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
 
 
 class AgentMemory(BaseModel):
@@ -14,67 +22,165 @@ class AgentMemory(BaseModel):
 
 def save_agent_memory(memory: AgentMemory, file_path: str) -> None:
     """
-    Save the AgentMemory object to a JSON file.
+    Save the AgentMemory object to the memory store (only the given keys are written).
 
     Args:
       memory (AgentMemory): The AgentMemory object to save.
-      file_path (str): Path to the JSON file where the memory is stored.
+      file_path (str): Configured memory path (see `core.memorystore.memory_db_path`).
 
     """
 
-    path = Path(file_path)
-    path.write_text(memory.model_dump_json(indent=4), encoding="utf-8")
+    store = MemoryStore.open(file_path)
+    try:
+        store.upsert(memory.user_info)
+    finally:
+        store.close()
 
 
 def load_agent_memory(file_path: str) -> AgentMemory:
     """
-    Read the AgentMemory object from a JSON file. If the file does not exist, return an empty memory.
+    Read the AgentMemory object from the memory store. If nothing is stored, return an empty memory.
 
     Args:
-      file_path (str): Path to the JSON file where the memory is stored.
+      file_path (str): Configured memory path (see `core.memorystore.memory_db_path`).
 
     Returns:
         AgentMemory: The loaded agent memory object.
     """
 
-    path = Path(file_path)
+    store = MemoryStore.open(file_path)
+    try:
+        return AgentMemory(user_info=store.get_all())
+    finally:
+        store.close()
 
-    if not path.exists():
-        return AgentMemory()
 
-    data = json.loads(path.read_text(encoding="utf-8"))
-    return AgentMemory(**data)
+def normalize_memory_update(updated_memory: Any) -> dict[str, Any] | str:
+    """
+    Turns whatever the model passed to `update_memory_tool` into the user_info keys to upsert.
+
+    Accepts an AgentMemory, a dict (either {"user_info": {...}} or top-level keys) or a
+    JSON string representing one of those. Top-level keys other than "user_info" are
+    treated as user_info entries (useful if the agent sends {"favorite_color": "blue"}).
 
+    Args:
+      updated_memory (Any): The raw tool argument.
+
+    Returns:
+      dict[str, Any] | str: The entries to upsert, or an error message for the model.
+    """
 
-def get_memory_tools(file_path: str) -> List[BaseTool]:
+    if isinstance(updated_memory, AgentMemory):
+        incoming = updated_memory.model_dump()
+    elif isinstance(updated_memory, str):
+        try:
+            incoming = json.loads(updated_memory)
+        except json.JSONDecodeError:
+            return "Error: provided string is not valid JSON."
+    elif isinstance(updated_memory, dict):
+        incoming = updated_memory
+    else:
+        try:
+            incoming = json.loads(json.dumps(updated_memory))
+        except Exception:
+            return f"Unsupported memory input type: {type(updated_memory)}"
+
+    if not isinstance(incoming, dict):
+        return f"Unsupported memory input type: {type(incoming)}"
+
+    entries: dict[str, Any] = {}
+    if isinstance(incoming.get("user_info"), dict):
+        entries.update(incoming["user_info"])
+    entries.update({k: v for k, v in incoming.items() if k != "user_info"})
+    return entries
+
+
+def get_memory_tools(
+    file_path: str,
+    embeddings: "Embeddings | None" = None,
+    recall: MemoryRecallConfig | None = None,
+    namespaces: MemoryNamespacesConfig | None = None,
+) -> List[BaseTool]:
     """
-    It returns the tools to get and update the bot memory stored in a JSON file.
+    It returns the tools to get and update the bot memory.
+
+    The memory lives in SQLite stores (see `core.memorystore`): updates are per-key
+    upserts, and reads come from a cache that is only refreshed after a write. A legacy
+    JSON memory file is imported on first use.
+
+    Memory is scoped by the user id found in the run's `configurable` (key
+    `namespaces.user_id_key`, e.g. `app.invoke(..., config={"configurable": {"user_id": "42"}})`).
+    Each user gets their own database file, opened on first use and closed again when
+    idle; runs without a user id share the memory at `file_path`.
+
+    When `embeddings` are given and recall is enabled, `get_memory_tool` (which returns
+    the whole memory) is replaced by `recall_memory_tool`, which returns only the top-k
+    entries relevant to a query (see `core.memoryindex`).
 
     Args:
-        file_path (str): Path to the JSON file where the memory is stored.
+        file_path (str): Configured memory path (a legacy .json path is mapped to .sqlite3).
+        embeddings (Embeddings | None): Embedding model for semantic recall.
+        recall (MemoryRecallConfig | None): Recall settings (defaults apply if None).
+        namespaces (MemoryNamespacesConfig | None): Per-user namespace settings (defaults apply if None).
     Returns:
-        List[BaseTool]: A list containing the get_memory and update_memory tools.
+        List[BaseTool]: The memory read tool (get or recall) and update_memory_tool.
     """
 
+    recall = recall or MemoryRecallConfig()
+    namespaces = namespaces or MemoryNamespacesConfig()
+    use_recall = embeddings is not None and recall.enabled
+
+    # Closure-scoped state: namespaces are opened on first use, so building the tools stays cheap
+    registry = MemoryNamespaces(file_path, namespaces)
+    index_lock = threading.Lock()
+
+    def _user_id(config: RunnableConfig) -> str | None:
+        user_id = (config or {}).get("configurable", {}).get(namespaces.user_id_key)
+        return str(user_id) if user_id is not None else None
+
+    def _index(namespace: MemoryNamespace) -> MemoryIndex:
+        with index_lock:
+            if namespace.index is None:
+                namespace.index = MemoryIndex(namespace.store, embeddings, recall)
+            return namespace.index
+
     @tool
-    def get_memory_tool() -> AgentMemory | str:
+    def get_memory_tool(config: RunnableConfig) -> AgentMemory | str:
         """
-        Retrieves the bot's memory from a JSON file.
+        Retrieves the bot's persistent memory about the user.
 
         Returns:
             AgentMemory: The loaded agent memory object if successful.
             str: An error message if reading the memory fails.
+        """
+        try:
+            with registry.acquire(_user_id(config)) as namespace:
+                return AgentMemory(user_info=namespace.store.get_all())
+        except Exception as e:
+            return f"Error reading memory: {str(e)}"
 
-        Raises:
-            Exception: If there is an issue loading the memory from the file.       
-            """
+    @tool
+    def recall_memory_tool(query: str, config: RunnableConfig) -> str:
+        """
+        Recalls what the bot remembers about the user that is relevant to a query.
+
+        Args:
+          query (str): What to look up, e.g. "user's name" or "favourite programming language".
+
+        Returns:
+          str: The most relevant remembered facts as JSON, or a note that nothing relevant is stored.
+        """
         try:
-            return load_agent_memory(file_path)
+            with registry.acquire(_user_id(config)) as namespace:
+                results = _index(namespace).recall(query)
         except Exception as e:
             return f"Error reading memory: {str(e)}"
+        if not results:
+            return "Nothing relevant is stored in memory."
+        return json.dumps({key: value for key, value, _ in results}, ensure_ascii=False)
 
     @tool
-    def update_memory_tool(updated_memory: Any) -> str:
+    def update_memory_tool(updated_memory: Any, config: RunnableConfig) -> str:
         """
         Update the existing memory by merging new values.
 
@@ -88,43 +194,24 @@ def get_memory_tools(file_path: str) -> List[BaseTool]:
          - updates user_name if provided
          - treats any top-level unknown keys as user_info entries
         """
+        entries = normalize_memory_update(updated_memory)
+        if isinstance(entries, str):
+            return entries
+
         try:
-            memory = load_agent_memory(file_path)
-
-            # TODO - This stuff needs to be rewritten, but it works for now, so I'm keeping it.
-
-            # Normalize the incoming memory into a dict
-            if isinstance(updated_memory, AgentMemory):
-                incoming = updated_memory.model_dump()
-            elif isinstance(updated_memory, str):
-                try:
-                    incoming = json.loads(updated_memory)
-                except json.JSONDecodeError:
-                    return "Error: provided string is not valid JSON."
-            elif isinstance(updated_memory, dict):
-                incoming = updated_memory
-            else:
-                # Try to coerce (fallback)
-                try:
-                    incoming = json.loads(json.dumps(updated_memory))
-                except Exception:
-                    return f"Unsupported memory input type: {type(updated_memory)}"
-
-            # If user_info provided and is dict -> merge
-            if "user_info" in incoming and isinstance(incoming["user_info"], dict):
-                memory.user_info.update(incoming["user_info"])
-
-            # Merge any other top-level keys into user_info (useful if agent sends {"favorite_color":"blue"})
-            extra_top_level = {
-                k: v for k, v in incoming.items() if k not in ("user_info")
-            }
-            if extra_top_level:
-                memory.user_info.update(extra_top_level)
-
-            # Persist merged memory
-            save_agent_memory(memory, file_path)
-            return "Memory updated successfully."
+            with registry.acquire(_user_id(config)) as namespace:
+                # Only the provided keys are written, so concurrent updates of other keys are kept
+                namespace.store.upsert(entries)
+
+                if use_recall:
+                    # Embed just the written entries now, so the next recall does not pay for it
+                    try:
+                        _index(namespace).sync()
+                    except Exception as e:
+                        print(f"⚠️ Memory index update failed (will retry on next recall): {e}")
         except Exception as e:
             return f"Error updating memory: {str(e)}"
+        return "Memory updated successfully."
 
-    return [get_memory_tool, update_memory_tool]
+    read_tool = recall_memory_tool if use_recall else get_memory_tool
+    return [read_tool, update_memory_tool]
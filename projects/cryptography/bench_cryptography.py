@@ -0,0 +1,345 @@
+"""
+Throughput benchmarks for the primitives covered by test_cryptography.py.
+
+Measures, for RSA-2048/3072/4096, ECDSA P-256 and Ed25519:
+  - key generation (keys/sec)
+  - signing and verification (ops/sec; RSA-PSS, ECDSA and Ed25519 over SHA-256)
+  - encryption and decryption (ops/sec; RSA-OAEP only, the curves do not encrypt)
+plus SHA-256 throughput (MB/s) by payload size, hybrid envelope encryption throughput
+(MB/s, see envelope.py) by chunk size next to RSA-OAEP alone, and how signing and hashing
+scale when the same work runs in 1..N processes (aggregate ops/sec, speedup, efficiency).
+
+Every measurement repeats the operation until at least --min-time seconds have passed
+(and at least once), after one untimed warm-up call. Results are printed as tables and
+can be written as JSON for comparisons across machines and library versions.
+
+Dependencies:
+  pip install cryptography
+
+Run benchmarks:
+    python bench_cryptography.py                       # everything, ~1 minute
+    python bench_cryptography.py --quick               # shorter runs, fewer sizes
+    python bench_cryptography.py --only sign hash --json results.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+import cryptography
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, x25519
+
+import envelope
+from test_cryptography import generate_rsa_key_pair, sha256_checksum
+
+ALGORITHMS = ("rsa-2048", "rsa-3072", "rsa-4096", "ecdsa-p256", "ed25519")
+SECTIONS = ("keygen", "sign", "encrypt", "hash", "envelope", "scaling")
+HASH_SIZES = (64, 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+ENVELOPE_CHUNK_SIZES = (64 * 1024, 1024 * 1024, 4 * 1024 * 1024)
+ENVELOPE_PAYLOAD = 32 * 1024 * 1024
+SCALING_WORKLOADS = ("rsa-2048-sign", "ed25519-sign", "sha256-1MiB")
+MESSAGE = b"Bob approves this document"
+
+OAEP = padding.OAEP(
+    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None,
+)
+PSS = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH,
+)
+
+
+# ---------------------------------------------------------------------------
+# Operations
+# ---------------------------------------------------------------------------
+
+def generate_key(algorithm: str):
+    if algorithm.startswith("rsa-"):
+        private_key, _ = generate_rsa_key_pair(int(algorithm.split("-")[1]))
+        return private_key
+    if algorithm == "ecdsa-p256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if algorithm == "ed25519":
+        return ed25519.Ed25519PrivateKey.generate()
+    raise ValueError(f"unknown algorithm: {algorithm}")
+
+
+def sign_operations(algorithm: str, private_key) -> tuple[Callable[[], bytes], Callable[[bytes], None]]:
+    """Returns (sign, verify) closures over MESSAGE for one key."""
+    public_key = private_key.public_key()
+    if algorithm.startswith("rsa-"):
+        return (lambda: private_key.sign(MESSAGE, PSS, hashes.SHA256()),
+                lambda signature: public_key.verify(signature, MESSAGE, PSS, hashes.SHA256()))
+    if algorithm == "ecdsa-p256":
+        scheme = ec.ECDSA(hashes.SHA256())
+        return (lambda: private_key.sign(MESSAGE, scheme),
+                lambda signature: public_key.verify(signature, MESSAGE, scheme))
+    return (lambda: private_key.sign(MESSAGE),
+            lambda signature: public_key.verify(signature, MESSAGE))
+
+
+def scaling_operation(workload: str) -> Callable[[], object]:
+    if workload == "rsa-2048-sign":
+        sign, _ = sign_operations("rsa-2048", generate_key("rsa-2048"))
+        return sign
+    if workload == "ed25519-sign":
+        sign, _ = sign_operations("ed25519", generate_key("ed25519"))
+        return sign
+    if workload == "sha256-1MiB":
+        payload = os.urandom(1024 * 1024)
+        return lambda: sha256_checksum(payload)
+    raise ValueError(f"unknown workload: {workload}")
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def measure(operation: Callable[[], object], min_time: float) -> dict:
+    """Runs `operation` repeatedly for at least `min_time` seconds (after a warm-up call)."""
+    operation()
+    count = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time or count == 0:
+        operation()
+        count += 1
+        elapsed = time.perf_counter() - started
+    return {"ops": count, "seconds": elapsed, "ops_per_sec": count / elapsed}
+
+
+def bench_keygen(algorithms: tuple[str, ...], min_time: float) -> list[dict]:
+    return [
+        {"algorithm": algorithm, "operation": "keygen", **measure(lambda: generate_key(algorithm), min_time)}
+        for algorithm in algorithms
+    ]
+
+
+def bench_sign(algorithms: tuple[str, ...], min_time: float) -> list[dict]:
+    results = []
+    for algorithm in algorithms:
+        sign, verify = sign_operations(algorithm, generate_key(algorithm))
+        signature = sign()
+        results.append({"algorithm": algorithm, "operation": "sign", **measure(sign, min_time)})
+        results.append({"algorithm": algorithm, "operation": "verify",
+                        **measure(lambda: verify(signature), min_time)})
+    return results
+
+
+def bench_encrypt(algorithms: tuple[str, ...], min_time: float) -> list[dict]:
+    results = []
+    for algorithm in algorithms:
+        if not algorithm.startswith("rsa-"):
+            continue
+        private_key = generate_key(algorithm)
+        public_key = private_key.public_key()
+        ciphertext = public_key.encrypt(MESSAGE, OAEP)
+        results.append({"algorithm": algorithm, "operation": "encrypt",
+                        **measure(lambda: public_key.encrypt(MESSAGE, OAEP), min_time)})
+        results.append({"algorithm": algorithm, "operation": "decrypt",
+                        **measure(lambda: private_key.decrypt(ciphertext, OAEP), min_time)})
+    return results
+
+
+def bench_hash(sizes: tuple[int, ...], min_time: float) -> list[dict]:
+    results = []
+    for size in sizes:
+        payload = os.urandom(size)
+        result = measure(lambda: sha256_checksum(payload), min_time)
+        result["mb_per_sec"] = result["ops_per_sec"] * size / 1_000_000
+        results.append({"algorithm": "sha256", "operation": "hash", "payload_bytes": size, **result})
+    return results
+
+
+class _Sink:
+    """Write-only stream discarding its input, so only the cipher is measured."""
+
+    def write(self, data: bytes) -> int:
+        return len(data)
+
+
+def bench_envelope(chunk_sizes: tuple[int, ...], payload_size: int, min_time: float) -> list[dict]:
+    """Hybrid encryption throughput per recipient type and chunk size, next to RSA-OAEP alone."""
+    payload = os.urandom(payload_size)
+    recipients = {"rsa-2048": generate_key("rsa-2048"), "x25519": x25519.X25519PrivateKey.generate()}
+    results = []
+    for name, private_key in recipients.items():
+        for chunk_size in chunk_sizes:
+            sealed = envelope.encrypt(payload, private_key.public_key(), chunk_size)
+            for operation, run in (
+                ("encrypt", lambda: envelope.encrypt_stream(io.BytesIO(payload), _Sink(),
+                                                            private_key.public_key(), chunk_size)),
+                ("decrypt", lambda: envelope.decrypt_stream(io.BytesIO(sealed), _Sink(), private_key)),
+            ):
+                result = measure(run, min_time)
+                result["mb_per_sec"] = result["ops_per_sec"] * payload_size / 1_000_000
+                results.append({"algorithm": f"{name}+aes-256-gcm", "operation": operation,
+                                "chunk_bytes": chunk_size, "payload_bytes": payload_size, **result})
+
+    # The alternative: RSA-OAEP on its own, 190 bytes of plaintext per operation
+    private_key = recipients["rsa-2048"]
+    block = payload[:190]
+    ciphertext = private_key.public_key().encrypt(block, OAEP)
+    for operation, run in (("encrypt", lambda: private_key.public_key().encrypt(block, OAEP)),
+                           ("decrypt", lambda: private_key.decrypt(ciphertext, OAEP))):
+        result = measure(run, min_time)
+        result["mb_per_sec"] = result["ops_per_sec"] * len(block) / 1_000_000
+        results.append({"algorithm": "rsa-2048-oaep", "operation": operation,
+                        "chunk_bytes": len(block), "payload_bytes": len(block), **result})
+    return results
+
+
+def _scaling_worker(workload: str, min_time: float) -> dict:
+    # Keys and payloads are built inside the worker: only the counts cross processes
+    return measure(scaling_operation(workload), min_time)
+
+
+def bench_scaling(workloads: tuple[str, ...], processes: list[int], min_time: float) -> list[dict]:
+    """Runs the same workload in N processes at once and reports the aggregate rate."""
+    results = []
+    for workload in workloads:
+        baseline = None
+        for count in processes:
+            with ProcessPoolExecutor(max_workers=count) as pool:
+                runs = list(pool.map(_scaling_worker, [workload] * count, [min_time] * count))
+            # Each process times its own loop; they ran concurrently
+            aggregate = sum(run["ops_per_sec"] for run in runs)
+            baseline = baseline or aggregate / count
+            results.append({
+                "workload": workload,
+                "processes": count,
+                "ops_per_sec": aggregate,
+                "speedup": aggregate / baseline,
+                "efficiency": aggregate / baseline / count,
+            })
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            return f"{size:g} {unit}"
+        size /= 1024
+
+
+def print_table(title: str, headers: list[str], rows: list[list[str]]):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(headers, *rows)]
+    print(f"\n{title}")
+    print("  ".join(header.rjust(width) if i else header.ljust(width)
+                    for i, (header, width) in enumerate(zip(headers, widths))))
+    print("  ".join("-" * width for width in widths))
+    for row in rows:
+        print("  ".join(str(cell).rjust(width) if i else str(cell).ljust(width)
+                        for i, (cell, width) in enumerate(zip(row, widths))))
+
+
+def print_results(results: dict):
+    for section in ("keygen", "sign", "encrypt"):
+        if results.get(section):
+            print_table(section, ["algorithm", "operation", "ops/sec", "ms/op"], [
+                [r["algorithm"], r["operation"], f"{r['ops_per_sec']:,.1f}", f"{1000 / r['ops_per_sec']:.3f}"]
+                for r in results[section]
+            ])
+    if results.get("hash"):
+        print_table("hash", ["payload", "ops/sec", "MB/s"], [
+            [format_size(r["payload_bytes"]), f"{r['ops_per_sec']:,.1f}", f"{r['mb_per_sec']:,.1f}"]
+            for r in results["hash"]
+        ])
+    if results.get("envelope"):
+        print_table("envelope", ["algorithm", "operation", "chunk", "MB/s"], [
+            [r["algorithm"], r["operation"], format_size(r["chunk_bytes"]), f"{r['mb_per_sec']:,.1f}"]
+            for r in results["envelope"]
+        ])
+    if results.get("scaling"):
+        print_table("scaling", ["workload", "processes", "ops/sec", "speedup", "efficiency"], [
+            [r["workload"], r["processes"], f"{r['ops_per_sec']:,.1f}", f"{r['speedup']:.2f}x",
+             f"{100 * r['efficiency']:.0f}%"]
+            for r in results["scaling"]
+        ])
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "cryptography": cryptography.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def default_processes() -> list[int]:
+    cpus = os.cpu_count() or 1
+    counts, count = [], 1
+    while count < cpus:
+        counts.append(count)
+        count *= 2
+    return counts + [cpus]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the primitives of test_cryptography.py")
+    parser.add_argument("--only", nargs="+", choices=SECTIONS, default=list(SECTIONS),
+                        help="Sections to run (default: all)")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=list(ALGORITHMS),
+                        help="Key algorithms to benchmark (default: all)")
+    parser.add_argument("--min-time", type=float, default=1.0, metavar="SECONDS",
+                        help="Minimum duration of each measurement (default: 1.0)")
+    parser.add_argument("--processes", type=int, nargs="+", default=None, metavar="N",
+                        help="Process counts for the scaling section (default: 1, 2, 4, ... CPU count)")
+    parser.add_argument("--quick", action="store_true",
+                        help="Short measurements, no RSA-4096, smaller hash and envelope payloads")
+    parser.add_argument("--json", metavar="PATH", help="Write the results as JSON to PATH ('-' for stdout)")
+    args = parser.parse_args()
+
+    min_time = min(args.min_time, 0.2) if args.quick else args.min_time
+    algorithms = tuple(a for a in args.algorithms if not (args.quick and a == "rsa-4096"))
+    sizes = HASH_SIZES[:-1] if args.quick else HASH_SIZES
+
+    results: dict = {"environment": environment(), "min_time": min_time}
+    started = time.perf_counter()
+    if "keygen" in args.only:
+        results["keygen"] = bench_keygen(algorithms, min_time)
+    if "sign" in args.only:
+        results["sign"] = bench_sign(algorithms, min_time)
+    if "encrypt" in args.only:
+        results["encrypt"] = bench_encrypt(algorithms, min_time)
+    if "hash" in args.only:
+        results["hash"] = bench_hash(sizes, min_time)
+    if "envelope" in args.only:
+        payload_size = ENVELOPE_PAYLOAD // 4 if args.quick else ENVELOPE_PAYLOAD
+        results["envelope"] = bench_envelope(ENVELOPE_CHUNK_SIZES, payload_size, min_time)
+    if "scaling" in args.only:
+        results["scaling"] = bench_scaling(SCALING_WORKLOADS, args.processes or default_processes(), min_time)
+
+    env = results["environment"]
+    if args.json != "-":
+        print(f"Python {env['python']}, cryptography {env['cryptography']}, "
+              f"{env['cpu_count']} CPUs ({env['machine']})")
+        print_results(results)
+        print(f"\nCompleted in {time.perf_counter() - started:.1f}s")
+    if args.json == "-":
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
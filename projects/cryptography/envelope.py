@@ -0,0 +1,283 @@
+"""
+Hybrid (envelope) encryption of payloads of any size.
+
+RSA-OAEP can only encrypt a few hundred bytes per operation and is orders of magnitude
+slower than a symmetric cipher. Envelope encryption uses each primitive for what it is
+good at:
+
+  - a random AES-256 key (the data key) is generated for every payload;
+  - the data key is wrapped for the recipient: with RSA-OAEP (SHA-256) for an RSA public
+    key, or with X25519 + HKDF-SHA256 + AES-GCM for an X25519 public key;
+  - the payload is encrypted with AES-256-GCM in fixed-size chunks, read and written as
+    a stream, so memory use is bounded by the chunk size whatever the payload size.
+
+Each chunk is authenticated on its own (STREAM construction, as in age and Tink): its
+nonce is the chunk counter plus a flag marking the final chunk, and the header is the
+associated data of every chunk. Modifying a byte, reordering or dropping chunks,
+truncating the stream, appending data or editing the header all fail authentication.
+
+Layout:
+    "HENV" | version (1) | scheme (1) | chunk size (4) | key length (2) | wrapped key
+    chunk 0 ciphertext + tag | chunk 1 ... | final chunk (possibly shorter, possibly empty)
+
+Decryption writes each chunk as soon as it is authenticated: a stream cut short or
+tampered with midway raises EnvelopeError after the chunks before it were written. The
+command line writes to a temporary file and only renames it on success.
+
+Usage:
+    python envelope.py encrypt --public-key public.pem backup.tar backup.tar.henv
+    python envelope.py decrypt --key private.pem backup.tar.henv backup.tar
+"""
+
+import argparse
+import io
+import os
+import struct
+import sys
+import tempfile
+from typing import BinaryIO
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa, x25519
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+MAGIC = b"HENV"
+VERSION = 1
+SCHEME_RSA_OAEP = 1
+SCHEME_X25519 = 2
+DEFAULT_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+TAG_SIZE = 16
+HEADER = struct.Struct(">4sBBIH")
+X25519_INFO = b"envelope/v1/x25519"
+
+OAEP = padding.OAEP(
+    mgf=padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None,
+)
+
+
+class EnvelopeError(Exception):
+    """The envelope is malformed, was tampered with, or is not for this key."""
+
+
+# ---------------------------------------------------------------------------
+# Data key wrapping
+# ---------------------------------------------------------------------------
+
+def _x25519_wrap_key(shared: bytes, ephemeral: bytes, recipient: bytes) -> bytes:
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=ephemeral + recipient,
+                info=X25519_INFO).derive(shared)
+
+
+def _raw(public_key: x25519.X25519PublicKey) -> bytes:
+    return public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+
+def wrap_data_key(data_key: bytes, public_key) -> tuple[int, bytes]:
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return SCHEME_RSA_OAEP, public_key.encrypt(data_key, OAEP)
+    if isinstance(public_key, x25519.X25519PublicKey):
+        ephemeral = x25519.X25519PrivateKey.generate()
+        ephemeral_public = _raw(ephemeral.public_key())
+        wrap_key = _x25519_wrap_key(ephemeral.exchange(public_key), ephemeral_public, _raw(public_key))
+        # The wrap key is single-use (fresh ephemeral key), so a fixed nonce is safe
+        return SCHEME_X25519, ephemeral_public + AESGCM(wrap_key).encrypt(bytes(12), data_key, None)
+    raise TypeError(f"unsupported recipient key type: {type(public_key).__name__}")
+
+
+def unwrap_data_key(scheme: int, wrapped: bytes, private_key) -> bytes:
+    try:
+        if scheme == SCHEME_RSA_OAEP and isinstance(private_key, rsa.RSAPrivateKey):
+            return private_key.decrypt(wrapped, OAEP)
+        if scheme == SCHEME_X25519 and isinstance(private_key, x25519.X25519PrivateKey):
+            ephemeral_public, sealed = wrapped[:32], wrapped[32:]
+            shared = private_key.exchange(x25519.X25519PublicKey.from_public_bytes(ephemeral_public))
+            wrap_key = _x25519_wrap_key(shared, ephemeral_public, _raw(private_key.public_key()))
+            return AESGCM(wrap_key).decrypt(bytes(12), sealed, None)
+    except (ValueError, InvalidTag):
+        raise EnvelopeError("the data key cannot be unwrapped with this key")
+    raise EnvelopeError(f"envelope scheme {scheme} does not match the key type")
+
+
+# ---------------------------------------------------------------------------
+# Streaming encryption
+# ---------------------------------------------------------------------------
+
+def _nonce(counter: int, final: bool) -> bytes:
+    return counter.to_bytes(11, "big") + (b"\x01" if final else b"\x00")
+
+
+def _read_full(stream: BinaryIO, size: int) -> bytes:
+    """Reads exactly `size` bytes unless the stream ends first (pipes return short reads)."""
+    data = stream.read(size)
+    if len(data) in (0, size):
+        return data
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        part = stream.read(remaining)
+        if not part:
+            break
+        parts.append(part)
+        remaining -= len(part)
+    return b"".join(parts)
+
+
+def encrypt_stream(src: BinaryIO, dst: BinaryIO, public_key, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Encrypts `src` into `dst` for the owner of `public_key` (RSA or X25519).
+
+    Memory use is about two chunks, whatever the size of the payload.
+
+    Returns:
+      int: The number of plaintext bytes encrypted.
+    """
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"chunk size must be between 1 and {MAX_CHUNK_SIZE} bytes")
+    data_key = AESGCM.generate_key(bit_length=256)
+    scheme, wrapped = wrap_data_key(data_key, public_key)
+    header = HEADER.pack(MAGIC, VERSION, scheme, chunk_size, len(wrapped)) + wrapped
+    dst.write(header)
+
+    aead = AESGCM(data_key)
+    total = 0
+    counter = 0
+    chunk = _read_full(src, chunk_size)
+    while True:
+        # One chunk of lookahead: the final chunk must be known when it is sealed
+        following = _read_full(src, chunk_size) if len(chunk) == chunk_size else b""
+        final = not following
+        dst.write(aead.encrypt(_nonce(counter, final), chunk, header))
+        total += len(chunk)
+        if final:
+            return total
+        chunk = following
+        counter += 1
+
+
+def read_header(src: BinaryIO) -> tuple[bytes, int, int, bytes]:
+    """Returns (raw header, scheme, chunk size, wrapped key) of an envelope."""
+    fixed = _read_full(src, HEADER.size)
+    if len(fixed) != HEADER.size:
+        raise EnvelopeError("truncated header")
+    magic, version, scheme, chunk_size, key_length = HEADER.unpack(fixed)
+    if magic != MAGIC:
+        raise EnvelopeError("not an envelope (bad magic)")
+    if version != VERSION:
+        raise EnvelopeError(f"unsupported envelope version {version}")
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise EnvelopeError(f"invalid chunk size {chunk_size}")
+    wrapped = _read_full(src, key_length)
+    if len(wrapped) != key_length:
+        raise EnvelopeError("truncated header")
+    return fixed + wrapped, scheme, chunk_size, wrapped
+
+
+def decrypt_stream(src: BinaryIO, dst: BinaryIO, private_key) -> int:
+    """
+    Decrypts an envelope from `src` into `dst` with the recipient's private key.
+
+    Returns:
+      int: The number of plaintext bytes written.
+
+    Raises:
+      EnvelopeError: If the envelope is malformed, not for this key, or any chunk fails
+        authentication (tampered, reordered, truncated or extended stream).
+    """
+    header, scheme, chunk_size, wrapped = read_header(src)
+    aead = AESGCM(unwrap_data_key(scheme, wrapped, private_key))
+
+    sealed_size = chunk_size + TAG_SIZE
+    total = 0
+    counter = 0
+    sealed = _read_full(src, sealed_size)
+    while True:
+        if len(sealed) < TAG_SIZE:
+            raise EnvelopeError(f"chunk {counter} is truncated")
+        following = _read_full(src, sealed_size) if len(sealed) == sealed_size else b""
+        final = not following
+        try:
+            chunk = aead.decrypt(_nonce(counter, final), sealed, header)
+        except InvalidTag:
+            raise EnvelopeError(
+                f"chunk {counter} failed authentication (tampered, reordered or truncated envelope)")
+        dst.write(chunk)
+        total += len(chunk)
+        if final:
+            return total
+        sealed = following
+        counter += 1
+
+
+def encrypt(data: bytes, public_key, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    out = io.BytesIO()
+    encrypt_stream(io.BytesIO(data), out, public_key, chunk_size)
+    return out.getvalue()
+
+
+def decrypt(envelope: bytes, private_key) -> bytes:
+    out = io.BytesIO()
+    decrypt_stream(io.BytesIO(envelope), out, private_key)
+    return out.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def _open_input(path: str) -> BinaryIO:
+    return sys.stdin.buffer if path == "-" else open(path, "rb")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hybrid RSA/X25519 + AES-256-GCM file encryption")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    encrypt_parser = subparsers.add_parser("encrypt", help="Encrypt a file for a public key")
+    encrypt_parser.add_argument("--public-key", required=True, help="Recipient PEM public key (RSA or X25519)")
+    encrypt_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, metavar="BYTES",
+                                help=f"Plaintext bytes per authenticated chunk (default: {DEFAULT_CHUNK_SIZE})")
+
+    decrypt_parser = subparsers.add_parser("decrypt", help="Decrypt a file with a private key")
+    decrypt_parser.add_argument("--key", required=True, help="PEM private key (RSA or X25519)")
+
+    for sub in (encrypt_parser, decrypt_parser):
+        sub.add_argument("input", help="Input file ('-' for stdin)")
+        sub.add_argument("output", help="Output file ('-' for stdout)")
+
+    args = parser.parse_args()
+
+    with open(args.public_key if args.command == "encrypt" else args.key, "rb") as f:
+        pem = f.read()
+
+    with _open_input(args.input) as src:
+        if args.output == "-":
+            dst, tmp = sys.stdout.buffer, None
+        else:
+            # Plaintext or ciphertext only appears under its final name once complete
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(args.output)), prefix=".envelope-")
+            dst = os.fdopen(fd, "wb")
+        try:
+            if args.command == "encrypt":
+                size = encrypt_stream(src, dst, serialization.load_pem_public_key(pem), args.chunk_size)
+            else:
+                size = decrypt_stream(src, dst, serialization.load_pem_private_key(pem, password=None))
+        except EnvelopeError as e:
+            if tmp:
+                dst.close()
+                os.unlink(tmp)
+            sys.exit(f"Error: {e}")
+        if tmp:
+            dst.close()
+            os.replace(tmp, args.output)
+
+    verb = "Encrypted" if args.command == "encrypt" else "Decrypted"
+    print(f"{verb}: {args.input} → {args.output} ({size} bytes of plaintext)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+SHA-256 checksums and detached signatures for files of any size.
+
+`sha256_checksum(data)` in test_cryptography.py needs the whole payload in memory. This
+module computes the same digest over files by memory-mapping them (the OS pages the file
+in and out; nothing is copied into Python objects), and adds a Merkle-tree mode for large
+files:
+
+  - the file is split into fixed-size chunks (4 MiB by default);
+  - each chunk is hashed as a leaf, in parallel: hashlib releases the GIL, so threads
+    hashing slices of the same mapping keep every core busy without copying data;
+  - leaves are combined pairwise up to a single root (an unpaired last node is carried
+    up unchanged). Leaves and inner nodes use different prefixes (0x00 / 0x01, as in
+    RFC 6962), so an inner node can never be passed off as a chunk.
+
+The signature covers a small statement (format, file size, chunk size and digest or
+root), signed with Ed25519 or RSA-PSS. The signature file also lists the leaf hashes:
+they are checked against the signed root, after which any single chunk can be verified
+by hashing only that chunk. `merkle_proof` / `verify_proof` check a chunk against
+the root with log2(n) hashes when the leaf list is not available.
+
+Usage:
+    python file_checksum.py hash image.iso [--merkle]
+    python file_checksum.py sign image.iso --key private.pem [--merkle] [-o image.iso.sig.json]
+    python file_checksum.py verify image.iso --public-key public.pem [--chunks 0 17]
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, padding, rsa
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+SHA256_FORMAT = "sha256/v1"
+MERKLE_FORMAT = "merkle-sha256/v1"
+SIGNATURE_SUFFIX = ".sig.json"
+
+PSS = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH,
+)
+
+
+# ---------------------------------------------------------------------------
+# Hashing
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def mapped(path: str | Path):
+    """Read-only memory map of a file (an empty bytes object for empty files)."""
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            yield b""
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            yield mm
+
+
+def sha256_file(path: str | Path) -> str:
+    """Hex SHA-256 of a file; equal to sha256_checksum() of its content."""
+    with mapped(path) as data:
+        return hashlib.sha256(data).hexdigest()
+
+
+def hash_leaf(chunk) -> bytes:
+    digest = hashlib.sha256(LEAF_PREFIX)
+    digest.update(chunk)  # bytes, or a memoryview slice of the mapping (no copy)
+    return digest.digest()
+
+
+def hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def chunk_count(size: int, chunk_size: int) -> int:
+    # An empty file still has one (empty) leaf
+    return max(1, -(-size // chunk_size))
+
+
+def merkle_leaves(path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  workers: int | None = None) -> list[bytes]:
+    """Hashes every chunk of a file, in parallel threads over one memory map."""
+    with mapped(path) as data:
+        view = memoryview(data)
+        try:
+            count = chunk_count(len(data), chunk_size)
+            slices = (view[i * chunk_size:(i + 1) * chunk_size] for i in range(count))
+            if count == 1:
+                return [hash_leaf(next(slices))]
+            with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+                return list(pool.map(hash_leaf, slices))
+        finally:
+            view.release()
+
+
+def _next_level(level: list[bytes]) -> list[bytes]:
+    return [hash_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)]
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    level = leaves
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0]
+
+
+def merkle_proof(leaves: list[bytes], index: int) -> list[bytes]:
+    """Sibling hashes from leaf `index` up to the root."""
+    proof = []
+    level = leaves
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+
+def root_from_proof(leaf: bytes, index: int, count: int, proof: list[bytes]) -> bytes:
+    """Recomputes the root from one leaf, its position among `count` leaves and its proof."""
+    if not 0 <= index < count:
+        raise ValueError(f"leaf {index} out of range (0..{count - 1})")
+    node = leaf
+    siblings = list(proof)
+    while count > 1:
+        if index ^ 1 < count:
+            if not siblings:
+                raise ValueError("proof too short for this position")
+            sibling = siblings.pop(0)
+            node = hash_node(sibling, node) if index & 1 else hash_node(node, sibling)
+        index //= 2
+        count = (count + 1) // 2
+    if siblings:
+        raise ValueError("proof too long for this position")
+    return node
+
+
+def verify_proof(leaf: bytes, index: int, count: int, proof: list[bytes], root: bytes) -> bool:
+    """Whether `proof` shows that `leaf` is chunk `index` of the tree with this root."""
+    try:
+        return root_from_proof(leaf, index, count, proof) == root
+    except ValueError:
+        return False
+
+
+def read_chunk(path: str | Path, index: int, chunk_size: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(index * chunk_size)
+        return f.read(chunk_size)
+
+
+# ---------------------------------------------------------------------------
+# Signing
+# ---------------------------------------------------------------------------
+
+def checksum_statement(path: str | Path, merkle: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       workers: int | None = None) -> tuple[dict, list[bytes]]:
+    """Returns the statement to sign for a file, and its Merkle leaves (if any)."""
+    size = os.path.getsize(path)
+    if not merkle:
+        return {"format": SHA256_FORMAT, "size": size, "digest": sha256_file(path)}, []
+    leaves = merkle_leaves(path, chunk_size, workers)
+    statement = {"format": MERKLE_FORMAT, "size": size, "chunk_size": chunk_size,
+                 "root": merkle_root(leaves).hex()}
+    return statement, leaves
+
+
+def canonical(statement: dict) -> bytes:
+    return json.dumps(statement, sort_keys=True, separators=(",", ":")).encode()
+
+
+def sign_statement(statement: dict, private_key) -> tuple[str, bytes]:
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "ed25519", private_key.sign(canonical(statement))
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return "rsa-pss-sha256", private_key.sign(canonical(statement), PSS, hashes.SHA256())
+    raise TypeError(f"unsupported key type: {type(private_key).__name__}")
+
+
+def verify_statement(statement: dict, algorithm: str, signature: bytes, public_key):
+    """Raises InvalidSignature unless `signature` is valid for `statement`."""
+    if algorithm == "ed25519" and isinstance(public_key, ed25519.Ed25519PublicKey):
+        public_key.verify(signature, canonical(statement))
+    elif algorithm == "rsa-pss-sha256" and isinstance(public_key, rsa.RSAPublicKey):
+        public_key.verify(signature, canonical(statement), PSS, hashes.SHA256())
+    else:
+        raise InvalidSignature(f"{algorithm} signature cannot be verified with this key")
+
+
+def sign_file(path: str | Path, private_key, merkle: bool = False,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int | None = None) -> dict:
+    """Returns a detached signature document for a file (JSON-serialisable)."""
+    statement, leaves = checksum_statement(path, merkle, chunk_size, workers)
+    algorithm, signature = sign_statement(statement, private_key)
+    document = {"statement": statement, "algorithm": algorithm,
+                "signature": base64.b64encode(signature).decode()}
+    if leaves:
+        document["leaves"] = [leaf.hex() for leaf in leaves]
+    return document
+
+
+def signed_leaves(document: dict, public_key) -> tuple[dict, list[bytes] | None]:
+    """Checks a signature document and returns its statement and (root-checked) leaves."""
+    statement = document["statement"]
+    verify_statement(statement, document["algorithm"], base64.b64decode(document["signature"]), public_key)
+    if "leaves" not in document:
+        return statement, None
+    leaves = [bytes.fromhex(leaf) for leaf in document["leaves"]]
+    if (statement["format"] != MERKLE_FORMAT
+            or len(leaves) != chunk_count(statement["size"], statement["chunk_size"])
+            or merkle_root(leaves).hex() != statement["root"]):
+        raise InvalidSignature("the leaf hashes do not match the signed Merkle root")
+    return statement, leaves
+
+
+def verify_file(path: str | Path, document: dict, public_key, chunks: list[int] | None = None,
+                workers: int | None = None) -> list[int]:
+    """
+    Verifies a file against a detached signature document.
+
+    With `chunks`, only those chunks are read and hashed (Merkle signatures only);
+    otherwise the whole file is. Returns the indices of the chunks that do not match
+    (`[0]` for a plain SHA-256 mismatch); an empty list means the file is intact.
+    Raises InvalidSignature if the signature itself is not valid.
+    """
+    statement, leaves = signed_leaves(document, public_key)
+    size = os.path.getsize(path)
+
+    if statement["format"] == SHA256_FORMAT:
+        if chunks:
+            raise ValueError("chunk verification needs a Merkle signature (sign with --merkle)")
+        return [] if size == statement["size"] and sha256_file(path) == statement["digest"] else [0]
+
+    chunk_size = statement["chunk_size"]
+    if chunks is not None:
+        if leaves is None:
+            raise ValueError("the signature does not list the leaf hashes")
+        bad = []
+        for index in chunks:
+            if not 0 <= index < len(leaves):
+                raise IndexError(f"chunk {index} out of range (0..{len(leaves) - 1})")
+            if hash_leaf(read_chunk(path, index, chunk_size)) != leaves[index]:
+                bad.append(index)
+        return bad
+
+    actual = merkle_leaves(path, chunk_size, workers)
+    if merkle_root(actual).hex() == statement["root"] and size == statement["size"]:
+        return []
+    if leaves is None:
+        return list(range(len(actual)))
+    return [i for i in range(max(len(actual), len(leaves)))
+            if i >= len(actual) or i >= len(leaves) or actual[i] != leaves[i]]
+
+
+# ---------------------------------------------------------------------------
+# Command line
+# ---------------------------------------------------------------------------
+
+def load_private_key(path: Path):
+    return serialization.load_pem_private_key(path.read_bytes(), password=None)
+
+
+def load_public_key(path: Path):
+    data = path.read_bytes()
+    if b"PRIVATE KEY" in data:
+        return serialization.load_pem_private_key(data, password=None).public_key()
+    return serialization.load_pem_public_key(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checksum, sign and verify large files")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, metavar="BYTES",
+                        help=f"Merkle chunk size (default: {DEFAULT_CHUNK_SIZE})")
+    parser.add_argument("-j", "--workers", type=int, default=None, metavar="N",
+                        help="Threads hashing Merkle chunks (default: CPU count)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    hash_parser = subparsers.add_parser("hash", help="Print the SHA-256 (or Merkle root) of files")
+    hash_parser.add_argument("files", nargs="+", type=Path)
+    hash_parser.add_argument("--merkle", action="store_true", help="Print the Merkle root")
+
+    sign_parser = subparsers.add_parser("sign", help="Write a detached signature")
+    sign_parser.add_argument("file", type=Path)
+    sign_parser.add_argument("--key", type=Path, required=True, help="PEM private key (Ed25519 or RSA)")
+    sign_parser.add_argument("--merkle", action="store_true", help="Sign a Merkle root")
+    sign_parser.add_argument("-o", "--output", type=Path, help=f"Signature file (default: FILE{SIGNATURE_SUFFIX})")
+
+    verify_parser = subparsers.add_parser("verify", help="Verify a file against its detached signature")
+    verify_parser.add_argument("file", type=Path)
+    verify_parser.add_argument("--public-key", type=Path, required=True, help="PEM public key")
+    verify_parser.add_argument("-s", "--signature", type=Path,
+                               help=f"Signature file (default: FILE{SIGNATURE_SUFFIX})")
+    verify_parser.add_argument("--chunks", type=int, nargs="+", metavar="INDEX",
+                               help="Only verify these chunks (Merkle signatures)")
+
+    args = parser.parse_args()
+
+    if args.command == "hash":
+        for file in args.files:
+            if args.merkle:
+                digest = merkle_root(merkle_leaves(file, args.chunk_size, args.workers)).hex()
+            else:
+                digest = sha256_file(file)
+            print(f"{digest}  {file}")
+        return
+
+    if args.command == "sign":
+        document = sign_file(args.file, load_private_key(args.key), args.merkle, args.chunk_size, args.workers)
+        output = args.output or args.file.with_name(args.file.name + SIGNATURE_SUFFIX)
+        output.write_text(json.dumps(document, indent=1) + "\n")
+        print(f"Signed: {args.file} → {output}")
+        return
+
+    signature_path = args.signature or args.file.with_name(args.file.name + SIGNATURE_SUFFIX)
+    document = json.loads(signature_path.read_text())
+    try:
+        bad = verify_file(args.file, document, load_public_key(args.public_key), args.chunks, args.workers)
+    except InvalidSignature as e:
+        sys.exit(f"Invalid signature: {e or 'signature does not match'}")
+    except (ValueError, IndexError) as e:
+        sys.exit(f"Error: {e}")
+    if bad:
+        sys.exit(f"MISMATCH: {args.file}: chunk(s) {', '.join(map(str, bad))} differ")
+    checked = f"{len(args.chunks)} chunk(s)" if args.chunks else "whole file"
+    print(f"OK: {args.file} ({checked})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Pre-generated key pairs for tests and benchmarks.
+
+Generating an RSA key is by far the slowest operation in test_cryptography.py (tens of
+milliseconds for 2048 bits, around a second for 4096), and a fresh key per test method
+adds nothing to what the tests check. `KeyPool` generates each key once per session and
+hands out the same key for the same (spec, index):
+
+  - `key("rsa-2048")` is "the" RSA-2048 key, `key("rsa-2048", 1)` a distinct one for
+    "wrong key" tests, and so on;
+  - `prefetch({"rsa-2048": 2, "rsa-4096": 2})` generates the missing keys up front, in
+    parallel across processes;
+  - with a `cache_dir`, keys are also written there as unencrypted PEM files
+    (`<spec>-<index>.pem`) and loaded by the next run instead of being generated.
+
+Supported specs: "rsa-<bits>", "ecdsa-p256", "ed25519" and "x25519".
+
+The cache holds private keys in clear: only use it for test keys, never for real ones.
+"""
+
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa, x25519
+
+
+def generate_key(spec: str):
+    """Generates a new private key for a spec such as "rsa-2048" or "ed25519"."""
+    if spec.startswith("rsa-"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=int(spec.split("-")[1]))
+    if spec == "ecdsa-p256":
+        return ec.generate_private_key(ec.SECP256R1())
+    if spec == "ed25519":
+        return ed25519.Ed25519PrivateKey.generate()
+    if spec == "x25519":
+        return x25519.X25519PrivateKey.generate()
+    raise ValueError(f"unknown key spec: {spec}")
+
+
+def to_pem(private_key) -> bytes:
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def _generate_pem(spec: str) -> bytes:
+    # Runs in a worker process: keys cross the process boundary as PEM
+    return to_pem(generate_key(spec))
+
+
+class KeyPool:
+    """Session-wide store of private keys, generated in parallel and optionally cached on disk."""
+
+    def __init__(self, cache_dir: str | Path | None = None, workers: int | None = None):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else None
+        self.workers = workers or os.cpu_count() or 1
+        self._keys: dict[tuple[str, int], object] = {}
+        self._lock = threading.Lock()
+        self.generated = 0
+
+    def _cache_path(self, spec: str, index: int) -> Path | None:
+        return self.cache_dir / f"{spec}-{index}.pem" if self.cache_dir else None
+
+    def _load_cached(self, spec: str, index: int):
+        path = self._cache_path(spec, index)
+        if path is None or not path.exists():
+            return None
+        try:
+            return serialization.load_pem_private_key(path.read_bytes(), password=None)
+        except ValueError:
+            return None  # corrupt or foreign file: regenerate it
+
+    def _store(self, spec: str, index: int, pem: bytes):
+        path = self._cache_path(spec, index)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{spec}-")
+        with os.fdopen(fd, "wb") as f:
+            f.write(pem)
+        os.replace(tmp, path)
+
+    def prefetch(self, counts: dict[str, int]) -> None:
+        """Makes sure keys 0..count-1 exist for every spec, generating missing ones in parallel."""
+        missing = []
+        with self._lock:
+            for spec, count in counts.items():
+                for index in range(count):
+                    if (spec, index) in self._keys:
+                        continue
+                    key = self._load_cached(spec, index)
+                    if key is not None:
+                        self._keys[(spec, index)] = key
+                    else:
+                        missing.append((spec, index))
+        if not missing:
+            return
+
+        specs = [spec for spec, _ in missing]
+        if self.workers > 1 and len(missing) > 1:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(missing))) as pool:
+                pems = list(pool.map(_generate_pem, specs))
+        else:
+            pems = [_generate_pem(spec) for spec in specs]
+
+        with self._lock:
+            for (spec, index), pem in zip(missing, pems):
+                self._store(spec, index, pem)
+                self._keys[(spec, index)] = serialization.load_pem_private_key(pem, password=None)
+            self.generated += len(missing)
+
+    def key(self, spec: str, index: int = 0):
+        """The private key number `index` for `spec`: equal indices give the same key."""
+        with self._lock:
+            key = self._keys.get((spec, index))
+        if key is None:
+            self.prefetch({spec: index + 1})
+            key = self._keys[(spec, index)]
+        return key
+
+    def rsa_key_pair(self, index: int = 0, key_size: int = 2048) -> tuple[rsa.RSAPrivateKey, rsa.RSAPublicKey]:
+        """Same result type as generate_rsa_key_pair(), from the pool."""
+        private_key = self.key(f"rsa-{key_size}", index)
+        return private_key, private_key.public_key()
@@ -7,24 +7,37 @@ Covers:
   - SHA-256 checksum (determinism, collision-resistance, one-way property)
   - RSA digital signature (sign with private key, verify with public key)
   - Ed25519 digital signature (sign with private key, verify with public key)
+  - File checksums (memory-mapped SHA-256, Merkle roots, signed chunk verification)
+  - Hybrid envelope encryption (RSA-OAEP / X25519 + chunked AES-256-GCM stream)
+  - Key pool (keys generated once per session, in parallel, optionally cached on disk)
 
 Dependencies (stdlib only — no third-party packages required except cryptography):
   pip install cryptography
 
 Run tests:
     python -m unittest test_cryptography.py
+
+RSA keys come from a session-wide KeyPool instead of being generated per test. Set
+CRYPTO_TEST_KEY_CACHE to a directory to also reuse them across runs (test keys only).
 """
 
 import hashlib
+import io
+import os
+import tempfile
 import unittest
 
 from cryptography.hazmat.primitives import hashes, serialization
-from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, padding, rsa, x25519
 from cryptography.hazmat.primitives.asymmetric.rsa import (
     RSAPrivateKey,
     RSAPublicKey,
 )
 
+import envelope
+import file_checksum
+from keypool import KeyPool
+
 
 # ---------------------------------------------------------------------------
 # Helpers
@@ -40,6 +53,14 @@ def sha256_checksum(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
 
+KEY_POOL = KeyPool(cache_dir=os.environ.get("CRYPTO_TEST_KEY_CACHE"))
+
+
+def setUpModule():
+    # Key 0 for each test, key 1 as the "wrong key"; generated in parallel, once
+    KEY_POOL.prefetch({"rsa-2048": 2})
+
+
 # ---------------------------------------------------------------------------
 # Test suites
 # ---------------------------------------------------------------------------
@@ -48,7 +69,7 @@ class TestRSAEncryptionDecryption(unittest.TestCase):
     """Secrecy guarantee: public key encrypts, private key decrypts."""
 
     def setUp(self):
-        self.private_key, self.public_key = generate_rsa_key_pair()
+        self.private_key, self.public_key = KEY_POOL.rsa_key_pair()
         self._padding = padding.OAEP(
             mgf=padding.MGF1(algorithm=hashes.SHA256()),
             algorithm=hashes.SHA256(),
@@ -91,7 +112,7 @@ class TestRSAEncryptionDecryption(unittest.TestCase):
         plaintext = b"Only Bob can read this"
         ciphertext = self._encrypt(plaintext)
 
-        other_private, _ = generate_rsa_key_pair()
+        other_private, _ = KEY_POOL.rsa_key_pair(1)
 
         with self.assertRaises(Exception):
             other_private.decrypt(ciphertext, self._padding)
@@ -140,7 +161,7 @@ class TestRSADigitalSignature(unittest.TestCase):
     """Authenticity guarantee: private key signs, public key verifies (RSA-PSS)."""
 
     def setUp(self):
-        self.private_key, self.public_key = generate_rsa_key_pair()
+        self.private_key, self.public_key = KEY_POOL.rsa_key_pair()
         self._padding = padding.PSS(
             mgf=padding.MGF1(hashes.SHA256()),
             salt_length=padding.PSS.MAX_LENGTH,
@@ -187,7 +208,7 @@ class TestRSADigitalSignature(unittest.TestCase):
         """A different public key must not verify a signature it did not produce."""
         from cryptography.exceptions import InvalidSignature
 
-        _, other_public = generate_rsa_key_pair()
+        _, other_public = KEY_POOL.rsa_key_pair(1)
         message = b"Authentic message"
         signature = self._sign(message)
 
@@ -253,5 +274,223 @@ class TestEd25519DigitalSignature(unittest.TestCase):
             other_public.verify(signature, message)
 
 
+class TestFileChecksum(unittest.TestCase):
+    """Streaming and Merkle checksums of files, with detached signatures over the root."""
+
+    CHUNK_SIZE = 1024
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._dir.cleanup)
+
+    def _write(self, data: bytes) -> str:
+        path = os.path.join(self._dir.name, f"file-{len(data)}.bin")
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def _tamper(self, path: str, offset: int):
+        with open(path, "r+b") as f:
+            f.seek(offset)
+            byte = f.read(1)
+            f.seek(offset)
+            f.write(bytes([byte[0] ^ 0xFF]))
+
+    # -- streaming hash --------------------------------------------------
+
+    def test_file_hash_matches_in_memory_checksum(self):
+        """Hashing the memory-mapped file must equal sha256_checksum of its bytes."""
+        for size in (0, 1, self.CHUNK_SIZE, 3 * self.CHUNK_SIZE + 7):
+            data = os.urandom(size)
+            self.assertEqual(file_checksum.sha256_file(self._write(data)), sha256_checksum(data))
+
+    # -- Merkle tree -----------------------------------------------------
+
+    def test_merkle_root_does_not_depend_on_parallelism(self):
+        """Leaves hashed by one thread or many must give the same root."""
+        path = self._write(os.urandom(10 * self.CHUNK_SIZE + 5))
+        serial = file_checksum.merkle_leaves(path, self.CHUNK_SIZE, workers=1)
+        parallel = file_checksum.merkle_leaves(path, self.CHUNK_SIZE, workers=4)
+        self.assertEqual(len(serial), 11)
+        self.assertEqual(serial, parallel)
+
+    def test_every_chunk_proof_rebuilds_the_root(self):
+        """An inclusion proof must lead from any chunk to the root, for any leaf count."""
+        for count in range(1, 10):
+            leaves = [file_checksum.hash_leaf(bytes([i])) for i in range(count)]
+            root = file_checksum.merkle_root(leaves)
+            for index, leaf in enumerate(leaves):
+                proof = file_checksum.merkle_proof(leaves, index)
+                self.assertEqual(file_checksum.root_from_proof(leaf, index, count, proof), root)
+                if count > 1:
+                    # The same proof must not vouch for the chunk at another position
+                    other = (index + 1) % count
+                    self.assertFalse(file_checksum.verify_proof(leaf, other, count, proof, root))
+
+    # -- signatures ------------------------------------------------------
+
+    def test_signed_file_verifies_with_ed25519_and_rsa(self):
+        """A signature over the root must verify for the untouched file."""
+        path = self._write(os.urandom(5 * self.CHUNK_SIZE))
+        ed_key = ed25519.Ed25519PrivateKey.generate()
+        rsa_key, _ = KEY_POOL.rsa_key_pair()
+        for private_key in (ed_key, rsa_key):
+            for merkle in (False, True):
+                document = file_checksum.sign_file(path, private_key, merkle, self.CHUNK_SIZE)
+                self.assertEqual(file_checksum.verify_file(path, document, private_key.public_key()), [])
+
+    def test_tampered_chunk_is_located(self):
+        """Full verification must name the modified chunk; chunk checks only see their chunk."""
+        path = self._write(os.urandom(6 * self.CHUNK_SIZE))
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        document = file_checksum.sign_file(path, private_key, merkle=True, chunk_size=self.CHUNK_SIZE)
+        self._tamper(path, 4 * self.CHUNK_SIZE + 10)
+
+        public_key = private_key.public_key()
+        self.assertEqual(file_checksum.verify_file(path, document, public_key), [4])
+        self.assertEqual(file_checksum.verify_file(path, document, public_key, chunks=[0, 1]), [])
+        self.assertEqual(file_checksum.verify_file(path, document, public_key, chunks=[3, 4]), [4])
+
+    def test_forged_leaves_or_wrong_key_fail_verification(self):
+        """Leaf hashes that do not match the signed root, or another key, must be rejected."""
+        from cryptography.exceptions import InvalidSignature
+
+        path = self._write(os.urandom(3 * self.CHUNK_SIZE))
+        private_key = ed25519.Ed25519PrivateKey.generate()
+        document = file_checksum.sign_file(path, private_key, merkle=True, chunk_size=self.CHUNK_SIZE)
+
+        with self.assertRaises(InvalidSignature):
+            file_checksum.verify_file(path, document, ed25519.Ed25519PrivateKey.generate().public_key())
+
+        forged = dict(document, leaves=[file_checksum.hash_leaf(b"x").hex()] + document["leaves"][1:])
+        with self.assertRaises(InvalidSignature):
+            file_checksum.verify_file(path, forged, private_key.public_key(), chunks=[0])
+
+
+class TestHybridEnvelope(unittest.TestCase):
+    """Secrecy for large payloads: a public key wraps an AES-GCM key, chunks are authenticated."""
+
+    CHUNK_SIZE = 64
+
+    def setUp(self):
+        self.rsa_private, _ = KEY_POOL.rsa_key_pair()
+        self.x25519_private = x25519.X25519PrivateKey.generate()
+        self.payload = os.urandom(4 * self.CHUNK_SIZE + 10)
+
+    def _seal(self, payload: bytes, private_key=None) -> bytes:
+        private_key = private_key or self.x25519_private
+        return envelope.encrypt(payload, private_key.public_key(), self.CHUNK_SIZE)
+
+    def _chunks(self, sealed: bytes) -> tuple[bytes, list[bytes]]:
+        """Splits an envelope into its header and sealed chunks."""
+        header, _, _, _ = envelope.read_header(io.BytesIO(sealed))
+        body = sealed[len(header):]
+        size = self.CHUNK_SIZE + envelope.TAG_SIZE
+        return header, [body[i:i + size] for i in range(0, len(body), size)]
+
+    # -- round trip ------------------------------------------------------
+
+    def test_round_trip_with_rsa_and_x25519(self):
+        """Any payload size, including empty and exact multiples of the chunk size."""
+        for private_key in (self.rsa_private, self.x25519_private):
+            for size in (0, 1, self.CHUNK_SIZE, 3 * self.CHUNK_SIZE, 3 * self.CHUNK_SIZE + 1):
+                payload = os.urandom(size)
+                self.assertEqual(envelope.decrypt(self._seal(payload, private_key), private_key), payload)
+
+    def test_streams_in_constant_memory(self):
+        """Encrypting and decrypting file-like streams never needs the whole payload."""
+        src, sealed, out = io.BytesIO(self.payload), io.BytesIO(), io.BytesIO()
+        written = envelope.encrypt_stream(src, sealed, self.rsa_private.public_key(), self.CHUNK_SIZE)
+        sealed.seek(0)
+        self.assertEqual(envelope.decrypt_stream(sealed, out, self.rsa_private), written)
+        self.assertEqual(out.getvalue(), self.payload)
+
+    def test_same_payload_gives_different_envelopes(self):
+        """A fresh data key is generated for every envelope."""
+        self.assertNotEqual(self._seal(self.payload), self._seal(self.payload))
+
+    # -- tampering -------------------------------------------------------
+
+    def test_modified_byte_fails_authentication(self):
+        """Flipping one ciphertext bit must make decryption fail."""
+        sealed = bytearray(self._seal(self.payload))
+        sealed[-self.CHUNK_SIZE] ^= 0x01
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(bytes(sealed), self.x25519_private)
+
+    def test_modified_header_fails_authentication(self):
+        """The header is authenticated with every chunk (here: a different chunk size)."""
+        sealed = bytearray(self._seal(self.payload))
+        sealed[6:10] = (self.CHUNK_SIZE * 2).to_bytes(4, "big")
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(bytes(sealed), self.x25519_private)
+
+    def test_truncated_envelope_is_rejected(self):
+        """Dropping final chunks, or cutting one short, must be detected."""
+        sealed = self._seal(self.payload)
+        header, chunks = self._chunks(sealed)
+        for truncated in (header + b"".join(chunks[:-1]), header + b"".join(chunks[:2]), sealed[:-5], header):
+            with self.assertRaises(envelope.EnvelopeError):
+                envelope.decrypt(truncated, self.x25519_private)
+
+    def test_truncation_at_exact_chunk_boundary_is_rejected(self):
+        """Without the final-chunk flag, a payload cut at a chunk boundary would look complete."""
+        header, chunks = self._chunks(self._seal(os.urandom(3 * self.CHUNK_SIZE)))
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(header + b"".join(chunks[:2]), self.x25519_private)
+
+    def test_reordered_or_duplicated_chunks_are_rejected(self):
+        """Chunk nonces are positional: swapping, repeating or appending chunks fails."""
+        header, chunks = self._chunks(self._seal(self.payload))
+        swapped = [chunks[1], chunks[0]] + chunks[2:]
+        repeated = chunks[:2] + [chunks[1]] + chunks[2:]
+        for forged in (swapped, repeated, chunks + [chunks[0]]):
+            with self.assertRaises(envelope.EnvelopeError):
+                envelope.decrypt(header + b"".join(forged), self.x25519_private)
+
+    # -- wrong key -------------------------------------------------------
+
+    def test_wrong_private_key_cannot_decrypt(self):
+        """Only the recipient's private key unwraps the data key."""
+        other_x25519 = x25519.X25519PrivateKey.generate()
+        other_rsa, _ = KEY_POOL.rsa_key_pair(1)
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(self._seal(self.payload), other_x25519)
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(self._seal(self.payload, self.rsa_private), other_rsa)
+        with self.assertRaises(envelope.EnvelopeError):
+            envelope.decrypt(self._seal(self.payload), self.rsa_private)
+
+
+class TestKeyPool(unittest.TestCase):
+    """The pool hands out stable, distinct keys and reuses its disk cache."""
+
+    def test_same_index_same_key_different_index_different_key(self):
+        """Index 0 is always the same key; index 1 is a different one ("wrong key")."""
+        first, _ = KEY_POOL.rsa_key_pair(0)
+        again, _ = KEY_POOL.rsa_key_pair(0)
+        other, _ = KEY_POOL.rsa_key_pair(1)
+        self.assertIs(first, again)
+        self.assertNotEqual(first.private_numbers(), other.private_numbers())
+
+    def test_keys_are_generated_in_parallel_and_cached_on_disk(self):
+        """A second pool on the same cache directory loads the keys instead of generating them."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            pool = KeyPool(cache_dir=cache_dir, workers=2)
+            pool.prefetch({"ed25519": 3, "x25519": 1})
+            self.assertEqual(pool.generated, 4)
+
+            reloaded = KeyPool(cache_dir=cache_dir)
+            for index in range(3):
+                raw = [
+                    p.key("ed25519", index).public_key().public_bytes(
+                        encoding=serialization.Encoding.Raw, format=serialization.PublicFormat.Raw)
+                    for p in (pool, reloaded)
+                ]
+                self.assertEqual(raw[0], raw[1])
+            self.assertEqual(reloaded.generated, 0)
+            self.assertIsInstance(reloaded.key("x25519"), x25519.X25519PrivateKey)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
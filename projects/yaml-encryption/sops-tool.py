@@ -1,19 +1,42 @@
 #!/usr/bin/env python3
 """
 sops-tool — Encrypt/decrypt/view Kubernetes secret manifests with SOPS + age.
-Usage: sops-tool <encrypt|decrypt|view> -f <file> [options]
+Usage: sops-tool <encrypt|decrypt|view|render|rotate> -f <file|dir|glob> [...] [options]
 """
 
 import argparse
+import base64
+import functools
+import glob
+import hashlib
+import json
 import os
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 ENC_SUFFIX = ".enc.yaml"
 PLAIN_SUFFIX = ".yaml"
 DEFAULT_AGE_KEYS = Path("~/.config/sops/age/keys.txt").expanduser()
+DEFAULT_JOBS = min(8, os.cpu_count() or 1)
+DEFAULT_MANIFEST = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "sops-tool" / "manifest.json"
+DEFAULT_JOURNAL = DEFAULT_MANIFEST.with_name("rotate-journal.jsonl")
+ROTATE_STEPS = ("updatekeys", "rotate")
+
+
+class SopsError(Exception):
+    """A file could not be processed (bad input, or sops failed on it)."""
+
+    def __init__(self, message: str, returncode: int = 1):
+        super().__init__(message)
+        self.returncode = returncode
 
 
 def check_sops():
@@ -22,22 +45,175 @@ def check_sops():
             "Error: 'sops' not found in PATH. Please install it before proceeding.")
 
 
+@functools.lru_cache(maxsize=None)
 def find_sops_config(start: Path) -> Path | None:
-    """Walks up the directory tree looking for .sops.yaml (same behaviour as sops itself)."""
-    for parent in [start, *start.parents]:
-        candidate = parent / ".sops.yaml"
-        if candidate.exists():
-            return candidate
-    return None
+    """Walks up the directory tree looking for .sops.yaml (same behaviour as sops itself).
+
+    Memoized per directory: files in the same tree share the lookups of their parents.
+    """
+    candidate = start / ".sops.yaml"
+    if candidate.exists():
+        return candidate
+    if start.parent == start:
+        return None
+    return find_sops_config(start.parent)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def fingerprint(path: Path | None) -> str:
+    """Content hash of the age keys file or a .sops.yaml (computed once per run)."""
+    if path is None or not path.exists():
+        return ""
+    return sha256_file(path)[:16]
+
+
+class Manifest:
+    """Local record of the last encrypt/decrypt of every file, used to skip unchanged ones.
+
+    Each entry stores the state (mtime, size, sha256) of the input and of the output
+    written for it, plus the key fingerprint and .sops.yaml hash in effect. A file is
+    skipped when all of them still match; hashes are only recomputed for files whose
+    mtime or size changed, so a run where nothing changed does no crypto and no I/O
+    beyond a stat per file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = False
+        try:
+            self._entries = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @staticmethod
+    def _state(path: Path, previous: list | None) -> list | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if previous and previous[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return previous
+        return [stat.st_mtime_ns, stat.st_size, sha256_file(path)]
+
+    def unchanged(self, command: str, file: Path, out_file: Path, context: dict) -> bool:
+        with self._lock:
+            entry = self._entries.get(f"{command}:{file}")
+        if entry is None or entry["context"] != context:
+            return False
+        # Same content is enough: a touched file with the same hash is still unchanged
+        current_in = self._state(file, entry["input"])
+        current_out = self._state(out_file, entry["output"])
+        return (current_in is not None and current_out is not None
+                and current_in[2] == entry["input"][2] and current_out[2] == entry["output"][2])
+
+    def record(self, command: str, file: Path, out_file: Path, context: dict):
+        entry = {
+            "input": self._state(file, None),
+            "output": self._state(out_file, None),
+            "context": context,
+        }
+        with self._lock:
+            self._entries[f"{command}:{file}"] = entry
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=".manifest-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._entries, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+
+class RotationJournal:
+    """Progress of a `rotate` run, so an interrupted run resumes where it stopped.
+
+    One JSON line is appended (and flushed) per rotated file with the file's state after
+    rotation; the first line holds the steps of the run and the fingerprint of every
+    .sops.yaml involved. A file is skipped on resume when its content still matches the
+    journal. A journal written with other steps or another .sops.yaml content (e.g. a
+    recipient removed since) is discarded, so every file is rotated for the new recipients.
+    The journal is deleted once every file of a run has been rotated.
+    """
+
+    def __init__(self, path: Path, steps: tuple[str, ...], restart: bool = False,
+                 sops_configs: dict[str, str] | None = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: dict[str, list] = {}
+        self.discarded = False
+        header = {"steps": list(steps), "sops_configs": sops_configs or {}}
+        try:
+            text = "" if restart else path.read_text()
+        except OSError:
+            text = ""
+        lines = text.splitlines()
+        if lines and self._parse(lines[0]) == header:
+            for line in lines[1:]:
+                entry = self._parse(line)  # the last line may be cut short by a kill
+                if entry:
+                    self._entries[entry["file"]] = entry["state"]
+            if not text.endswith("\n"):
+                with open(path, "a") as f:
+                    f.write("\n")  # so the next entry does not extend the cut line
+        else:
+            self.discarded = bool(lines)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(header) + "\n")
+
+    @staticmethod
+    def _parse(line: str) -> dict | None:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return None
+
+    @property
+    def resumed(self) -> int:
+        return len(self._entries)
+
+    def done(self, file: Path) -> bool:
+        with self._lock:
+            state = self._entries.get(str(file))
+        if state is None:
+            return False
+        current = Manifest._state(file, state)
+        return current is not None and current[2] == state[2]
+
+    def record(self, file: Path):
+        entry = {"file": str(file), "state": Manifest._state(file, None)}
+        with self._lock:
+            self._entries[str(file)] = entry["state"]
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+
+    def finish(self):
+        self.path.unlink(missing_ok=True)
 
 
 def run_sops(args_list: list[str], env: dict, verbose: bool) -> subprocess.CompletedProcess:
     if verbose:
         print(f"[sops] {' '.join(args_list)}")
-    result = subprocess.run(args_list, env=env, capture_output=True, text=True)
+    try:
+        result = subprocess.run(args_list, env=env, capture_output=True, text=True)
+    except FileNotFoundError:
+        raise SopsError("'sops' not found in PATH. Please install it before proceeding.")
     if result.returncode != 0:
-        print(result.stderr, file=sys.stderr)
-        sys.exit(result.returncode)
+        raise SopsError(result.stderr.strip() or f"sops exited with code {result.returncode}",
+                        result.returncode)
     return result
 
 
@@ -47,14 +223,334 @@ def build_env(age_keys: Path) -> dict:
     return env
 
 
-def cmd_encrypt(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool):
+# -- Native engine ------------------------------------------------------------
+#
+# Decrypts SOPS YAML files whose data key is wrapped for age X25519 recipients
+# in-process with the `cryptography` package: no sops process per file, and the
+# age keys file is parsed once per run. Anything else (PGP/KMS-only files, key
+# groups, other age recipient types, a MAC that does not verify) raises
+# NativeUnsupported and, with --engine auto, is handed to the sops binary.
+#
+# The native engine re-serialises the YAML, dropping comments and formatting, so
+# it is opt-in: the default engine is sops.
+
+ENGINES = ("auto", "native", "sops")
+AGE_HEADER = b"age-encryption.org/v1"
+AGE_CHUNK_SIZE = 64 * 1024
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+ENC_VALUE = re.compile(r"^ENC\[AES256_GCM,data:(.*),iv:(.+),tag:(.+),type:(\w+)\]$", re.DOTALL)
+
+
+class NativeUnsupported(Exception):
+    """The native engine cannot decrypt a file; the sops binary has to."""
+
+
+def native_available() -> bool:
+    try:
+        import cryptography  # noqa: F401
+        import yaml  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _bech32_polymod(values: list[int]) -> int:
+    generator = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1FFFFFF) << 5 ^ value
+        for i in range(5):
+            checksum ^= generator[i] if (top >> i) & 1 else 0
+    return checksum
+
+
+def bech32_decode(text: str) -> tuple[str, bytes]:
+    """Decodes a Bech32 string (age keys) into its human-readable part and payload."""
+    text = text.lower()
+    pos = text.rfind("1")
+    if pos < 1 or len(text) - pos < 7 or any(c not in BECH32_CHARSET for c in text[pos + 1:]):
+        raise ValueError("invalid Bech32 string")
+    hrp = text[:pos]
+    values = [BECH32_CHARSET.index(c) for c in text[pos + 1:]]
+    expanded = [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+    if _bech32_polymod(expanded + values) != 1:
+        raise ValueError("invalid Bech32 checksum")
+
+    acc, bits, payload = 0, 0, bytearray()
+    for value in values[:-6]:
+        acc = acc << 5 | value
+        bits += 5
+        if bits >= 8:
+            bits -= 8
+            payload.append(acc >> bits & 0xFF)
+    return hrp, bytes(payload)
+
+
+@functools.lru_cache(maxsize=None)
+def load_age_identities(path: Path) -> tuple:
+    """Parses the X25519 identities (AGE-SECRET-KEY-1...) of an age keys file, once per run."""
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+
+    identities = []
+    for line in path.read_text().splitlines():
+        line = line.strip()
+        if line.upper().startswith("AGE-SECRET-KEY-1"):
+            try:
+                _, secret = bech32_decode(line)
+                identities.append(X25519PrivateKey.from_private_bytes(secret))
+            except ValueError as e:
+                raise SopsError(f"invalid age identity in {path}: {e}")
+    return tuple(identities)
+
+
+def _b64_unpadded(text: str | bytes) -> bytes:
+    if isinstance(text, str):
+        text = text.encode()
+    return base64.b64decode(text + b"=" * (-len(text) % 4), validate=True)
+
+
+def _hkdf(key: bytes, salt: bytes, info: bytes) -> bytes:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=info).derive(key)
+
+
+def _age_unwrap(stanzas: list[tuple[list[str], bytes]], identities: tuple) -> bytes:
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PublicKey
+    from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+    from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+
+    for args, body in stanzas:
+        if len(args) != 2 or args[0] != "X25519":
+            continue
+        share = _b64_unpadded(args[1])
+        if len(share) != 32 or len(body) != 32:
+            raise SopsError("malformed age X25519 stanza")
+        for identity in identities:
+            shared = identity.exchange(X25519PublicKey.from_public_bytes(share))
+            recipient = identity.public_key().public_bytes(Encoding.Raw, PublicFormat.Raw)
+            wrap_key = _hkdf(shared, share + recipient, b"age-encryption.org/v1/X25519")
+            try:
+                return ChaCha20Poly1305(wrap_key).decrypt(b"\x00" * 12, body, None)
+            except InvalidTag:
+                continue
+    raise NativeUnsupported("no X25519 identity in the age keys file matches the file")
+
+
+def age_decrypt(armored: str, identities: tuple) -> bytes:
+    """Decrypts an ASCII-armored age file (the `enc` of a SOPS age recipient)."""
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives import hashes, hmac
+    from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
+
+    lines = [line.strip() for line in armored.strip().splitlines()]
+    if not lines or not lines[0].startswith("-----BEGIN AGE ENCRYPTED FILE-----"):
+        raise NativeUnsupported("age recipient without an ASCII-armored file")
+    data = base64.b64decode("".join(line for line in lines if not line.startswith("-----")))
+
+    # Header: version line, "-> type args" stanzas with 64-column bodies, "--- mac"
+    end = data.find(b"\n---")
+    if not data.startswith(AGE_HEADER + b"\n") or end < 0:
+        raise SopsError("malformed age header")
+    mac_end = data.index(b"\n", end + 1)
+    header_lines = data[len(AGE_HEADER) + 1:end + 1].decode("ascii").split("\n")[:-1]
+    stanzas: list[tuple[list[str], bytes]] = []
+    while header_lines:
+        args = header_lines.pop(0).split(" ")
+        if args[0] != "->":
+            raise SopsError("malformed age header")
+        body = ""
+        while header_lines:
+            line = header_lines.pop(0)
+            body += line
+            if len(line) < 64:
+                break
+        stanzas.append((args[1:], _b64_unpadded(body)))
+
+    file_key = _age_unwrap(stanzas, identities)
+    mac = hmac.HMAC(_hkdf(file_key, b"", b"header"), hashes.SHA256())
+    mac.update(data[:end + 4])
+    try:
+        mac.verify(_b64_unpadded(data[end + 5:mac_end]))
+    except Exception:
+        raise SopsError("age header MAC mismatch")
+
+    # Payload: 16-byte nonce, then STREAM chunks of 64 KiB + tag
+    payload = data[mac_end + 1:]
+    aead = ChaCha20Poly1305(_hkdf(file_key, payload[:16], b"payload"))
+    chunks = [payload[i:i + AGE_CHUNK_SIZE + 16] for i in range(16, len(payload), AGE_CHUNK_SIZE + 16)]
+    plaintext = bytearray()
+    for counter, chunk in enumerate(chunks):
+        nonce = counter.to_bytes(11, "big") + (b"\x01" if counter == len(chunks) - 1 else b"\x00")
+        try:
+            plaintext += aead.decrypt(nonce, chunk, None)
+        except InvalidTag:
+            raise SopsError("age payload is corrupted or truncated")
+    return bytes(plaintext)
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_loader():
+    """A safe loader resolving scalars like sops does: no timestamps, only true/false booleans.
+
+    Uses libyaml when PyYAML was built with it (parsing dominates the native engine's time).
+    """
+    import yaml
+
+    class SopsLoader(getattr(yaml, "CSafeLoader", yaml.SafeLoader)):
+        pass
+
+    skip = ("tag:yaml.org,2002:timestamp", "tag:yaml.org,2002:bool")
+    SopsLoader.yaml_implicit_resolvers = {
+        first: [(tag, regexp) for tag, regexp in resolvers if tag not in skip]
+        for first, resolvers in yaml.SafeLoader.yaml_implicit_resolvers.items()
+    }
+    SopsLoader.add_implicit_resolver(
+        "tag:yaml.org,2002:bool", re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"), list("tTfF"))
+    return SopsLoader
+
+
+def _decrypt_value(value: str, data_key: bytes, aad: str):
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    data, iv, tag, kind = ENC_VALUE.match(value).groups()
+    try:
+        plaintext = AESGCM(data_key).decrypt(
+            base64.b64decode(iv), base64.b64decode(data) + base64.b64decode(tag), aad.encode())
+    except (InvalidTag, ValueError):
+        raise SopsError(f"could not decrypt the value at '{aad}' (wrong data key or tampered file)")
+    if kind == "str":
+        return plaintext.decode()
+    if kind == "int":
+        return int(plaintext)
+    if kind == "float":
+        return float(plaintext)
+    if kind == "bool":
+        return plaintext.decode().lower() == "true"
+    if kind == "bytes":
+        return plaintext
+    raise NativeUnsupported(f"unsupported value type '{kind}'")
+
+
+def _mac_bytes(value) -> bytes:
+    # Same serialisation as sops' ToBytes (Go formatting of each plaintext value)
+    if isinstance(value, bool):
+        return b"True" if value else b"False"
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, float):
+        return repr(value).removesuffix(".0").encode()
+    if value is None:
+        return b""
+    return str(value).encode()
+
+
+def _decrypt_tree(node, path: list[str], data_key: bytes, digest, mac_only_encrypted: bool):
+    if isinstance(node, dict):
+        return {key: _decrypt_tree(value, path + [str(key)], data_key, digest, mac_only_encrypted)
+                for key, value in node.items()}
+    if isinstance(node, list):
+        # List items share the path of their parent key
+        return [_decrypt_tree(item, path, data_key, digest, mac_only_encrypted) for item in node]
+    encrypted = isinstance(node, str) and ENC_VALUE.match(node) is not None
+    if encrypted:
+        node = _decrypt_value(node, data_key, ":".join(path) + ":")
+    if encrypted or not mac_only_encrypted:
+        digest.update(_mac_bytes(node))
+    return node
+
+
+def native_decrypt(file: Path, age_keys: Path) -> str:
+    """Decrypts a SOPS YAML file with an age identity, without the sops binary.
+
+    Raises NativeUnsupported for files the sops binary has to handle.
+    """
+    if not native_available():
+        raise NativeUnsupported("the 'cryptography' and 'PyYAML' packages are required")
+    import yaml
+
+    try:
+        documents = list(yaml.load_all(file.read_text(), Loader=_yaml_loader()))
+    except yaml.YAMLError as e:
+        raise SopsError(f"invalid YAML in {file}: {e}")
+    metadata = next((doc["sops"] for doc in documents if isinstance(doc, dict) and "sops" in doc), None)
+    if not isinstance(metadata, dict):
+        raise SopsError(f"no sops metadata found in: {file}")
+    if metadata.get("key_groups") or metadata.get("shamir_threshold"):
+        raise NativeUnsupported("key groups and Shamir secret sharing are not supported")
+    recipients = metadata.get("age") or []
+    if not recipients:
+        raise NativeUnsupported("the file has no age recipients")
+
+    identities = load_age_identities(age_keys)
+    data_key = None
+    for recipient in recipients:
+        try:
+            data_key = age_decrypt(recipient.get("enc", ""), identities)
+            break
+        except NativeUnsupported:
+            continue
+    if data_key is None or len(data_key) != 32:
+        raise NativeUnsupported("none of the age recipients can be decrypted with the native engine")
+
+    digest = hashlib.sha512()
+    plain = []
+    for doc in documents:
+        if isinstance(doc, dict):
+            doc = {key: value for key, value in doc.items() if key != "sops"}
+        plain.append(_decrypt_tree(doc, [], data_key, digest, bool(metadata.get("mac_only_encrypted"))))
+
+    # The MAC is itself encrypted, authenticated with the lastmodified timestamp
+    mac = metadata.get("mac")
+    if not isinstance(mac, str) or not ENC_VALUE.match(mac):
+        raise SopsError(f"no MAC found in the sops metadata of: {file}")
+    if _decrypt_value(mac, data_key, str(metadata.get("lastmodified", ""))) != digest.hexdigest().upper():
+        raise NativeUnsupported("MAC mismatch")
+
+    dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+    return "---\n".join(
+        yaml.dump(doc, Dumper=dumper, sort_keys=False, allow_unicode=True, default_flow_style=False)
+        for doc in plain)
+
+
+def decrypt_text(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool,
+                 engine: str = "sops") -> str:
+    """Returns the decrypted content of `file` with the selected engine.
+
+    With "auto", files the native engine does not support are decrypted by sops.
+    """
+    if engine != "sops":
+        try:
+            return native_decrypt(file, age_keys)
+        except NativeUnsupported as e:
+            if engine == "native":
+                raise SopsError(f"native engine: {e}")
+            if verbose:
+                print(f"[native] {file}: {e}, falling back to sops")
+
+    sops_args = ["sops", "--decrypt"]
+    if sops_config:
+        sops_args += ["--config", str(sops_config)]
+    sops_args += ["--input-type", "yaml", "--output-type", "yaml", str(file)]
+    return run_sops(sops_args, build_env(age_keys), verbose).stdout
+
+
+def cmd_encrypt(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool,
+                manifest: Manifest | None = None, force: bool = False) -> str | None:
     if file.name.endswith(ENC_SUFFIX):
-        sys.exit(f"Error: file is already encrypted (.enc.yaml): {file}")
+        raise SopsError(f"file is already encrypted (.enc.yaml): {file}")
     if file.suffix != ".yaml":
-        sys.exit(
-            f"Error: the file to encrypt must have a .yaml extension: {file}")
+        raise SopsError(
+            f"the file to encrypt must have a .yaml extension: {file}")
 
     out_file = file.with_name(file.stem + ENC_SUFFIX)
+    context = {"key": fingerprint(age_keys), "sops_config": fingerprint(sops_config)}
+    if manifest is not None and not force and manifest.unchanged("encrypt", file, out_file, context):
+        return None
 
     sops_args = ["sops", "--encrypt"]
     if sops_config:
@@ -63,39 +559,275 @@ def cmd_encrypt(file: Path, age_keys: Path, sops_config: Path | None, verbose: b
 
     result = run_sops(sops_args, build_env(age_keys), verbose)
     out_file.write_text(result.stdout)
-    print(f"Encrypted: {file} → {out_file}")
+    if manifest is not None:
+        manifest.record("encrypt", file, out_file, context)
+    return f"Encrypted: {file} → {out_file}"
 
 
-def cmd_decrypt(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool):
+def cmd_decrypt(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool,
+                manifest: Manifest | None = None, force: bool = False,
+                engine: str = "sops") -> str | None:
     if not file.name.endswith(ENC_SUFFIX):
-        sys.exit(
-            f"Error: the file to decrypt must have a .enc.yaml extension: {file}")
+        raise SopsError(
+            f"the file to decrypt must have a .enc.yaml extension: {file}")
 
     stem = file.name[: -len(ENC_SUFFIX)]
     out_file = file.with_name(stem + PLAIN_SUFFIX)
+    context = {"key": fingerprint(age_keys), "sops_config": fingerprint(sops_config)}
+    if manifest is not None and not force and manifest.unchanged("decrypt", file, out_file, context):
+        return None
 
-    sops_args = ["sops", "--decrypt"]
-    if sops_config:
-        sops_args += ["--config", str(sops_config)]
-    sops_args += ["--input-type", "yaml", "--output-type", "yaml", str(file)]
-
-    result = run_sops(sops_args, build_env(age_keys), verbose)
-    out_file.write_text(result.stdout)
-    print(f"Decrypted: {file} → {out_file}")
+    out_file.write_text(decrypt_text(file, age_keys, sops_config, verbose, engine))
+    if manifest is not None:
+        manifest.record("decrypt", file, out_file, context)
+    return f"Decrypted: {file} → {out_file}"
 
 
-def cmd_view(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool):
+def cmd_view(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool,
+             engine: str = "sops") -> str:
     if not file.name.endswith(ENC_SUFFIX):
-        sys.exit(
-            f"Error: the file to view must have a .enc.yaml extension: {file}")
+        raise SopsError(
+            f"the file to view must have a .enc.yaml extension: {file}")
 
-    sops_args = ["sops", "--decrypt"]
-    if sops_config:
-        sops_args += ["--config", str(sops_config)]
-    sops_args += ["--input-type", "yaml", "--output-type", "yaml", str(file)]
+    return decrypt_text(file, age_keys, sops_config, verbose, engine)
 
-    result = run_sops(sops_args, build_env(age_keys), verbose)
-    print(result.stdout, end="")
+
+def cmd_rotate(file: Path, age_keys: Path, sops_config: Path | None, verbose: bool,
+               journal: RotationJournal | None = None,
+               steps: tuple[str, ...] = ROTATE_STEPS) -> str | None:
+    """Re-keys an encrypted file in place.
+
+    `updatekeys` re-wraps the data key for the recipients of the file's .sops.yaml
+    creation rule; `rotate` then replaces the data key itself, so a removed recipient
+    cannot read values encrypted after its removal. Returns None for files the journal
+    shows as already rotated.
+    """
+    if not file.name.endswith(ENC_SUFFIX):
+        raise SopsError(
+            f"the file to rotate must have a .enc.yaml extension: {file}")
+    if journal is not None and journal.done(file):
+        return None
+
+    env = build_env(age_keys)
+    config_args = ["--config", str(sops_config)] if sops_config else []
+    if "updatekeys" in steps:
+        run_sops(["sops", *config_args, "updatekeys", "--yes", str(file)], env, verbose)
+    if "rotate" in steps:
+        run_sops(["sops", *config_args, "--rotate", "--in-place",
+                  "--input-type", "yaml", "--output-type", "yaml", str(file)], env, verbose)
+    if journal is not None:
+        journal.record(file)
+    return f"Rotated: {file} ({' + '.join(steps)})"
+
+
+@functools.lru_cache(maxsize=None)
+def load_creation_rules(sops_config: Path) -> tuple | None:
+    """The creation_rules of a .sops.yaml (None when PyYAML is not installed)."""
+    try:
+        import yaml
+    except ImportError:
+        return None
+    try:
+        config = yaml.safe_load(sops_config.read_text()) or {}
+    except (OSError, yaml.YAMLError) as e:
+        raise SopsError(f"cannot read {sops_config}: {e}")
+    return tuple(config.get("creation_rules") or [])
+
+
+def resolve_creation_rule(file: Path, sops_config: Path | None) -> tuple[str, dict | None]:
+    """Returns a label for the .sops.yaml creation rule sops applies to `file`, and the rule.
+
+    Same matching as sops: paths relative to the .sops.yaml directory, first rule whose
+    path_regex (or filename_regex) matches, a rule without a regex matching everything.
+    """
+    if sops_config is None:
+        return "no .sops.yaml", None
+    rules = load_creation_rules(sops_config)
+    if rules is None:
+        return f"{sops_config} (rules not resolved: PyYAML is not installed)", None
+    try:
+        relative = str(file.relative_to(sops_config.parent.resolve()))
+    except ValueError:
+        relative = str(file)
+    for index, rule in enumerate(rules):
+        regex = rule.get("path_regex") or rule.get("filename_regex") or ""
+        if not regex or re.search(regex, relative):
+            described = f"path_regex: {regex}" if regex else "catch-all"
+            return f"{sops_config} rule #{index} ({described})", rule
+    return f"{sops_config} (no matching creation rule)", None
+
+
+def describe_recipients(rule: dict | None) -> str:
+    if rule is None:
+        return "recipients unknown"
+    counts = []
+    for key in ("age", "pgp", "kms", "gcp_kms", "azure_keyvault", "hc_vault_transit_uri"):
+        value = rule.get(key)
+        if value:
+            items = value if isinstance(value, list) else [v for v in str(value).split(",") if v.strip()]
+            counts.append(f"{len(items)} {key}")
+    if rule.get("key_groups"):
+        counts.append(f"{len(rule['key_groups'])} key group(s)")
+    return ", ".join(counts) or "no recipients"
+
+
+def sops_config_fingerprints(files: list[Path], override: Path | None) -> dict[str, str]:
+    """Content hash of every .sops.yaml that determines the recipients of `files`."""
+    configs = {override or find_sops_config(file.parent) for file in files}
+    return {str(config.resolve()): fingerprint(config) for config in configs if config is not None}
+
+
+def plan_rotation(files: list[Path], override: Path | None) -> list[tuple[str, dict | None, list[Path]]]:
+    """Groups files by the creation rule that determines their recipients, in input order."""
+    groups: dict[str, tuple[dict | None, list[Path]]] = {}
+    for file in files:
+        sops_config = override or find_sops_config(file.parent)
+        label, rule = resolve_creation_rule(file, sops_config)
+        groups.setdefault(label, (rule, []))[1].append(file)
+    return [(label, rule, group) for label, (rule, group) in groups.items()]
+
+
+def as_document(text: str) -> str:
+    """Formats decrypted YAML as one part of a multi-document stream ('---' separated)."""
+    text = text.strip("\n")
+    if text.startswith("---"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    return f"---\n{text}\n"
+
+
+def is_candidate(path: Path, command: str) -> bool:
+    """Whether a file found in a directory or by a glob is an input of `command`."""
+    name = path.name
+    if name == ".sops.yaml" or not name.endswith(".yaml"):
+        return False
+    if command == "encrypt":
+        return not name.endswith(ENC_SUFFIX)
+    return name.endswith(ENC_SUFFIX)
+
+
+def expand_inputs(inputs: list[str], command: str) -> list[Path]:
+    """Expands files, directories (recursively) and glob patterns into a list of files.
+
+    A directory given to `encrypt` only yields plain files that already have an
+    encrypted sibling (re-encryption), so manifests such as kustomization.yaml are
+    never encrypted by accident; name new secrets explicitly or with a glob.
+    """
+    files: list[Path] = []
+    for raw in inputs:
+        path = Path(raw).expanduser()
+        if glob.has_magic(raw):
+            matches = [Path(p) for p in sorted(glob.glob(os.path.expanduser(raw), recursive=True))]
+            files += [p for p in matches if p.is_file() and is_candidate(p, command)]
+        elif path.is_dir():
+            matches = sorted(p for p in path.rglob("*.yaml") if is_candidate(p, command))
+            if command == "encrypt":
+                matches = [p for p in matches if p.with_name(p.stem + ENC_SUFFIX).exists()]
+            files += matches
+        elif path.exists():
+            files.append(path)
+        else:
+            raise SopsError(f"file not found: {path}")
+
+    seen: set[Path] = set()
+    unique = []
+    for file in files:
+        file = file.resolve()
+        if file not in seen:
+            seen.add(file)
+            unique.append(file)
+    return unique
+
+
+def resolve_sops_config(file: Path, override: Path | None, verbose: bool) -> Path | None:
+    if override is not None:
+        return override
+    sops_config = find_sops_config(file.parent)
+    if verbose:
+        if sops_config:
+            print(f"[config] .sops.yaml found for {file}: {sops_config}")
+        else:
+            print(
+                f"[config] No .sops.yaml found for {file}, sops will use its default configuration")
+    return sops_config
+
+
+def run_batch(command: str, files: list[Path], age_keys: Path, sops_config: Path | None,
+              jobs: int, verbose: bool, manifest: Manifest | None = None,
+              force: bool = False, engine: str = "sops", journal: RotationJournal | None = None,
+              steps: tuple[str, ...] = ROTATE_STEPS) -> list[tuple[Path, str, SopsError | None]]:
+    """Runs `command` on every file with at most `jobs` sops processes at a time.
+
+    Results are printed in input order as soon as they are available (so `view` and
+    `render` output is never interleaved); errors are reported and collected, not fatal,
+    except for `render`: a partial stream piped to `kubectl apply` would apply part of an
+    overlay, so the first failure ends the stream and the remaining files are "skipped".
+    At most 2 × `jobs` results are held in memory ahead of the one being printed. On
+    Ctrl-C, files not started yet are cancelled (the manifest still records the others).
+    Returns (file, status, error) per file, status being "done", "unchanged", "failed"
+    or "skipped".
+    """
+    def _process(file: Path) -> str | None:
+        config = resolve_sops_config(file, sops_config, verbose)
+        if command in ("view", "render"):
+            return cmd_view(file, age_keys, config, verbose, engine)
+        if command == "rotate":
+            return cmd_rotate(file, age_keys, config, verbose, journal, steps)
+        if command == "encrypt":
+            return cmd_encrypt(file, age_keys, config, verbose, manifest, force)
+        return cmd_decrypt(file, age_keys, config, verbose, manifest, force, engine)
+
+    results = []
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            pending = iter(files)
+            window: deque = deque()
+            for file in pending:
+                window.append((file, pool.submit(_process, file)))
+                if len(window) >= 2 * jobs:
+                    break
+
+            try:
+                while window:
+                    file, future = window.popleft()
+                    next_file = next(pending, None)
+                    if next_file is not None:
+                        window.append((next_file, pool.submit(_process, next_file)))
+                    try:
+                        output = future.result()
+                    except SopsError as e:
+                        print(f"Failed: {file}: {e}", file=sys.stderr)
+                        results.append((file, "failed", e))
+                        if command == "render":
+                            for _, queued in window:
+                                queued.cancel()
+                            skipped = [queued_file for queued_file, _ in window] + list(pending)
+                            window.clear()
+                            results.extend((queued_file, "skipped", None) for queued_file in skipped)
+                            print(f"Stopped rendering: {len(skipped)} file(s) after {file} not written",
+                                  file=sys.stderr)
+                        continue
+                    if output is None:
+                        if verbose:
+                            print(f"Unchanged: {file}")
+                        results.append((file, "unchanged", None))
+                        continue
+                    if command == "render":
+                        # Flushed per document so a consumer (kubectl) starts on the first one
+                        sys.stdout.write(as_document(output))
+                        sys.stdout.flush()
+                    elif command == "view":
+                        print(output, end="")
+                    else:
+                        print(output)
+                    results.append((file, "done", None))
+            except KeyboardInterrupt:
+                for _, future in window:
+                    future.cancel()
+                raise
+    finally:
+        if manifest is not None:
+            manifest.save()
+    return results
 
 
 def main():
@@ -119,6 +851,30 @@ def main():
     )
     parser.add_argument("-v", "--verbose",
                         action="store_true", help="Verbose output")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=DEFAULT_JOBS,
+        metavar="N",
+        help=f"Maximum number of files processed in parallel (default: {DEFAULT_JOBS})",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=DEFAULT_MANIFEST,
+        metavar="PATH",
+        help=f"Local record of processed files, used to skip unchanged ones (default: {DEFAULT_MANIFEST})",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=ENGINES,
+        default="sops",
+        help="Decryption engine: 'sops' always runs the sops binary, 'native' decrypts age-encrypted "
+             "files in-process (comments are not preserved), 'auto' uses native and falls back to "
+             "sops (default: sops)",
+    )
 
     subparsers = parser.add_subparsers(
         dest="command", required=True, metavar="COMMAND")
@@ -127,37 +883,115 @@ def main():
         ("encrypt", "Encrypt a .yaml file → .enc.yaml"),
         ("decrypt", "Decrypt a .enc.yaml file → .yaml"),
         ("view", "Display a .enc.yaml file in plaintext (without writing to disk)"),
+        ("render", "Decrypt .enc.yaml files to stdout as one multi-document YAML stream"),
+        ("rotate", "Re-key .enc.yaml files: update recipients from .sops.yaml and rotate the data key"),
     ]:
         sub = subparsers.add_parser(cmd, help=help_text)
         sub.add_argument(
-            "-f", "--file", type=Path, required=True, metavar="FILE", help="Input file"
+            "-f", "--file", action="extend", nargs="+", required=True, metavar="FILE",
+            help="Input file(s): files, directories (searched recursively) or glob patterns",
         )
+        if cmd in ("encrypt", "decrypt"):
+            sub.add_argument(
+                "--force", action="store_true",
+                help="Process every file, even if it is unchanged since the last run",
+            )
+        if cmd == "rotate":
+            sub.add_argument(
+                "--only", choices=ROTATE_STEPS, default=None,
+                help="Only update the recipients (updatekeys) or only rotate the data key (default: both)",
+            )
+            sub.add_argument(
+                "--journal", type=Path, default=DEFAULT_JOURNAL, metavar="PATH",
+                help=f"Progress journal used to resume an interrupted run (default: {DEFAULT_JOURNAL})",
+            )
+            sub.add_argument(
+                "--restart", action="store_true",
+                help="Ignore the progress of an interrupted run and rotate every file again",
+            )
 
     args = parser.parse_args()
 
-    check_sops()
-
-    file = args.file.resolve()
-    if not file.exists():
-        sys.exit(f"Error: file not found: {file}")
+    # The native engine only decrypts: sops is needed to encrypt, or as its fallback
+    if args.command in ("encrypt", "rotate") or args.engine == "sops":
+        check_sops()
+    elif not native_available():
+        if args.engine == "native":
+            sys.exit("Error: the native engine requires the 'cryptography' and 'PyYAML' packages.")
+        check_sops()
+
+    try:
+        files = expand_inputs(args.file, args.command)
+    except SopsError as e:
+        sys.exit(f"Error: {e}")
+    if not files:
+        sys.exit(f"Error: no files to {args.command} in: {' '.join(args.file)}")
 
     age_keys = args.age_keys.expanduser()
     if not age_keys.exists():
         sys.exit(f"Error: age keys file not found: {age_keys}")
 
-    sops_config = args.sops_config
-    if sops_config is None:
-        sops_config = find_sops_config(file.parent)
-        if args.verbose:
-            if sops_config:
-                print(f"[config] .sops.yaml found: {sops_config}")
-            else:
-                print(
-                    "[config] No .sops.yaml found, sops will use its default configuration")
-
-    dispatch = {"encrypt": cmd_encrypt,
-                "decrypt": cmd_decrypt, "view": cmd_view}
-    dispatch[args.command](file, age_keys, sops_config, args.verbose)
+    manifest = Manifest(args.manifest.expanduser()) if args.command in ("encrypt", "decrypt") else None
+
+    journal = None
+    steps = ROTATE_STEPS
+    if args.command == "rotate":
+        steps = (args.only,) if args.only else ROTATE_STEPS
+        try:
+            plan = plan_rotation(files, args.sops_config)
+        except SopsError as e:
+            sys.exit(f"Error: {e}")
+        print(f"Rotating {len(files)} file(s) in {len(plan)} group(s) ({' + '.join(steps)}):")
+        for label, rule, group in plan:
+            print(f"  {label}: {len(group)} file(s), {describe_recipients(rule)}")
+        # Grouped so each creation rule's files are re-keyed together
+        files = [file for _, _, group in plan for file in group]
+        journal = RotationJournal(args.journal.expanduser(), steps, args.restart,
+                                  sops_config_fingerprints(files, args.sops_config))
+        if journal.discarded:
+            print(f"Ignoring {journal.path}: the steps or .sops.yaml changed since it was written")
+        elif journal.resumed:
+            print(f"Resuming: {journal.resumed} file(s) already rotated according to {journal.path}")
+
+    started = time.perf_counter()
+    try:
+        results = run_batch(args.command, files, age_keys, args.sops_config,
+                            max(1, args.jobs), args.verbose, manifest, getattr(args, "force", False),
+                            args.engine, journal, steps)
+    except KeyboardInterrupt:
+        if journal is not None:
+            sys.exit(f"\nInterrupted: re-run the same command to resume (progress in {journal.path})")
+        raise
+    failed = [(file, error) for file, status, error in results if status == "failed"]
+    unchanged = sum(1 for _, status, _ in results if status == "unchanged")
+    skipped = sum(1 for _, status, _ in results if status == "skipped")
+    if journal is not None:
+        if failed:
+            print(f"Progress kept in {journal.path}: re-run the same command to retry the failed files",
+                  file=sys.stderr)
+        else:
+            journal.finish()
+
+    if len(files) == 1:
+        if failed:
+            sys.exit(failed[0][1].returncode)
+        if unchanged and args.command == "rotate":
+            print(f"Already rotated: {files[0]} (use --restart to rotate it again)")
+        elif unchanged:
+            print(f"Unchanged: {files[0]} (use --force to process it anyway)")
+        return
+
+    print(
+        f"\nSummary: {len(results) - len(failed) - unchanged - skipped} processed, {unchanged} "
+        f"{'already rotated' if args.command == 'rotate' else 'unchanged'}, "
+        f"{len(failed)} failed{f', {skipped} skipped' if skipped else ''} "
+        f"({len(files)} files in {time.perf_counter() - started:.2f}s)",
+        file=sys.stderr,
+    )
+    for file, error in failed:
+        print(f"  ✗ {file}: {error}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,369 @@
+"""
+Unit tests for sops-tool.py.
+
+Covers:
+  - Bech32 decoding of age identities
+  - Native decryption of SOPS files against fixtures built with the independent `age`
+    package (testdata/make_fixtures.py): multi-document files, several recipients,
+    value types, unencrypted suffix
+  - Tampered values, tampered MAC, wrong key, and the fallback to the sops binary
+  - Rotation journal: resume after an interruption, invalidation when .sops.yaml changes
+  - Manifest: which encrypt runs are skipped (touched, edited or deleted files, changed
+    keys or .sops.yaml, --force)
+  - render: documents streamed in input order, stream ended by the first failure
+
+Dependencies:
+  pip install cryptography pyyaml
+
+Run tests:
+    python -m unittest test_sops_tool.py
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import re
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import yaml
+
+HERE = Path(__file__).parent
+TESTDATA = HERE / "testdata"
+
+_spec = importlib.util.spec_from_file_location("sops_tool", HERE / "sops-tool.py")
+sops_tool = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(sops_tool)
+
+EXPECTED = [
+    {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "metadata": {"name": "db", "namespace": "prod"},
+        "stringData": {
+            "user": "admin",
+            "password": "s3cr3t: with colon",
+            "port": 5432,
+            "ratio": 2.5,
+            "enabled": True,
+            "hosts": ["a", "b"],
+            "note_unencrypted": "visible",
+        },
+    },
+    {"apiVersion": "v1", "kind": "Secret", "metadata": {"name": "api"}, "data": {"token": "dG9rZW4="}},
+]
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def flip_base64_char(text: str) -> str:
+    return text[:-1] + ("A" if text[-1] != "A" else "B")
+
+
+class FixtureTestCase(unittest.TestCase):
+    """Works on a copy of the fixture in a temporary directory."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.file = Path(tmp.name) / "secret.enc.yaml"
+        self.file.write_text((TESTDATA / "secret.enc.yaml").read_text())
+        self.keys = TESTDATA / "keys.txt"
+
+    def edit(self, pattern: str, replace):
+        text = self.file.read_text()
+        edited, count = re.subn(pattern, replace, text, count=1)
+        self.assertEqual(count, 1, f"pattern not found in fixture: {pattern}")
+        self.file.write_text(edited)
+
+    def edit_metadata(self, change):
+        loader = sops_tool._yaml_loader()
+        documents = list(yaml.load_all(self.file.read_text(), Loader=loader))
+        metadata = dict(documents[0]["sops"])
+        change(metadata)
+        for doc in documents:
+            doc["sops"] = metadata
+        self.file.write_text(yaml.safe_dump_all(documents, sort_keys=False))
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+class TestBech32(unittest.TestCase):
+
+    def setUp(self):
+        self.identity = next(line for line in (TESTDATA / "keys.txt").read_text().splitlines()
+                             if line.startswith("AGE-SECRET-KEY-1"))
+
+    def test_decodes_an_age_identity(self):
+        hrp, payload = sops_tool.bech32_decode(self.identity)
+        self.assertEqual(hrp, "age-secret-key-")
+        self.assertEqual(len(payload), 32)
+
+    def test_rejects_a_bad_checksum(self):
+        corrupted = self.identity[:-1] + ("Q" if self.identity[-1] != "Q" else "P")
+        with self.assertRaises(ValueError):
+            sops_tool.bech32_decode(corrupted)
+
+
+class TestNativeDecrypt(FixtureTestCase):
+
+    def test_decrypts_every_document(self):
+        """Multi-document file, our key being the second age stanza, every value type."""
+        plain = sops_tool.native_decrypt(self.file, self.keys)
+        self.assertEqual(list(yaml.safe_load_all(plain)), EXPECTED)
+
+    def test_any_recipient_key_decrypts(self):
+        plain = sops_tool.native_decrypt(self.file, TESTDATA / "other-keys.txt")
+        self.assertEqual(list(yaml.safe_load_all(plain)), EXPECTED)
+
+    def test_output_has_no_sops_metadata(self):
+        self.assertNotIn("sops:", sops_tool.native_decrypt(self.file, self.keys))
+
+    def test_tampered_value_fails(self):
+        self.edit(r"(user: ENC\[AES256_GCM,data:)([^,]+)", lambda m: m[1] + flip_base64_char(m[2]))
+        with self.assertRaisesRegex(sops_tool.SopsError, "stringData:user:"):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+    def test_edited_unencrypted_value_fails_the_mac(self):
+        """Values left in clear are still covered by the MAC."""
+        self.edit(r"note_unencrypted: visible", "note_unencrypted: edited")
+        with self.assertRaisesRegex(sops_tool.NativeUnsupported, "MAC mismatch"):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+    def test_tampered_mac_fails(self):
+        self.edit(r"(mac: ENC\[AES256_GCM,data:)([^,]+)", lambda m: m[1] + flip_base64_char(m[2]))
+        with self.assertRaises(sops_tool.SopsError):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+    def test_changed_lastmodified_fails(self):
+        """The MAC is authenticated with the lastmodified timestamp."""
+        self.edit_metadata(lambda metadata: metadata.update(lastmodified="2030-01-01T00:00:00Z"))
+        with self.assertRaises(sops_tool.SopsError):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+    def test_wrong_key_is_unsupported(self):
+        with self.assertRaisesRegex(sops_tool.NativeUnsupported, "none of the age recipients"):
+            sops_tool.native_decrypt(self.file, TESTDATA / "wrong-keys.txt")
+
+    def test_file_without_age_recipients_is_unsupported(self):
+        def to_pgp(metadata):
+            metadata["age"] = []
+            metadata["pgp"] = [{"fp": "0" * 40, "enc": "-----BEGIN PGP MESSAGE-----"}]
+        self.edit_metadata(to_pgp)
+        with self.assertRaisesRegex(sops_tool.NativeUnsupported, "no age recipients"):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+    def test_key_groups_are_unsupported(self):
+        self.edit_metadata(lambda metadata: metadata.update(shamir_threshold=2))
+        with self.assertRaisesRegex(sops_tool.NativeUnsupported, "key groups"):
+            sops_tool.native_decrypt(self.file, self.keys)
+
+
+class TestEngineSelection(FixtureTestCase):
+
+    def sops_result(self):
+        return mock.Mock(stdout="decrypted by sops\n")
+
+    def test_default_engine_runs_sops(self):
+        with mock.patch.object(sops_tool, "run_sops", return_value=self.sops_result()) as run_sops:
+            self.assertEqual(sops_tool.decrypt_text(self.file, self.keys, None, False), "decrypted by sops\n")
+        self.assertEqual(run_sops.call_args.args[0][:2], ["sops", "--decrypt"])
+
+    def test_auto_decrypts_natively(self):
+        with mock.patch.object(sops_tool, "run_sops") as run_sops:
+            plain = sops_tool.decrypt_text(self.file, self.keys, None, False, engine="auto")
+        run_sops.assert_not_called()
+        self.assertEqual(list(yaml.safe_load_all(plain)), EXPECTED)
+
+    def test_auto_falls_back_to_sops(self):
+        with mock.patch.object(sops_tool, "run_sops", return_value=self.sops_result()) as run_sops:
+            plain = sops_tool.decrypt_text(self.file, TESTDATA / "wrong-keys.txt", None, False, engine="auto")
+        run_sops.assert_called_once()
+        self.assertEqual(plain, "decrypted by sops\n")
+
+    def test_native_reports_instead_of_falling_back(self):
+        with mock.patch.object(sops_tool, "run_sops") as run_sops:
+            with self.assertRaisesRegex(sops_tool.SopsError, "native engine"):
+                sops_tool.decrypt_text(self.file, TESTDATA / "wrong-keys.txt", None, False, engine="native")
+        run_sops.assert_not_called()
+
+
+class TestRotationJournal(unittest.TestCase):
+    """sops itself is mocked: only which files get (re-)rotated is checked."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name).resolve()
+        self.config = self.root / ".sops.yaml"
+        self.config.write_text("creation_rules:\n  - age: age1first,age1compromised\n")
+        self.files = [self.root / name for name in ("a.enc.yaml", "b.enc.yaml")]
+        for file in self.files:
+            file.write_text(f"{file.name}: ENC[...]\n")
+        self.journal_path = self.root / "journal.jsonl"
+        sops_tool.fingerprint.cache_clear()
+        sops_tool.find_sops_config.cache_clear()
+
+    def open_journal(self, restart: bool = False):
+        sops_tool.fingerprint.cache_clear()
+        configs = sops_tool.sops_config_fingerprints(self.files, None)
+        return sops_tool.RotationJournal(self.journal_path, sops_tool.ROTATE_STEPS, restart, configs)
+
+    def rotate(self, journal) -> list[str]:
+        """Rotates every file, returning the names sops was run on."""
+        rotated = []
+        with mock.patch.object(sops_tool, "run_sops") as run_sops:
+            for file in self.files:
+                sops_tool.cmd_rotate(file, TESTDATA / "keys.txt", self.config, False, journal)
+        for call in run_sops.call_args_list:
+            name = Path(call.args[0][-1]).name
+            if name not in rotated:
+                rotated.append(name)
+        return rotated
+
+    def interrupted_run(self):
+        """Rotates the first file only, as if the run had been killed after it."""
+        journal = self.open_journal()
+        with mock.patch.object(sops_tool, "run_sops"):
+            sops_tool.cmd_rotate(self.files[0], TESTDATA / "keys.txt", self.config, False, journal)
+
+    def test_resume_skips_files_already_rotated(self):
+        self.interrupted_run()
+        journal = self.open_journal()
+        self.assertEqual(journal.resumed, 1)
+        self.assertFalse(journal.discarded)
+        self.assertEqual(self.rotate(journal), ["b.enc.yaml"])
+
+    def test_file_modified_since_is_rotated_again(self):
+        self.interrupted_run()
+        self.files[0].write_text("a.enc.yaml: ENC[restored from backup]\n")
+        self.assertEqual(self.rotate(self.open_journal()), ["a.enc.yaml", "b.enc.yaml"])
+
+    def test_changed_sops_config_discards_the_journal(self):
+        """Dropping a recipient after an interrupted run must re-key the files done before."""
+        self.interrupted_run()
+        self.config.write_text("creation_rules:\n  - age: age1first\n")
+        journal = self.open_journal()
+        self.assertTrue(journal.discarded)
+        self.assertEqual(journal.resumed, 0)
+        self.assertEqual(self.rotate(journal), ["a.enc.yaml", "b.enc.yaml"])
+
+    def test_restart_ignores_the_journal(self):
+        self.interrupted_run()
+        self.assertEqual(self.rotate(self.open_journal(restart=True)), ["a.enc.yaml", "b.enc.yaml"])
+
+    def test_truncated_last_line_is_ignored(self):
+        self.interrupted_run()
+        with open(self.journal_path, "a") as f:
+            f.write('{"file": "')
+        journal = self.open_journal()
+        self.assertEqual(journal.resumed, 1)
+        self.assertEqual(self.rotate(journal), ["b.enc.yaml"])
+        self.assertEqual(self.open_journal().resumed, 2)
+
+
+class TestManifest(unittest.TestCase):
+    """sops itself is mocked: only whether it runs again is checked."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.file = self.root / "secret.yaml"
+        self.file.write_text("password: s3cr3t\n")
+        self.out_file = self.root / "secret.enc.yaml"
+        self.config = self.root / ".sops.yaml"
+        self.config.write_text("creation_rules:\n  - age: age1first\n")
+        self.manifest = sops_tool.Manifest(self.root / "manifest.json")
+        sops_tool.fingerprint.cache_clear()
+        self.assertTrue(self.encrypt())
+
+    def encrypt(self, keys: Path = TESTDATA / "keys.txt", force: bool = False) -> bool:
+        """Runs encrypt, returning whether sops was run."""
+        encrypted = mock.Mock(stdout="password: ENC[...]\n")
+        with mock.patch.object(sops_tool, "run_sops", return_value=encrypted) as run_sops:
+            sops_tool.cmd_encrypt(self.file, keys, self.config, False, self.manifest, force)
+        return run_sops.called
+
+    def test_unchanged_file_is_skipped(self):
+        self.assertFalse(self.encrypt())
+
+    def test_touched_file_with_the_same_content_is_skipped(self):
+        stat = self.file.stat()
+        os.utime(self.file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertFalse(self.encrypt())
+
+    def test_edited_file_is_encrypted_again(self):
+        self.file.write_text("password: changed\n")
+        self.assertTrue(self.encrypt())
+
+    def test_deleted_output_is_written_again(self):
+        self.out_file.unlink()
+        self.assertTrue(self.encrypt())
+        self.assertTrue(self.out_file.exists())
+
+    def test_other_keys_are_a_context_mismatch(self):
+        self.assertTrue(self.encrypt(keys=TESTDATA / "other-keys.txt"))
+
+    def test_changed_sops_config_is_a_context_mismatch(self):
+        self.config.write_text("creation_rules:\n  - age: age1second\n")
+        sops_tool.fingerprint.cache_clear()
+        self.assertTrue(self.encrypt())
+
+    def test_force_encrypts_anyway(self):
+        self.assertTrue(self.encrypt(force=True))
+
+    def test_entries_survive_a_reload(self):
+        self.manifest.save()
+        self.manifest = sops_tool.Manifest(self.manifest.path)
+        self.assertFalse(self.encrypt())
+
+
+class TestRender(unittest.TestCase):
+    """cmd_view is stubbed: only the stream run_batch writes is checked."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.files = [Path(tmp.name) / f"{name}.enc.yaml" for name in ("a", "b", "c", "d")]
+
+    def render(self, fail: str | None = None) -> tuple[list, str]:
+        def fake_view(file, age_keys, sops_config, verbose, engine):
+            # Earlier files finish last, so input order has to be restored
+            time.sleep(0.05 * (len(self.files) - self.files.index(file)))
+            if file.stem.removesuffix(".enc") == fail:
+                raise sops_tool.SopsError("sops failed")
+            return f"---\nname: {file.stem.removesuffix('.enc')}\n"
+
+        stdout = io.StringIO()
+        with mock.patch.object(sops_tool, "cmd_view", fake_view), \
+                contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            results = sops_tool.run_batch("render", self.files, TESTDATA / "keys.txt", None, 4, False)
+        return results, stdout.getvalue()
+
+    def test_as_document(self):
+        self.assertEqual(sops_tool.as_document("a: 1"), "---\na: 1\n")
+        self.assertEqual(sops_tool.as_document("---\na: 1\n\n"), "---\na: 1\n")
+        self.assertEqual(sops_tool.as_document("---"), "---\n\n")
+
+    def test_documents_are_written_in_input_order(self):
+        results, stream = self.render()
+        self.assertEqual([doc["name"] for doc in yaml.safe_load_all(stream)], ["a", "b", "c", "d"])
+        self.assertEqual([status for _, status, _ in results], ["done"] * 4)
+
+    def test_first_failure_ends_the_stream(self):
+        results, stream = self.render(fail="b")
+        self.assertEqual([doc["name"] for doc in yaml.safe_load_all(stream)], ["a"])
+        self.assertEqual([status for _, status, _ in results], ["done", "failed", "skipped", "skipped"])
+
+
+if __name__ == "__main__":
+    unittest.main()
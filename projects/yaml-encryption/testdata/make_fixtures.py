@@ -0,0 +1,117 @@
+"""
+Regenerates the SOPS fixtures used by test_sops_tool.py.
+
+The data key is wrapped with the independent `age` Python package (not with sops-tool's
+own code), and values and the MAC are encrypted following the SOPS AES256_GCM format,
+so the tests check the native engine against an implementation it does not share.
+
+    pip install age cryptography pyyaml
+    python testdata/make_fixtures.py
+
+The keys written here are test keys: never use them for real secrets.
+"""
+
+import base64
+import hashlib
+import io
+import os
+from pathlib import Path
+
+import yaml
+from age.file import Encryptor
+from age.keys.agekey import AgePrivateKey
+from age.utils.asciiarmor import AGE_PEM_LABEL, write_ascii_armored
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+HERE = Path(__file__).parent
+LASTMODIFIED = "2026-10-19T10:00:00Z"
+
+DOCUMENTS = [
+    {
+        "apiVersion": "v1",
+        "kind": "Secret",
+        "metadata": {"name": "db", "namespace": "prod"},
+        "stringData": {
+            "user": "admin",
+            "password": "s3cr3t: with colon",
+            "port": 5432,
+            "ratio": 2.5,
+            "enabled": True,
+            "hosts": ["a", "b"],
+            "note_unencrypted": "visible",
+        },
+    },
+    {"apiVersion": "v1", "kind": "Secret", "metadata": {"name": "api"}, "data": {"token": "dG9rZW4="}},
+]
+
+
+def encrypt_value(value, data_key: bytes, aad: str) -> str:
+    if isinstance(value, bool):
+        kind, plaintext = "bool", b"True" if value else b"False"
+    elif isinstance(value, int):
+        kind, plaintext = "int", str(value).encode()
+    elif isinstance(value, float):
+        kind, plaintext = "float", repr(value).encode()
+    else:
+        kind, plaintext = "str", value.encode()
+    iv = os.urandom(32)
+    sealed = AESGCM(data_key).encrypt(iv, plaintext, aad.encode())
+    b64 = lambda data: base64.b64encode(data).decode()
+    return f"ENC[AES256_GCM,data:{b64(sealed[:-16])},iv:{b64(iv)},tag:{b64(sealed[-16:])},type:{kind}]"
+
+
+def mac_bytes(value) -> bytes:
+    if isinstance(value, bool):
+        return b"True" if value else b"False"
+    if isinstance(value, float):
+        return repr(value).removesuffix(".0").encode()
+    return str(value).encode()
+
+
+def encrypt_tree(node, path, data_key, digest):
+    if isinstance(node, dict):
+        return {key: encrypt_tree(value, path + [key], data_key, digest) for key, value in node.items()}
+    if isinstance(node, list):
+        return [encrypt_tree(item, path, data_key, digest) for item in node]
+    digest.update(mac_bytes(node))
+    if any(key.endswith("_unencrypted") for key in path):
+        return node
+    return encrypt_value(node, data_key, ":".join(path) + ":")
+
+
+def sops_file(documents, recipients) -> str:
+    data_key = os.urandom(32)
+    age_file = io.BytesIO()
+    encryptor = Encryptor([identity.public_key() for identity in recipients], age_file)
+    encryptor.write(data_key)
+    encryptor.close()
+    armored = io.StringIO()
+    write_ascii_armored(armored, AGE_PEM_LABEL, age_file.getvalue())
+
+    digest = hashlib.sha512()
+    encrypted = [encrypt_tree(doc, [], data_key, digest) for doc in documents]
+    metadata = {
+        "kms": [],
+        "age": [{"recipient": recipients[-1].public_key().public_string(), "enc": armored.getvalue()}],
+        "lastmodified": LASTMODIFIED,
+        "mac": encrypt_value(digest.hexdigest().upper(), data_key, LASTMODIFIED),
+        "unencrypted_suffix": "_unencrypted",
+        "version": "3.9.0",
+    }
+    for doc in encrypted:
+        doc["sops"] = metadata
+    return yaml.safe_dump_all(encrypted, sort_keys=False)
+
+
+def keys_file(identity) -> str:
+    return f"# public key: {identity.public_key().public_string()}\n{identity.private_string()}\n"
+
+
+if __name__ == "__main__":
+    identity = AgePrivateKey.generate()
+    other = AgePrivateKey.generate()
+    (HERE / "keys.txt").write_text(keys_file(identity))
+    (HERE / "other-keys.txt").write_text(keys_file(other))
+    (HERE / "wrong-keys.txt").write_text(keys_file(AgePrivateKey.generate()))  # not a recipient
+    # Two recipients, ours last: the native engine has to skip a stanza it cannot open
+    (HERE / "secret.enc.yaml").write_text(sops_file(DOCUMENTS, [other, identity]))